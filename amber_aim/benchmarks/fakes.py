@@ -0,0 +1,240 @@
+"""Local stand-ins for TwelveLabs and OpenAI with realistic latencies.
+
+The fake TwelveLabs client replaces TwelveLabsService.client and the fake
+OpenAI transport backs the default client of the agents SDK, so the real
+service code runs end to end without network access.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+from twelvelabs.core.pagination import SyncPager
+from twelvelabs.types import (
+    IndexSchema,
+    SearchItem,
+    SearchItemClipsItem,
+    VideoVector,
+    VideoVectorSystemMetadata,
+)
+
+from aim.services.cassette import LatencyModel
+
+ANALYZE_TEXT = """Summary: A trail runner crosses a mountain ridge at sunrise.
+00:12 - 00:20 Runner stops at the summit, calm moment with wide views
+00:45 - 00:52 Transition to the descent, upbeat music starts
+01:30 - 01:38 Scene change to a cafe, the runner relaxes with friends
+Tone: inspiring, energetic, outdoor adventure
+Color: warm golden tones"""
+
+
+class LatencySampler:
+    """Thread-safe, seeded sampler of a latency distribution."""
+
+    def __init__(self, spec: str, seed: int = 0):
+        """Initialize latency sampler.
+
+        Args:
+            spec: Latency spec, see aim.services.cassette.LatencyModel
+            seed: Seed of the samples
+        """
+        self.model = LatencyModel(spec)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """Draw a latency in seconds."""
+        with self._lock:
+            return self.model.sample(0.0, self._rng)
+
+
+class _Namespace:
+    def __init__(self, **methods: Any):
+        self.__dict__.update(methods)
+
+
+class FakeTwelveLabsClient:
+    """Subset of the TwelveLabs SDK client used by TwelveLabsService.
+
+    Every call sleeps for a sampled latency. Search results are paged like
+    the real API, scores decreasing across pages.
+    """
+
+    def __init__(
+        self,
+        latency: LatencySampler,
+        analyze_latency: LatencySampler,
+        ad_count: int = 200,
+        video_count: int = 50,
+        page_size: int = 10,
+    ):
+        """Initialize fake TwelveLabs client.
+
+        Args:
+            latency: Latency of the index, task and search calls
+            analyze_latency: Latency of the analyze calls
+            ad_count: Ads returned by searches
+            video_count: Videos listed per index
+            page_size: Search results per page
+        """
+        self._latency = latency
+        self._analyze_latency = analyze_latency
+        self._ad_count = ad_count
+        self._video_count = video_count
+        self._page_size = page_size
+        self._task_ids = itertools.count()
+
+        self.tasks = _Namespace(create=self._create_task, list=self._list_tasks)
+        self.search = _Namespace(query=self._search)
+        self.indexes = _Namespace(
+            list=self._list_indexes,
+            retrieve=self._retrieve_index,
+            videos=_Namespace(list=self._list_videos),
+        )
+
+    def _wait(self, sampler: LatencySampler | None = None) -> None:
+        time.sleep((sampler or self._latency).sample())
+
+    def _create_task(self, index_id: str, video_url: str) -> SimpleNamespace:
+        self._wait()
+        number = next(self._task_ids)
+        return SimpleNamespace(id=f"task-{number}", video_id=f"video-{number}")
+
+    def _list_tasks(self, index_id: str) -> list[SimpleNamespace]:
+        self._wait()
+        # No task matches, analysis starts right away like for ready videos
+        return []
+
+    def analyze(self, video_id: str, prompt: str, **kwargs: Any) -> SimpleNamespace:
+        self._wait(self._analyze_latency)
+        return SimpleNamespace(data=ANALYZE_TEXT)
+
+    def _search(self, index_id: str, query_text: str, **kwargs: Any) -> SyncPager:
+        self._wait()
+        # Stable per query, so repeated queries return the same ranking
+        rng = random.Random(f"{index_id}:{query_text}")
+        ads = rng.sample(range(self._ad_count), min(self._ad_count, 50))
+
+        def page(number: int) -> SyncPager:
+            start = number * self._page_size
+            # SDK types, so responses can be recorded to cassettes
+            items = [
+                SearchItem(
+                    id=f"ad-{ad}",
+                    clips=[
+                        SearchItemClipsItem(
+                            score=95.0 - position,
+                            start=0.0,
+                            end=15.0 + ad % 30,
+                            video_id=f"ad-{ad}",
+                            confidence="high" if position < 10 else "medium",
+                            thumbnail_url=None,
+                            transcription="outdoor energy drink for runners",
+                        )
+                    ],
+                )
+                for position, ad in enumerate(
+                    ads[start : start + self._page_size], start
+                )
+            ]
+            has_next = start + self._page_size < len(ads)
+
+            def get_next() -> SyncPager:
+                self._wait()
+                return page(number + 1)
+
+            return SyncPager(
+                get_next=get_next if has_next else None,
+                has_next=has_next,
+                items=items,
+                response=None,
+            )
+
+        return page(0)
+
+    def _list_indexes(self) -> list[IndexSchema]:
+        self._wait()
+        return [
+            IndexSchema(id="creators", index_name="creators"),
+            IndexSchema(id="ads", index_name="ads"),
+        ]
+
+    def _retrieve_index(self, index_id: str) -> SimpleNamespace:
+        self._wait()
+        return SimpleNamespace(id=index_id)
+
+    def _list_videos(self, index_id: str) -> list[VideoVector]:
+        self._wait()
+        count = self._ad_count if index_id == "ads" else self._video_count
+        return [
+            VideoVector(
+                id=f"{index_id}-video-{number}",
+                system_metadata=VideoVectorSystemMetadata(duration=30.0),
+            )
+            for number in range(count)
+        ]
+
+
+def fake_openai_transport(latency: LatencySampler) -> httpx.MockTransport:
+    """Transport answering OpenAI Responses API calls of the ads agent.
+
+    The first turn of a run asks for one search_ads call, the next turn,
+    which carries the tool output, ends the run.
+
+    Args:
+        latency: Latency of every model call
+
+    Returns:
+        Transport for an AsyncOpenAI client
+    """
+    call_ids = itertools.count()
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency.sample())
+        body = json.loads(request.content)
+        items = body.get("input") if isinstance(body.get("input"), list) else []
+        finished = any(item.get("type") == "function_call_output" for item in items)
+
+        number = next(call_ids)
+        if finished:
+            output = {
+                "type": "message",
+                "id": f"msg-{number}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [
+                    {"type": "output_text", "text": "Done.", "annotations": []}
+                ],
+            }
+        else:
+            output = {
+                "type": "function_call",
+                "id": f"fc-{number}",
+                "call_id": f"call-{number}",
+                "name": "search_ads",
+                "arguments": json.dumps({"query_text": "outdoor energy drinks"}),
+                "status": "completed",
+            }
+
+        return httpx.Response(
+            200,
+            json={
+                "id": f"resp-{number}",
+                "object": "response",
+                "created_at": int(time.time()),
+                "model": body.get("model", "fake"),
+                "output": [output],
+                "parallel_tool_calls": True,
+                "tool_choice": "auto",
+                "tools": [],
+                "status": "completed",
+            },
+        )
+
+    return httpx.MockTransport(handle)
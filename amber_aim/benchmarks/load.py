@@ -0,0 +1,414 @@
+"""End-to-end load benchmark of the API against local stand-ins.
+
+Serves aim.main:app with uvicorn in a background thread, with S3 mocked by
+moto, TwelveLabs replaced by a fake client and the ads agent backed by a
+fake OpenAI transport, then drives the routes at a fixed concurrency.
+
+Usage:
+    python benchmarks/load.py --concurrency 32 --requests 500 \\
+        --output results.json --baseline baseline.json
+
+For each scenario the throughput, latency percentiles and event-loop lag of
+the server are reported and written as JSON, to compare runs before and
+after a change.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+SCENARIOS = ("upload", "index", "index-videos", "suggest", "analyze")
+
+
+def percentile(values: list[float], value: float) -> float | None:
+    """Percentile of values, None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(value * len(ordered)))]
+
+
+def configure_environment(args: argparse.Namespace, workdir: str) -> None:
+    """Point the application settings at the local stand-ins.
+
+    Must run before aim is imported.
+    """
+    os.environ.update(
+        {
+            "AWS_ACCESS_KEY_ID": "benchmark",
+            "AWS_SECRET_ACCESS_KEY": "benchmark",
+            "AWS_DEFAULT_REGION": "us-east-1",
+            "OPENAI_API_KEY": "benchmark",
+            "APP_AWS_S3_BUCKET": "benchmark-bucket",
+            "APP_TWELVE_LABS_API_KEY": "benchmark",
+            "APP_TWELVE_LABS_CREATORS_INDEX_ID": "creators",
+            "APP_TWELVE_LABS_ADS_INDEX_ID": "ads",
+            "APP_LOG_LEVEL": args.log_level,
+            "APP_STATE_PATH": str(Path(workdir) / "state.sqlite3"),
+            # The LLM placement prompt is not served by the fakes
+            "APP_PLACEMENT_ENGINE": "heuristic",
+        }
+    )
+
+
+class LoopLagMonitor:
+    """Measure how late the server event loop runs a periodic callback."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float = 0.01):
+        """Initialize loop lag monitor.
+
+        Args:
+            loop: Event loop of the server
+            interval: Seconds between probes
+        """
+        self.loop = loop
+        self.interval = interval
+        self.lags: list[float] = []
+        self._future = None
+
+    async def _probe(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - expected))
+
+    def start(self) -> None:
+        """Start probing, discarding earlier samples."""
+        self.lags = []
+        self._future = asyncio.run_coroutine_threadsafe(self._probe(), self.loop)
+
+    def stop(self) -> list[float]:
+        """Stop probing and return the lags in seconds."""
+        if self._future is not None:
+            self._future.cancel()
+        return self.lags
+
+
+class BenchmarkServer:
+    """uvicorn serving aim.main:app on a free local port in a thread."""
+
+    def __init__(self) -> None:
+        import uvicorn
+
+        from aim.main import app
+
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=0, log_config=None)
+        )
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_until_complete,
+            args=(self.server.serve(),),
+            name="benchmark-server",
+            daemon=True,
+        )
+
+    def start(self) -> str:
+        """Start the server and return its base URL."""
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def stop(self) -> None:
+        """Stop the server, waiting for in-flight work."""
+        self.server.should_exit = True
+        self.thread.join(timeout=60)
+
+
+def install_fakes(args: argparse.Namespace) -> list[str]:
+    """Create the bucket, swap in the fake clients and store placement results.
+
+    Returns:
+        IDs of the videos with a stored placement result
+    """
+    import boto3
+    from agents import set_default_openai_client, set_tracing_disabled
+    from openai import AsyncOpenAI
+
+    from aim.dependencies import get_s3_service, get_settings, get_twelve_labs_service
+    from aim.services.heuristic_placement import find_placements_heuristic
+
+    from fakes import ANALYZE_TEXT, FakeTwelveLabsClient, LatencySampler
+    from fakes import fake_openai_transport
+
+    settings = get_settings()
+    boto3.client("s3", region_name=settings.aws_region).create_bucket(
+        Bucket=settings.aws_s3_bucket
+    )
+
+    twelve_labs_service = get_twelve_labs_service()
+    twelve_labs_service.client = FakeTwelveLabsClient(
+        latency=LatencySampler(args.twelvelabs_latency, args.seed),
+        analyze_latency=LatencySampler(args.analyze_latency, args.seed + 1),
+        video_count=args.videos,
+    )
+
+    set_tracing_disabled(True)
+    set_default_openai_client(
+        AsyncOpenAI(
+            api_key="benchmark",
+            http_client=httpx.AsyncClient(
+                transport=fake_openai_transport(
+                    LatencySampler(args.openai_latency, args.seed + 2)
+                )
+            ),
+        ),
+        use_for_tracing=False,
+    )
+
+    placement_result = find_placements_heuristic({"prompt": ANALYZE_TEXT})
+    s3_service = get_s3_service()
+    video_ids = [f"bench-video-{number}" for number in range(args.videos)]
+    for video_id in video_ids:
+        s3_service.upload_json_file(
+            f"results/placement_{video_id}.json", placement_result.model_dump()
+        )
+    return video_ids
+
+
+def build_requests(
+    scenario: str, video_ids: list[str], run_id: str
+) -> Callable[[httpx.AsyncClient, int], Any]:
+    """Request factory of a scenario, called with the request number."""
+    if scenario == "upload":
+        return lambda client, n: client.post(
+            "/upload", json={"filename": f"video_{n}.mp4"}
+        )
+    if scenario == "index":
+        return lambda client, n: client.get("/12/index")
+    if scenario == "index-videos":
+        return lambda client, n: client.get("/12/index/creators/video")
+    if scenario == "suggest":
+        return lambda client, n: client.post(
+            "/suggest", json={"video_id": video_ids[n % len(video_ids)]}
+        )
+    if scenario == "analyze":
+        # New video IDs, so every request starts a background analysis
+        return lambda client, n: client.post(
+            "/analyze", json={"video_id": f"{run_id}-{n}", "type": "creator"}
+        )
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+async def wait_for_analyses(
+    client: httpx.AsyncClient, video_ids: list[str], timeout: float
+) -> float:
+    """Wait until the background analyses of video_ids finished.
+
+    Returns:
+        Seconds waited
+    """
+    started = time.perf_counter()
+    pending = set(video_ids)
+    while pending and time.perf_counter() - started < timeout:
+        for video_id in list(pending):
+            response = await client.get(f"/analyze/{video_id}")
+            if response.json().get("status") in ("completed", "failed"):
+                pending.discard(video_id)
+        if pending:
+            await asyncio.sleep(0.5)
+    return time.perf_counter() - started
+
+
+async def run_scenario(
+    base_url: str,
+    scenario: str,
+    requests: int,
+    concurrency: int,
+    video_ids: list[str],
+    monitor: LoopLagMonitor,
+    drain_timeout: float,
+) -> dict[str, Any]:
+    """Send requests with concurrency workers and summarize the run."""
+    run_id = f"bench-{int(time.time())}"
+    send = build_requests(scenario, video_ids, run_id)
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        timeout=120,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+
+        async def worker() -> None:
+            for n in counter:
+                started = time.perf_counter()
+                try:
+                    response = await send(client, n)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                if not status.startswith("2"):
+                    errors[status] = errors.get(status, 0) + 1
+
+        monitor.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - started
+
+        drain = None
+        if scenario == "analyze":
+            drain = await wait_for_analyses(
+                client, [f"{run_id}-{n}" for n in range(requests)], drain_timeout
+            )
+        lags = monitor.stop()
+
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "duration": round(duration, 3),
+        "throughput": round(requests / duration, 2) if duration else None,
+        "latency": {
+            name: percentile(latencies, value)
+            for name, value in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+        }
+        | {"max": max(latencies, default=None)},
+        "loop_lag": {
+            name: percentile(lags, value)
+            for name, value in (("p50", 0.5), ("p99", 0.99))
+        }
+        | {"max": max(lags, default=None)},
+    }
+    if drain is not None:
+        # Background analyses run after the responses, time to finish them all
+        result["background_drain"] = round(drain, 3)
+    return result
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Lines comparing throughput and p95 latency with a baseline run."""
+
+    def change(new: float | None, old: float | None) -> str:
+        if new is None or not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    lines = []
+    for scenario, result in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(scenario)
+        if old is None:
+            continue
+        lines.append(
+            f"{scenario}: throughput {change(result['throughput'], old['throughput'])}, "
+            f"p95 {change(result['latency']['p95'], old['latency']['p95'])}"
+        )
+    return lines
+
+
+def main() -> None:
+    """Parse the command line and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"Comma separated scenarios (default: {','.join(SCENARIOS)})",
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--videos", type=int, default=50, help="Videos with a stored placement"
+    )
+    parser.add_argument(
+        "--twelvelabs-latency",
+        default="lognormal:0.15,0.4",
+        help="Latency of TwelveLabs index, task and search calls",
+    )
+    parser.add_argument(
+        "--analyze-latency",
+        default="lognormal:2,0.3",
+        help="Latency of TwelveLabs analyze calls",
+    )
+    parser.add_argument(
+        "--openai-latency",
+        default="lognormal:0.8,0.4",
+        help="Latency of OpenAI model calls",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=600,
+        help="Seconds to wait for background analyses",
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    output = Path(args.output).resolve() if args.output else None
+    baseline = Path(args.baseline).resolve() if args.baseline else None
+
+    # Results and state files of the app land in a scratch directory
+    workdir = tempfile.mkdtemp(prefix="aim-benchmark-")
+    os.chdir(workdir)
+    configure_environment(args, workdir)
+
+    from moto import mock_aws
+
+    with mock_aws():
+        video_ids = install_fakes(args)
+        server = BenchmarkServer()
+        base_url = server.start()
+        monitor = LoopLagMonitor(server.loop)
+
+        results: dict[str, Any] = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "config": vars(args) | {"scenarios": scenarios},
+            "scenarios": {},
+        }
+        try:
+            for scenario in scenarios:
+                result = asyncio.run(
+                    run_scenario(
+                        base_url,
+                        scenario,
+                        args.requests,
+                        args.concurrency,
+                        video_ids,
+                        monitor,
+                        args.drain_timeout,
+                    )
+                )
+                results["scenarios"][scenario] = result
+                print(f"{scenario}: {json.dumps(result)}")
+
+            from aim.dependencies import get_twelve_labs_service
+
+            hedger = get_twelve_labs_service().search_hedger
+            if hedger is not None:
+                results["search_hedging"] = hedger.stats()
+        finally:
+            server.stop()
+
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2))
+    if baseline is not None:
+        previous = json.loads(baseline.read_text())
+        print("\n".join(["Compared to baseline:", *compare(results, previous)]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Check that a recorded /suggest request replays from its cassettes.
+
+Records one /suggest request against the local stand-ins of the load
+benchmark, then replays it in a fresh process in strict mode, without the
+stand-ins, and compares the suggested ads. Calls whose arguments change
+between runs, such as timeouts derived from the request deadline, must not
+keep the replay from matching them.
+
+Usage:
+    python benchmarks/replay_check.py
+"""
+
+import argparse
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from load import configure_environment, install_fakes
+
+
+def environment_args() -> argparse.Namespace:
+    """Settings of the stand-ins, fast and without random latencies."""
+    return argparse.Namespace(
+        log_level="WARNING",
+        twelvelabs_latency="fixed:0.01",
+        analyze_latency="fixed:0.01",
+        openai_latency="fixed:0.01",
+        seed=0,
+        videos=1,
+    )
+
+
+def suggest(video_id: str) -> dict:
+    """Serve one /suggest request and return its response body."""
+    from fastapi.testclient import TestClient
+
+    from aim.main import app
+
+    with TestClient(app) as client:
+        response = client.post("/suggest", json={"video_id": video_id})
+        response.raise_for_status()
+        return response.json()
+
+
+def record(workdir: str) -> dict:
+    """Run /suggest against the stand-ins, recording every call."""
+    args = environment_args()
+    configure_environment(args, workdir)
+    os.environ["APP_CASSETTE_MODE"] = "record"
+
+    from moto import mock_aws
+
+    with mock_aws():
+        video_ids = install_fakes(args)
+
+        import httpx
+
+        import aim.services.agent
+        from aim.dependencies import get_cassette, get_twelve_labs_service
+
+        from fakes import LatencySampler, fake_openai_transport
+
+        # The stand-ins are installed over the recording proxies, record
+        # through the proxies again
+        service = get_twelve_labs_service()
+        service.client = get_cassette().wrap(service.client, "twelvelabs")
+        openai_client = aim.services.agent.openai_client
+        transport = fake_openai_transport(LatencySampler(args.openai_latency))
+        aim.services.agent.openai_client = functools.partial(
+            openai_client, http_client=httpx.AsyncClient(transport=transport)
+        )
+        return suggest(video_ids[0])
+
+
+def replay(workdir: str) -> dict:
+    """Run /suggest from the cassettes only, failing on any unrecorded call."""
+    args = environment_args()
+    configure_environment(args, workdir)
+    os.environ.update(
+        {
+            "APP_CASSETTE_MODE": "replay",
+            "APP_CASSETTE_STRICT": "true",
+            "APP_CASSETTE_LATENCY": json.dumps({"": "none"}),
+        }
+    )
+    return suggest("bench-video-0")
+
+
+def main() -> None:
+    """Record and replay /suggest in separate processes and compare."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("phase", nargs="?", choices=["record", "replay"])
+    parser.add_argument("--workdir")
+    args = parser.parse_args()
+
+    if args.phase is not None:
+        os.chdir(args.workdir)
+        os.environ["APP_CASSETTE_PATH"] = str(Path(args.workdir) / "cassettes")
+        result = (
+            record(args.workdir) if args.phase == "record" else replay(args.workdir)
+        )
+        print(json.dumps(result))
+        return
+
+    workdir = tempfile.mkdtemp(prefix="aim-replay-check-")
+    responses = {}
+    for phase in ("record", "replay"):
+        completed = subprocess.run(
+            [sys.executable, __file__, phase, "--workdir", workdir],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            sys.exit(f"{phase} failed:\n{completed.stderr}")
+        responses[phase] = json.loads(completed.stdout.splitlines()[-1])
+
+    recorded = [ad["id"] for ad in responses["record"]["suggested_ads"]]
+    replayed = [ad["id"] for ad in responses["replay"]["suggested_ads"]]
+    if not recorded or recorded != replayed:
+        sys.exit(f"Replay differs: recorded {recorded}, replayed {replayed}")
+    print(f"Replay matches the recording: {len(recorded)} ads suggested")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# %%
+import time
+
+from aim.config import Settings
+from aim.services import S3Service
+from aim.services.twelve_labs_service import (
+    TwelveLabsService,
+    build_consolidated_prompt,
+    load_twelvelabs_prompts,
+)
+
+settings = Settings()
+s3_service = S3Service(
+    bucket_name=settings.aws_s3_bucket,
+    region=settings.aws_region,
+    base_path=settings.s3_base_path,
+)
+twelve_labs_service = TwelveLabsService(
+    api_key=settings.twelve_labs_api_key,
+    creators_index_id=settings.twelve_labs_creators_index_id,
+    ads_index_id=settings.twelve_labs_ads_index_id,
+    s3_service=s3_service,
+)
+
+video_id = "68e1899a830688fe0b91e228"
+prompts = load_twelvelabs_prompts()
+# %%
+# Per-prompt mode: one analyze round trip per prompt file
+
+start = time.perf_counter()
+per_prompt_tokens = 0
+for prompt_name, prompt in prompts:
+    result = twelve_labs_service.client.analyze(
+        video_id=video_id, prompt=prompt, temperature=0.2
+    )
+    usage = getattr(result, "usage", None)
+    per_prompt_tokens += getattr(usage, "output_tokens", 0) or 0
+per_prompt_seconds = time.perf_counter() - start
+
+print(
+    f"per-prompt: {len(prompts)} calls, {per_prompt_seconds:.1f}s, "
+    f"{per_prompt_tokens} output tokens"
+)
+# %%
+# Consolidated mode: the whole prompt set in a single round trip
+
+start = time.perf_counter()
+result = twelve_labs_service.client.analyze(
+    video_id=video_id, prompt=build_consolidated_prompt(prompts), temperature=0.2
+)
+consolidated_seconds = time.perf_counter() - start
+usage = getattr(result, "usage", None)
+consolidated_tokens = getattr(usage, "output_tokens", 0) or 0
+
+print(
+    f"consolidated: 1 call, {consolidated_seconds:.1f}s, "
+    f"{consolidated_tokens} output tokens"
+)
+# %%
+# End to end, including re-requests for sections missing from the response
+
+start = time.perf_counter()
+sections = twelve_labs_service.analyze_prompts_consolidated(video_id, prompts)
+print(f"consolidated with fallback: {time.perf_counter() - start:.1f}s")
+print({name: len(text or "") for name, text in sections.items()})
@@ -1,14 +1,172 @@
-"""Application entry point for running the FastAPI server."""
+"""Application entry point for running the FastAPI server.
+
+Usage:
+    python -m aim          Development server with auto-reload
+    python -m aim serve    Production server with one worker per core
+    python -m aim enrich-ads
+                           Profile every ad and build the local ad index
+    python -m aim batch VIDEO_ID ... [--file IDS] [--from-index INDEX_ID]
+                           Backfill placements and ad suggestions offline
+    python -m aim trace ID ... [--spans PATH]
+                           Print the traces of a trace ID or video ID
+"""
+
+import argparse
+import os
+import shutil
+from pathlib import Path
 
 import uvicorn
 
+from aim import tracing
 from aim.config import Settings
 
-if __name__ == "__main__":
+
+def available_cores() -> int:
+    """Number of CPU cores this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def main() -> None:
+    """Parse the command line and start the server."""
+    parser = argparse.ArgumentParser(prog="python -m aim")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="dev",
+        choices=["dev", "serve", "enrich-ads", "batch", "trace"],
+        help="dev runs a single auto-reloading process, serve runs workers, "
+        "enrich-ads builds the local ad index, batch backfills results, "
+        "trace prints recorded traces",
+    )
+    parser.add_argument(
+        "video_ids",
+        nargs="*",
+        default=[],
+        help="Videos to process (batch), trace IDs or attribute values such "
+        "as video IDs to look up (trace)",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Worker processes (default: APP_WORKERS)"
+    )
+    parser.add_argument("--file", help="File with one video ID per line (batch)")
+    parser.add_argument(
+        "--from-index", help="Process every video of a TwelveLabs index (batch)"
+    )
+    parser.add_argument(
+        "--stages",
+        default="analyze,suggest",
+        help="Comma separated stages to run, analyze and suggest (batch)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Videos processed at once (batch)"
+    )
+    parser.add_argument(
+        "--manifest",
+        default="data/batch_manifest.jsonl",
+        help="Progress file, finished stages are skipped on rerun (batch)",
+    )
+    parser.add_argument(
+        "--spans", help="Span file to read (trace, default: APP_TRACING_PATH)"
+    )
+    args = parser.parse_args()
+
     settings = Settings()
+
+    if args.command == "enrich-ads":
+        # Deferred, only this command needs the services
+        from aim.dependencies import get_twelve_labs_service
+        from aim.logging_config import setup_logging
+        from aim.services.ad_index import build_ad_index
+
+        setup_logging(
+            settings.log_level,
+            debug_sample_rate=settings.log_debug_sample_rate,
+            max_queue_size=settings.log_queue_size,
+        )
+        build_ad_index(
+            get_twelve_labs_service(),
+            settings.ad_index_path,
+            dim=settings.ad_index_dim,
+        )
+        return
+
+    if args.command == "batch":
+        from aim.batch import STAGES, BatchManifest, BatchRunner, read_video_ids
+        from aim.logging_config import setup_logging
+
+        setup_logging(
+            settings.log_level,
+            debug_sample_rate=settings.log_debug_sample_rate,
+            max_queue_size=settings.log_queue_size,
+        )
+        tracing.configure(
+            settings.tracing_exporter,
+            path=settings.tracing_path,
+            endpoint=settings.tracing_otlp_endpoint,
+        )
+        stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+        video_ids = read_video_ids(args.video_ids, args.file, args.from_index)
+        if not video_ids:
+            parser.error("batch needs video IDs, --file or --from-index")
+
+        runner = BatchRunner(
+            settings,
+            BatchManifest(args.manifest),
+            stages=stages,
+            concurrency=args.concurrency,
+        )
+        wall_time = runner.run(video_ids)
+        tracing.shutdown()
+        print(runner.summary(len(video_ids), wall_time))
+        return
+
+    if args.command == "trace":
+        if not args.video_ids:
+            parser.error("trace needs trace IDs or video IDs")
+
+        spans = tracing.read_spans(args.spans or settings.tracing_path)
+        for trace in tracing.find_traces(spans, set(args.video_ids)):
+            print(f"Trace {trace[0]['traceId']}")
+            print(tracing.format_trace(trace))
+            print()
+        return
+
+    if args.command == "dev":
+        uvicorn.run(
+            "aim.main:app",
+            host=settings.host,
+            port=settings.port,
+            reload=True,  # Enable auto-reload for development
+        )
+        return
+
+    workers = args.workers or settings.workers or available_cores()
+
+    # Workers share one port, each scrape of /metrics reaches any of them,
+    # so they merge their metrics through snapshots in this directory.
+    # Snapshots of an earlier run must not be merged.
+    metrics_dir = settings.metrics_dir or str(
+        Path(settings.state_path).parent / "metrics"
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.environ["APP_METRICS_DIR"] = metrics_dir
+
     uvicorn.run(
         "aim.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,  # Enable auto-reload for development
+        host=settings.host,
+        port=settings.port,
+        workers=workers,
+        timeout_graceful_shutdown=settings.shutdown_timeout,
+        log_config=None,  # Keep the application JSON logging
     )
+
+
+if __name__ == "__main__":
+    main()
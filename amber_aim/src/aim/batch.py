@@ -0,0 +1,370 @@
+"""Offline batch runs of the analysis and ads suggestion stages.
+
+Backfills placement results and ad suggestions for many videos, for example
+after a prompt change, without going through the API. Videos are processed
+concurrently under the same rate limits as the server, and every finished
+stage is checkpointed to a local manifest so an interrupted run resumes
+where it stopped.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Literal
+
+from aim.config import Settings
+from aim.dependencies import (
+    get_ad_profile_index,
+    get_cassette,
+    get_frequency_capper,
+    get_openai_rate_limiter,
+    get_s3_service,
+    get_twelve_labs_service,
+    get_usage_ledger,
+)
+from aim.models.ads import AdSearchResult
+from aim.models.placement import PlacementResult
+from aim.tracing import span
+
+logger = logging.getLogger(__name__)
+
+Stage = Literal["analyze", "suggest"]
+STAGES: tuple[Stage, ...] = ("analyze", "suggest")
+
+
+class BatchManifest:
+    """Append-only JSONL log of the stages finished by batch runs.
+
+    Every line records one attempt of one stage for one video. Only
+    completed stages are skipped when a run resumes, failed ones are retried.
+    """
+
+    def __init__(self, path: str):
+        """Initialize batch manifest.
+
+        Args:
+            path: Manifest file, created if missing
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def completed(self) -> set[tuple[str, str]]:
+        """Return the (video ID, stage) pairs completed by earlier runs."""
+        if not self.path.exists():
+            return set()
+
+        completed = set()
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write leaves a truncated last line
+                    continue
+                if entry.get("status") == "completed":
+                    completed.add((entry["video_id"], entry["stage"]))
+        return completed
+
+    def record(
+        self,
+        video_id: str,
+        stage: Stage,
+        status: Literal["completed", "failed"],
+        elapsed: float,
+        error: str | None = None,
+    ) -> None:
+        """Append the outcome of a stage.
+
+        Args:
+            video_id: ID of the video
+            stage: Stage that ran
+            status: Outcome of the stage
+            elapsed: Wall time of the stage in seconds
+            error: Error message of a failed stage
+        """
+        entry = {
+            "video_id": video_id,
+            "stage": stage,
+            "status": status,
+            "elapsed": round(elapsed, 3),
+            "error": error,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+@dataclass
+class StageStats:
+    """Outcomes and wall times of one stage over a batch run."""
+
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: list[float] = field(default_factory=list)
+
+    def percentile(self, value: float) -> float | None:
+        """Wall time percentile of the stage runs, None before any run."""
+        if not self.elapsed:
+            return None
+        ordered = sorted(self.elapsed)
+        return ordered[min(len(ordered) - 1, int(value * len(ordered)))]
+
+
+class BatchRunner:
+    """Run the analysis and suggestion stages over a list of videos.
+
+    Work is I/O bound, waiting on TwelveLabs, OpenAI and S3, so videos are
+    processed by a thread pool. All threads share the service singletons
+    and therefore their rate limiters and connection pools.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        manifest: BatchManifest,
+        stages: Iterable[Stage] = STAGES,
+        concurrency: int = 8,
+    ):
+        """Initialize batch runner.
+
+        Args:
+            settings: Application settings
+            manifest: Manifest checkpointing the finished stages
+            stages: Stages to run for every video, in pipeline order
+            concurrency: Videos processed at once
+        """
+        self.settings = settings
+        self.manifest = manifest
+        self.stages = [stage for stage in STAGES if stage in set(stages)]
+        self.concurrency = concurrency
+        self.stats = {stage: StageStats() for stage in self.stages}
+        self._stats_lock = threading.Lock()
+
+    def _load_placement_result(self, video_id: str) -> PlacementResult:
+        data = get_s3_service().download_json_file(f"results/placement_{video_id}.json")
+        if data is None:
+            raise ValueError(f"No placement result for video {video_id}")
+        return PlacementResult.model_validate(data)
+
+    def _analyze(self, video_id: str) -> PlacementResult:
+        return get_twelve_labs_service().analyze_video(
+            self.settings.twelve_labs_creators_index_id, video_id, "creator"
+        )
+
+    def _suggest(self, video_id: str, placement_result: PlacementResult | None) -> None:
+        if placement_result is None:
+            placement_result = self._load_placement_result(video_id)
+
+        s3_service = get_s3_service()
+        ad_profile_index = get_ad_profile_index()
+        frequency_capper = get_frequency_capper()
+        if ad_profile_index is not None:
+            from aim.services.ad_index import match_ads_locally
+
+            match_ads_locally(
+                video_id,
+                s3_service,
+                placement_result,
+                ad_profile_index,
+                frequency_capper,
+            )
+            return
+
+        # Deferred, the agent stack is slow to import
+        from aim.services.agent import find_best_ads
+
+        twelve_labs_service = get_twelve_labs_service()
+
+        def search_ads(
+            query_text: str, timeout: float | None = None
+        ) -> list[AdSearchResult]:
+            return twelve_labs_service.search_ads(
+                query_text, timeout=timeout, tags=placement_result.tags
+            )
+
+        ads_response = asyncio.run(
+            find_best_ads(
+                video_id,
+                s3_service,
+                placement_result,
+                search_ads,
+                max_turns=self.settings.suggest_max_turns,
+                is_capped=(
+                    (lambda ad_id: frequency_capper.is_capped(ad_id, video_id))
+                    if frequency_capper
+                    else None
+                ),
+                rate_limiter=get_openai_rate_limiter(),
+                cassette=get_cassette(),
+            )
+        )
+        if ads_response.partial:
+            raise RuntimeError("Ads search agent stopped before finishing")
+
+    def _run_stage(
+        self, video_id: str, stage: Stage, run: Callable[[], Any], result_path: str
+    ) -> tuple[bool, Any]:
+        """Run a stage, record its outcome and return (succeeded, result).
+
+        The stage only counts as completed once its result file is stored,
+        results written in the background are waited for.
+        """
+        started = time.monotonic()
+        try:
+            with get_usage_ledger().collect(video_id, stage):
+                result = run()
+            if not get_s3_service().wait_for_background_write(result_path):
+                raise RuntimeError(f"Failed to store {result_path}")
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            logger.error(
+                "Batch stage failed",
+                extra={"video_id": video_id, "stage": stage},
+                exc_info=True,
+            )
+            self.manifest.record(video_id, stage, "failed", elapsed, error=str(e))
+            with self._stats_lock:
+                self.stats[stage].failed += 1
+                self.stats[stage].elapsed.append(elapsed)
+            return False, None
+
+        elapsed = time.monotonic() - started
+        self.manifest.record(video_id, stage, "completed", elapsed)
+        with self._stats_lock:
+            self.stats[stage].completed += 1
+            self.stats[stage].elapsed.append(elapsed)
+        return True, result
+
+    def process_video(self, video_id: str, completed: set[tuple[str, str]]) -> None:
+        """Run the pending stages of a video, stopping at the first failure.
+
+        Args:
+            video_id: ID of the video
+            completed: (video ID, stage) pairs to skip
+        """
+        placement_result = None
+        for stage in self.stages:
+            if (video_id, stage) in completed:
+                with self._stats_lock:
+                    self.stats[stage].skipped += 1
+                continue
+
+            # One trace per video and stage, like the API requests
+            with span(f"batch.{stage}", video_id=video_id):
+                if stage == "analyze":
+                    ok, placement_result = self._run_stage(
+                        video_id,
+                        stage,
+                        lambda: self._analyze(video_id),
+                        f"results/placement_{video_id}.json",
+                    )
+                else:
+                    ok, _ = self._run_stage(
+                        video_id,
+                        stage,
+                        lambda: self._suggest(video_id, placement_result),
+                        f"results/ads_search_{video_id}.json",
+                    )
+            if not ok:
+                return
+
+    def run(self, video_ids: list[str]) -> float:
+        """Process videos concurrently until done or interrupted.
+
+        Args:
+            video_ids: IDs of the videos
+
+        Returns:
+            Wall time of the run in seconds
+        """
+        completed = self.manifest.completed()
+        logger.info(
+            "Starting batch run",
+            extra={
+                "video_count": len(video_ids),
+                "stages": self.stages,
+                "concurrency": self.concurrency,
+                "already_completed": len(completed),
+            },
+        )
+
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="batch"
+        )
+        try:
+            futures = [
+                executor.submit(self.process_video, video_id, completed)
+                for video_id in video_ids
+            ]
+            for future in as_completed(futures):
+                future.result()
+        except KeyboardInterrupt:
+            # Finished stages are in the manifest, the next run picks up here
+            logger.warning("Batch run interrupted, waiting for running videos")
+            executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            executor.shutdown(wait=True)
+            # Flush the usage ledgers, result uploads and impressions still
+            # queued, ledgers go through the S3 upload queue
+            if get_usage_ledger.cache_info().currsize:
+                get_usage_ledger().close()
+            if get_s3_service.cache_info().currsize:
+                get_s3_service().close()
+            if get_frequency_capper.cache_info().currsize and get_frequency_capper():
+                get_frequency_capper().close()
+
+        return time.monotonic() - started
+
+    def summary(self, video_count: int, wall_time: float) -> str:
+        """Format the throughput summary of a run.
+
+        Args:
+            video_count: Videos the run was started with
+            wall_time: Wall time of the run in seconds
+
+        Returns:
+            Human-readable multi-line summary
+        """
+        lines = [f"Videos: {video_count}, wall time: {wall_time:.1f}s"]
+        for stage, stats in self.stats.items():
+            ran = stats.completed + stats.failed
+            per_minute = ran / wall_time * 60 if wall_time > 0 else 0.0
+            p50, p95 = stats.percentile(0.5), stats.percentile(0.95)
+            lines.append(
+                f"{stage}: {stats.completed} completed, {stats.failed} failed, "
+                f"{stats.skipped} skipped, {per_minute:.1f} videos/min"
+                + (f", p50 {p50:.1f}s, p95 {p95:.1f}s" if p50 is not None else "")
+            )
+        return "\n".join(lines)
+
+
+def read_video_ids(
+    video_ids: list[str], file: str | None = None, index_id: str | None = None
+) -> list[str]:
+    """Collect the videos of a batch run, without duplicates.
+
+    Args:
+        video_ids: Video IDs given on the command line
+        file: File with one video ID per line
+        index_id: TwelveLabs index whose videos are all included
+
+    Returns:
+        Distinct video IDs in the order given
+    """
+    ids = list(video_ids)
+    if file is not None:
+        with open(file) as f:
+            ids.extend(line.strip() for line in f if line.strip())
+    if index_id is not None:
+        ids.extend(get_twelve_labs_service().list_videos(index_id))
+    return list(dict.fromkeys(ids))
@@ -1,6 +1,9 @@
 """Application configuration management."""
 
+from typing import Literal
+
 from dotenv import load_dotenv
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 load_dotenv()
@@ -18,9 +21,140 @@ class Settings(BaseSettings):
         upload_url_expiration: URL expiration time in seconds (default: 1800)
         s3_base_path: Base path prefix in S3 (default: upload)
         log_level: Logging level (default: INFO)
+        log_debug_sample_rate: Fraction of DEBUG log records kept, sampled
+            per trace (default: 1.0)
+        log_queue_size: Maximum log records waiting to be written, later
+            ones are dropped (default: 10000)
+        warmup: Open service connections before the app reports ready
+            (default: False)
+        host: Address the server binds to (default: 0.0.0.0)
+        port: Port the server listens on (default: 8000)
+        workers: Number of worker processes in production mode, 0 for one
+            per available core (default: 0)
+        shutdown_timeout: Seconds to drain in-flight requests and analysis
+            on shutdown (default: 600)
+        state_backend: Store for state shared between workers, "sqlite" or
+            "memory" (default: sqlite)
+        state_path: Database file of the sqlite state store
+            (default: data/state.sqlite3)
+        metrics_dir: Directory where worker processes share their metrics,
+            so /metrics reports all workers merged. Set by python -m aim
+            serve next to state_path, and must be emptied before the workers
+            start. Empty when a single process serves (default: empty)
+        analysis_in_flight_ttl: Seconds after which an unfinished analysis
+            no longer blocks a new one for the same video (default: 3600)
         twelve_labs_api_key: TwelveLabs API key (required)
         twelve_labs_creators_index_id: TwelveLabs index ID for creator videos (required)
         twelve_labs_ads_index_id: TwelveLabs index ID for ad videos (required)
+        twelve_labs_ads_index_shards: Additional ads index IDs mapped to the
+            video tags routed to them, as JSON. Shards without tags are
+            searched for every video, the main ads index is always searched
+            and cannot be listed (default: {})
+        progressive_placements: Publish partial placements while analysis runs
+            (default: False)
+        consolidated_prompts: Run all TwelveLabs prompts in one analyze call
+            (default: False)
+        placement_engine: "llm" for the OpenAI agent or "heuristic" for the
+            local rule-based engine (default: llm)
+        placement_fallback: Fall back to the heuristic engine when the LLM
+            fails (default: True)
+        placement_llm_timeout: OpenAI placement request timeout in seconds
+            (default: 120)
+        suggest_timeout: Overall time budget in seconds for /suggest
+            (default: 30)
+        suggest_max_turns: Maximum ads agent turns per /suggest (default: 10)
+        bulk_read_max_ids: Maximum videos per bulk read request (default: 100)
+        bulk_read_concurrency: Maximum concurrent S3 reads per bulk read
+            request (default: 32)
+        ad_schedule_cache_size: Maximum ad schedules cached per worker for
+            /decide (default: 10000)
+        ad_schedule_ttl: Seconds a cached ad schedule is served before being
+            reloaded from S3 (default: 300)
+        ad_schedule_miss_ttl: Seconds a video without stored results is
+            remembered before S3 is checked again (default: 5)
+        ad_max_pod_seconds: Maximum total duration of the ad clips scheduled
+            at a placement (default: 90)
+        ad_max_clips_per_pod: Maximum ad clips scheduled at a placement
+            (default: 3)
+        ad_target_clip_seconds: Preferred ad clip duration when scheduling
+            (default: 30)
+        ad_matcher: How /suggest finds ads, the search agent ("search") or
+            the local ad profile index ("local") (default: search)
+        ad_index_path: Directory of the local ad profile index, built with
+            python -m aim enrich-ads (default: data/ad_index)
+        ad_index_dim: Vector dimension of the ad profile index (default: 512)
+        frequency_capping: Cap ad impressions per video and pace them per ad
+            in /decide and /suggest (default: False)
+        frequency_cap_window: Length in seconds of the capping window
+            (default: 3600)
+        frequency_cap_per_video: Impressions of an ad per video and window,
+            0 for no limit (default: 2)
+        frequency_cap_per_ad: Impressions of an ad per window across all
+            videos, 0 for no limit (default: 1000)
+        frequency_cap_path: SQLite file the impression counters are flushed
+            to (default: data/frequency_caps.sqlite3)
+        frequency_cap_flush_interval: Seconds between counter flushes
+            (default: 5)
+        s3_timeout: Connect and read timeout in seconds for S3 calls
+            (default: 10)
+        s3_max_pool_connections: S3 connection pool size, also bounds the
+            threads serving async S3 calls (default: 50)
+        s3_max_attempts: Maximum attempts per S3 request (default: 3)
+        s3_retry_mode: botocore retry mode (default: standard)
+        s3_tcp_keepalive: Keep pooled S3 connections alive (default: True)
+        s3_write_behind: Upload result files from a background queue, off
+            the request path. A result whose upload fails after every retry
+            is lost although the request succeeded (default: False)
+        s3_write_behind_queue_size: Maximum queued result uploads, later
+            ones are uploaded outside of the queue (default: 1000)
+        twelve_labs_rate_limit: TwelveLabs API calls per second per process,
+            0 for no limit (default: 0)
+        openai_rate_limit: OpenAI placement requests and ads agent runs per
+            second per process, 0 for no limit (default: 0)
+        cassette_mode: Record the TwelveLabs, OpenAI and S3 calls to
+            cassettes, or replay them without network access, "off",
+            "record" or "replay" (default: off)
+        cassette_path: Directory of the cassette files (default: data/cassettes)
+        cassette_latency: Latency injected before replayed responses, as JSON
+            mapping operation prefixes such as "twelvelabs.analyze" or "s3"
+            to "recorded", "none", "fixed:S", "uniform:LOW,HIGH" or
+            "lognormal:MEDIAN,SIGMA" (default: recorded latencies)
+        cassette_seed: Seed of the injected latencies (default: 0)
+        cassette_strict: Fail calls that were never recorded instead of
+            replaying another call of the same operation (default: False)
+        search_min_score: Score threshold of ads searches, clips at or below
+            it are dropped and paging stops at the first result without a
+            better clip (default: 0.7)
+        search_max_results: Ads returned per search, paging stops once
+            reached (default: 10)
+        search_prefetch: Prefetch the next search page while the current one
+            is read, when it can still contribute results (default: True)
+        search_max_concurrency: Concurrent searches per ads index shard,
+            sizes the search, page and hedged request thread pools
+            (default: 8)
+        search_hedging: Hedge slow ads searches with a duplicate request
+            (default: False)
+        search_hedge_percentile: Recent latency percentile after which a
+            hedge is sent (default: 0.95)
+        search_hedge_max_ratio: Maximum fraction of searches that are hedged
+            (default: 0.1)
+        tracing_exporter: Where finished tracing spans go, "off", "file" or
+            "otlp" (default: off)
+        tracing_path: Span file of the file exporter, one OTLP/JSON request
+            per line (default: data/traces/spans.jsonl)
+        tracing_otlp_endpoint: Traces endpoint of the OTLP/HTTP exporter
+            (default: http://localhost:4318/v1/traces)
+        profiling_token: Secret enabling the profile of a request when sent
+            in the X-Profile header or the profile query parameter, empty to
+            disable profiling (default: empty)
+        profiling_path: Directory of the request profiles
+            (default: data/profiles)
+        profiling_interval: Seconds between profile samples (default: 0.005)
+        profiling_max_seconds: Longest profile, background work included
+            (default: 300)
+        usage_ledger: Store the API usage of every video next to its
+            placement result, in results/usage_{video_id}.json, instead of
+            only in memory (default: True)
     """
 
     aws_s3_bucket: str
@@ -28,10 +162,109 @@ class Settings(BaseSettings):
     upload_url_expiration: int = 1800
     s3_base_path: str = "upload"
     log_level: str = "INFO"
+    log_debug_sample_rate: float = 1.0
+    log_queue_size: int = 10000
+    warmup: bool = False
+
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 0
+    shutdown_timeout: int = 600
+
+    state_backend: Literal["sqlite", "memory"] = "sqlite"
+    state_path: str = "data/state.sqlite3"
+    metrics_dir: str = ""
+    analysis_in_flight_ttl: int = 3600
 
     twelve_labs_api_key: str
     twelve_labs_creators_index_id: str
     twelve_labs_ads_index_id: str
+    twelve_labs_ads_index_shards: dict[str, list[str]] = {}
+
+    progressive_placements: bool = False
+    consolidated_prompts: bool = False
+    placement_engine: Literal["llm", "heuristic"] = "llm"
+    placement_fallback: bool = True
+    placement_llm_timeout: float = 120.0
+
+    suggest_timeout: float = 30.0
+    suggest_max_turns: int = 10
+    bulk_read_max_ids: int = 100
+    bulk_read_concurrency: int = 32
+
+    ad_schedule_cache_size: int = 10000
+    ad_schedule_ttl: float = 300.0
+    ad_schedule_miss_ttl: float = 5.0
+    ad_max_pod_seconds: float = 90.0
+    ad_max_clips_per_pod: int = 3
+    ad_target_clip_seconds: float = 30.0
+
+    ad_matcher: Literal["search", "local"] = "search"
+    ad_index_path: str = "data/ad_index"
+    ad_index_dim: int = 512
+
+    frequency_capping: bool = False
+    frequency_cap_window: float = 3600.0
+    frequency_cap_per_video: int = 2
+    frequency_cap_per_ad: int = 1000
+    frequency_cap_path: str = "data/frequency_caps.sqlite3"
+    frequency_cap_flush_interval: float = 5.0
+
+    s3_timeout: float = 10.0
+    s3_max_pool_connections: int = 50
+    s3_max_attempts: int = 3
+    s3_retry_mode: Literal["standard", "adaptive", "legacy"] = "standard"
+    s3_tcp_keepalive: bool = True
+    s3_write_behind: bool = False
+    s3_write_behind_queue_size: int = 1000
+
+    twelve_labs_rate_limit: float = 0.0
+    openai_rate_limit: float = 0.0
+
+    cassette_mode: Literal["off", "record", "replay"] = "off"
+    cassette_path: str = "data/cassettes"
+    cassette_latency: dict[str, str] = {}
+    cassette_seed: int = 0
+    cassette_strict: bool = False
+
+    search_min_score: float = 0.7
+    search_max_results: int = 10
+    search_prefetch: bool = True
+    search_max_concurrency: int = 8
+    search_hedging: bool = False
+    search_hedge_percentile: float = 0.95
+    search_hedge_max_ratio: float = 0.1
+
+    tracing_exporter: Literal["off", "file", "otlp"] = "off"
+    tracing_path: str = "data/traces/spans.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+
+    profiling_token: str = ""
+    profiling_path: str = "data/profiles"
+    profiling_interval: float = 0.005
+    profiling_max_seconds: float = 300.0
+
+    usage_ledger: bool = True
+
+    @model_validator(mode="after")
+    def validate_ads_index_shards(self) -> "Settings":
+        """Reject a shard entry for the main ads index.
+
+        Such an entry would make the main index tag-routed instead of
+        searched for every video.
+
+        Returns:
+            The validated settings
+
+        Raises:
+            ValueError: If the main ads index is listed as a shard
+        """
+        if self.twelve_labs_ads_index_id in self.twelve_labs_ads_index_shards:
+            raise ValueError(
+                "twelve_labs_ads_index_shards must not list the main ads index "
+                f"{self.twelve_labs_ads_index_id}, it is always searched"
+            )
+        return self
 
     class Config:
         """Pydantic settings configuration."""
@@ -0,0 +1,29 @@
+"""Request deadlines shared across the stages of a pipeline."""
+
+import time
+
+
+class Deadline:
+    """Absolute point in time by which a request has to complete.
+
+    Created once per request and passed down to every stage, so each stage
+    only spends what is left of the overall budget.
+    """
+
+    def __init__(self, timeout: float):
+        """Initialize deadline.
+
+        Args:
+            timeout: Time budget in seconds, starting now
+        """
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the budget has been used up."""
+        return self.remaining() <= 0.0
@@ -0,0 +1,212 @@
+"""Lazily created service singletons for dependency injection.
+
+Nothing is built at import time, so the application can be imported
+without credentials and tests can swap services through
+app.dependency_overrides.
+"""
+
+import logging
+from functools import lru_cache
+
+from aim.config import Settings
+from aim.metrics import REGISTRY, hedger_collector
+from aim.services.ad_assignment import AdAssignmentOptimizer
+from aim.services.ad_index import AdProfileIndex
+from aim.services.ad_schedule import AdScheduleCache
+from aim.services.cassette import Cassette
+from aim.services.dedup_index import DedupIndex
+from aim.services.frequency_cap import FrequencyCapper
+from aim.services.hedging import RequestHedger
+from aim.services.rate_limit import RateLimiter
+from aim.services.s3_service import S3Service
+from aim.services.state_store import StateStore, create_state_store
+from aim.services.twelve_labs_service import TwelveLabsService
+from aim.services.usage_ledger import UsageLedger
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the application settings, loaded on first use."""
+    return Settings()
+
+
+@lru_cache
+def get_cassette() -> Cassette | None:
+    """Return the cassette the API clients record to or replay from, None when off."""
+    settings = get_settings()
+    if settings.cassette_mode == "off":
+        return None
+    return Cassette(
+        settings.cassette_path,
+        settings.cassette_mode,
+        latency=settings.cassette_latency,
+        seed=settings.cassette_seed,
+        strict=settings.cassette_strict,
+    )
+
+
+@lru_cache
+def get_s3_service() -> S3Service:
+    """Return the shared S3 service, created on first use."""
+    settings = get_settings()
+    return S3Service(
+        bucket_name=settings.aws_s3_bucket,
+        region=settings.aws_region,
+        base_path=settings.s3_base_path,
+        timeout=settings.s3_timeout,
+        max_pool_connections=settings.s3_max_pool_connections,
+        max_attempts=settings.s3_max_attempts,
+        retry_mode=settings.s3_retry_mode,
+        tcp_keepalive=settings.s3_tcp_keepalive,
+        write_behind=settings.s3_write_behind,
+        write_behind_queue_size=settings.s3_write_behind_queue_size,
+        cassette=get_cassette(),
+    )
+
+
+@lru_cache
+def get_dedup_index() -> DedupIndex:
+    """Return the upload dedup index, created on first use."""
+    return DedupIndex(get_s3_service())
+
+
+@lru_cache
+def get_ad_schedule_cache() -> AdScheduleCache:
+    """Return the ad schedule cache of this worker, created on first use."""
+    settings = get_settings()
+    return AdScheduleCache(
+        max_size=settings.ad_schedule_cache_size,
+        ttl=settings.ad_schedule_ttl,
+        miss_ttl=settings.ad_schedule_miss_ttl,
+    )
+
+
+@lru_cache
+def get_ad_assignment_optimizer() -> AdAssignmentOptimizer:
+    """Return the ad clip to placement optimizer, created on first use."""
+    settings = get_settings()
+    return AdAssignmentOptimizer(
+        max_pod_seconds=settings.ad_max_pod_seconds,
+        max_clips_per_pod=settings.ad_max_clips_per_pod,
+        target_clip_seconds=settings.ad_target_clip_seconds,
+    )
+
+
+@lru_cache
+def get_ad_profile_index() -> AdProfileIndex | None:
+    """Return the local ad profile index, None when ads are matched by search."""
+    settings = get_settings()
+    if settings.ad_matcher != "local":
+        return None
+    try:
+        return AdProfileIndex.load(settings.ad_index_path)
+    except FileNotFoundError:
+        logger.warning(
+            "Ad profile index not found, falling back to search",
+            extra={"path": settings.ad_index_path},
+        )
+        return None
+
+
+@lru_cache
+def get_frequency_capper() -> FrequencyCapper | None:
+    """Return the impression counters, None when capping is disabled."""
+    settings = get_settings()
+    if not settings.frequency_capping:
+        return None
+    return FrequencyCapper(
+        path=settings.frequency_cap_path,
+        window=settings.frequency_cap_window,
+        max_impressions_per_video=settings.frequency_cap_per_video,
+        max_impressions_per_ad=settings.frequency_cap_per_ad,
+        flush_interval=settings.frequency_cap_flush_interval,
+    )
+
+
+@lru_cache
+def get_state_store() -> StateStore:
+    """Return the state store shared between workers, created on first use."""
+    settings = get_settings()
+    return create_state_store(settings.state_backend, settings.state_path)
+
+
+@lru_cache
+def get_usage_ledger() -> UsageLedger:
+    """Return the API usage ledger of this worker, created on first use."""
+    settings = get_settings()
+    return UsageLedger(get_s3_service() if settings.usage_ledger else None)
+
+
+@lru_cache
+def get_twelve_labs_rate_limiter() -> RateLimiter | None:
+    """Return the TwelveLabs API rate limiter, None when unlimited."""
+    settings = get_settings()
+    if not settings.twelve_labs_rate_limit:
+        return None
+    return RateLimiter(settings.twelve_labs_rate_limit)
+
+
+@lru_cache
+def get_openai_rate_limiter() -> RateLimiter | None:
+    """Return the OpenAI rate limiter, None when unlimited."""
+    settings = get_settings()
+    if not settings.openai_rate_limit:
+        return None
+    return RateLimiter(settings.openai_rate_limit)
+
+
+@lru_cache
+def get_twelve_labs_service() -> TwelveLabsService:
+    """Return the shared TwelveLabs service, created on first use."""
+    settings = get_settings()
+    search_hedger = None
+    if settings.search_hedging:
+        search_hedger = RequestHedger(
+            percentile=settings.search_hedge_percentile,
+            max_hedge_ratio=settings.search_hedge_max_ratio,
+            # One attempt at a time for every search the service runs
+            max_workers=settings.search_max_concurrency
+            * (1 + len(settings.twelve_labs_ads_index_shards)),
+        )
+        REGISTRY.register_collector(hedger_collector(search_hedger))
+
+    return TwelveLabsService(
+        api_key=settings.twelve_labs_api_key,
+        creators_index_id=settings.twelve_labs_creators_index_id,
+        ads_index_id=settings.twelve_labs_ads_index_id,
+        ads_index_shards=settings.twelve_labs_ads_index_shards,
+        search_min_score=settings.search_min_score,
+        search_max_results=settings.search_max_results,
+        search_prefetch=settings.search_prefetch,
+        search_max_concurrency=settings.search_max_concurrency,
+        rate_limiter=get_twelve_labs_rate_limiter(),
+        llm_rate_limiter=get_openai_rate_limiter(),
+        cassette=get_cassette(),
+        s3_service=get_s3_service(),
+        progressive_placements=settings.progressive_placements,
+        consolidated_prompts=settings.consolidated_prompts,
+        placement_engine=settings.placement_engine,
+        placement_fallback=settings.placement_fallback,
+        placement_llm_timeout=settings.placement_llm_timeout,
+        search_hedger=search_hedger,
+    )
+
+
+def warmup() -> None:
+    """Create every service and open their connection pools ahead of traffic.
+
+    Failures are logged and ignored, the services reconnect on first use.
+    """
+    try:
+        get_s3_service().warmup()
+        get_twelve_labs_service().warmup()
+
+        # Importing the agent stack (agents, openai) is the slowest part of
+        # the first /suggest request
+        import aim.services.agent  # noqa: F401
+
+        logger.info("Service warmup completed")
+    except Exception:
+        logger.warning("Service warmup failed", exc_info=True)
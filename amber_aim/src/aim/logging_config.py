@@ -1,8 +1,93 @@
-"""Logging configuration with structured JSON output."""
+"""Logging configuration with structured JSON output.
 
+Log calls only annotate the record with the current trace and put it on a
+queue. A listener thread formats records as JSON, with every extra={...}
+field, and writes them, so request threads never wait on serialization or
+on the output stream.
+"""
+
+import atexit
 import json
 import logging
-from datetime import datetime
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from aim.metrics import REGISTRY, Counter
+from aim.tracing import current_span
+
+# Attributes of every LogRecord, anything else on a record came from extra
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "trace_id", "span_id"}
+
+# Reused across records, unknown types such as datetimes or paths become strings
+_encoder = json.JSONEncoder(default=str, ensure_ascii=False, separators=(",", ":"))
+_exception_formatter = logging.Formatter()
+
+LOG_RECORDS_DROPPED = REGISTRY.register(
+    Counter(
+        "aim_log_records_dropped_total",
+        "Log records dropped because the log queue was full",
+    )
+)
+
+_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
+
+
+class TraceContextFilter(logging.Filter):
+    """Attach the trace and span IDs of the current span to log records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Add trace_id and span_id attributes, None outside of any span.
+
+        Args:
+            record: The log record to annotate
+
+        Returns:
+            Always True, no record is filtered out
+        """
+        span = current_span()
+        record.trace_id = span.trace_id if span is not None else None
+        record.span_id = span.span_id if span is not None else None
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep a fraction of the DEBUG records, all records of other levels.
+
+    Records of a trace are kept or dropped together, so a sampled request
+    keeps its complete debug output.
+    """
+
+    def __init__(self, rate: float):
+        """Initialize debug sampling filter.
+
+        Args:
+            rate: Fraction of DEBUG records kept, between 0 and 1
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether a record is kept.
+
+        Args:
+            record: The log record, annotated by TraceContextFilter
+
+        Returns:
+            True if the record is kept
+        """
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id is not None:
+            return int(trace_id[:8], 16) < self.rate * 0x100000000
+        return random.random() < self.rate
 
 
 class JSONFormatter(logging.Formatter):
@@ -15,28 +100,111 @@ class JSONFormatter(logging.Formatter):
             record: The log record to format
 
         Returns:
-            JSON string representation of the log record
+            JSON string representation of the log record, including the
+            extra fields and trace context of the log call
         """
-        log_data = {
-            "timestamp": datetime.now().isoformat() + "Z",
+        log_data: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat()
+            .replace("+00:00", "Z"),
             "level": record.levelname,
             "message": record.getMessage(),
             "module": record.module,
+            "trace_id": getattr(record, "trace_id", None),
+            "span_id": getattr(record, "span_id", None),
         }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                log_data[key] = value
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
-        return json.dumps(log_data)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
+        return _encoder.encode(log_data)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Queue handler doing as little as possible on the logging thread."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_queue_size: int):
+        super().__init__(log_queue)
+        self.max_queue_size = max_queue_size
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Make a record safe to format later on the listener thread.
+
+        The message is merged with its arguments now, as they may change
+        afterwards, and tracebacks are rendered now so frames are released.
+        Unlike QueueHandler.prepare, the record is not formatted here.
+        """
+        # Other handlers of the logger still get the original record. A
+        # shallow copy of the attributes is much cheaper than copy.copy().
+        original = record
+        record = logging.LogRecord.__new__(logging.LogRecord)
+        record.__dict__.update(original.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, dropping it when the listener is too far behind."""
+        # SimpleQueue has no size bound but is several times faster to put to
+        # than Queue, the approximate size check is enough to bound memory
+        if self.queue.qsize() >= self.max_queue_size:
+            LOG_RECORDS_DROPPED.inc()
+        else:
+            self.queue.put_nowait(record)
 
 
-def setup_logging(log_level: str = "INFO") -> None:
+def shutdown_logging() -> None:
+    """Write the queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(
+    log_level: str = "INFO",
+    debug_sample_rate: float = 1.0,
+    max_queue_size: int = 10000,
+) -> None:
     """Configure application logging with JSON formatter.
 
+    Calling it again replaces the previous configuration instead of adding
+    another handler.
+
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        debug_sample_rate: Fraction of DEBUG records kept (default: 1.0)
+        max_queue_size: Maximum records waiting to be written, later ones
+            are dropped (default: 10000)
     """
-    handler = logging.StreamHandler()
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    handler = logging.StreamHandler(sys.stderr)
     handler.setFormatter(JSONFormatter())
 
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _NonBlockingQueueHandler(log_queue, max_queue_size)
+    # Filters run on the logging thread, where the current span is known
+    _queue_handler.addFilter(TraceContextFilter())
+    if debug_sample_rate < 1.0:
+        _queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
-    root_logger.addHandler(handler)
+    root_logger.addHandler(_queue_handler)
+
+
+atexit.register(shutdown_logging)
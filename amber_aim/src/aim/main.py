@@ -1,37 +1,112 @@
 """FastAPI application for video upload URL generation."""
 
+import asyncio
+import functools
 import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from typing import Literal, Any
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from twelvelabs import IndexSchema, VideoVector
+from fastapi.responses import PlainTextResponse, Response
 
+from aim import tracing
 from aim.config import Settings
+from aim.deadline import Deadline
+from aim.dependencies import (
+    get_ad_assignment_optimizer,
+    get_ad_profile_index,
+    get_ad_schedule_cache,
+    get_cassette,
+    get_dedup_index,
+    get_frequency_capper,
+    get_openai_rate_limiter,
+    get_s3_service,
+    get_settings,
+    get_state_store,
+    get_twelve_labs_service,
+    get_usage_ledger,
+    warmup,
+)
 from aim.logging_config import setup_logging
-from aim.models.ads import SuggestAdsRequest, SuggestAdsResponse
-from aim.models.analyze import AnalyzeRequest, AnalyzeResponse
-from aim.models.placement import PlacementResult
+from aim.metrics import REGISTRY
+from aim.models.ads import (
+    AdDecisionResponse,
+    AdSearchResponse,
+    BulkSuggestionsResponse,
+    SuggestAdsRequest,
+    SuggestAdsResponse,
+)
+from aim.models.analyze import AnalyzeRequest, AnalyzeResponse, AnalyzeStatusResponse
+from aim.models.placement import BulkPlacementsResponse, PlacementResult
 from aim.models.upload import UploadURLRequest, UploadURLResponse
-from aim.services.agent import find_best_ads
+from aim.models.usage import UsageResponse, VideoUsage
+from aim.profiling import ProfilingMiddleware
+from aim.services.ad_assignment import AdAssignmentOptimizer
+from aim.services.ad_index import AdProfileIndex, match_ads_locally
+from aim.services.ad_schedule import AdSchedule, AdScheduleCache
+from aim.services.cassette import Cassette
+from aim.services.dedup_index import DedupIndex
+from aim.services.frequency_cap import FrequencyCapper
+from aim.services.rate_limit import RateLimiter
 from aim.services.s3_service import S3Service, S3ServiceError
+from aim.services.state_store import StateStore
 from aim.services.twelve_labs_service import (
     TwelveLabsService,
     TwelveLabsServiceError,
 )
-
-# Load settings and setup logging
-settings = Settings()
-setup_logging(settings.log_level)
+from aim.services.usage_ledger import UsageLedger
+from aim.usage import UsageCollector
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Set up logging and optionally warm up services before serving."""
+    settings = get_settings()
+    setup_logging(
+        settings.log_level,
+        debug_sample_rate=settings.log_debug_sample_rate,
+        max_queue_size=settings.log_queue_size,
+    )
+    tracing.configure(
+        settings.tracing_exporter,
+        path=settings.tracing_path,
+        endpoint=settings.tracing_otlp_endpoint,
+    )
+    if settings.metrics_dir:
+        REGISTRY.enable_multiprocess(settings.metrics_dir)
+
+    if settings.warmup:
+        await asyncio.to_thread(warmup)
+
+    yield
+
+    # Ledgers are stored through the S3 write-behind queue, flushed below
+    if get_usage_ledger.cache_info().currsize:
+        get_usage_ledger().close()
+    if get_s3_service.cache_info().currsize:
+        get_s3_service().close()
+    if get_frequency_capper.cache_info().currsize and get_frequency_capper():
+        get_frequency_capper().close()
+
+    # uvicorn waits for in-flight requests and background analysis tasks
+    # before this point, up to its graceful shutdown timeout
+    logger.info("In-flight work drained, shutting down")
+    tracing.shutdown()
+    # The last snapshot keeps the counters of this worker in the merged metrics
+    REGISTRY.close()
+
+
 # Initialize FastAPI application
 app = FastAPI(
     title="Video Upload URL Generation API",
     description="Generate presigned S3 URLs for direct video uploads and analyze videos with TwelveLabs",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -41,25 +116,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["traceparent", "X-Profile-Id"],
 )
 
-# Initialize S3 service
-s3_service = S3Service(
-    bucket_name=settings.aws_s3_bucket,
-    region=settings.aws_region,
-    base_path=settings.s3_base_path,
-)
 
-# Initialize TwelveLabs service
-twelve_labs_service = TwelveLabsService(
-    api_key=settings.twelve_labs_api_key,
-    creators_index_id=settings.twelve_labs_creators_index_id,
-    ads_index_id=settings.twelve_labs_ads_index_id,
-    s3_service=s3_service,
-)
+# Added before trace_requests so it runs inside the request span
+app.add_middleware(ProfilingMiddleware, settings=get_settings)
+
+
+@app.middleware("http")
+async def trace_requests(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Run every request in a tracing span.
+
+    A valid W3C traceparent request header continues the caller's trace,
+    so a client can follow one video from /upload to /suggest in a single
+    trace. The response carries the traceparent of the request span.
+    """
+    with tracing.span(
+        f"{request.method} {request.url.path}",
+        parent=tracing.parse_traceparent(request.headers.get("traceparent")),
+        **{"http.method": request.method, "http.target": request.url.path},
+    ) as request_span:
+        response = await call_next(request)
+        # Name the span after the route template, not the concrete path
+        route = request.scope.get("route")
+        if route is not None:
+            request_span.name = f"{request.method} {route.path}"
+        request_span.set_attribute("http.status_code", response.status_code)
+
+    response.headers["traceparent"] = tracing.format_traceparent(request_span)
+    return response
 
 
 @app.get("/health")
+@tracing.watched
 def health_check() -> dict[str, str]:
     """Health check endpoint.
 
@@ -69,8 +161,64 @@ def health_check() -> dict[str, str]:
     return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+@tracing.watched
+def metrics() -> PlainTextResponse:
+    """Per-stage latency, error and in-flight metrics of the worker processes.
+
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/usage", response_model=UsageResponse)
+@tracing.watched
+def get_usage(usage_ledger: UsageLedger = Depends(get_usage_ledger)) -> UsageResponse:
+    """API usage of the analysis and suggestion runs of this worker process.
+
+    Returns:
+        Calls, tokens, bytes and wall time per run kind and per stage, the
+        stages taking the most wall time first
+    """
+    return usage_ledger.totals()
+
+
+@app.get("/usage/{video_id}", response_model=VideoUsage)
+@tracing.watched
+def get_video_usage(
+    video_id: str, usage_ledger: UsageLedger = Depends(get_usage_ledger)
+) -> VideoUsage:
+    """Get the stored API usage of every run of a video.
+
+    Args:
+        video_id: ID of the video
+
+    Raises:
+        HTTPException: 404 if no usage was stored for the video
+    """
+    usage = usage_ledger.load(video_id)
+    if usage is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "detail": "No usage found for video",
+                "error_code": "USAGE_NOT_FOUND",
+            },
+        )
+    return usage
+
+
 @app.post("/upload", response_model=UploadURLResponse)
-def generate_upload_url(request: UploadURLRequest) -> UploadURLResponse:
+@tracing.watched
+def generate_upload_url(
+    request: UploadURLRequest,
+    settings: Settings = Depends(get_settings),
+    s3_service: S3Service = Depends(get_s3_service),
+    dedup_index: DedupIndex = Depends(get_dedup_index),
+) -> UploadURLResponse:
     """Generate presigned S3 upload URL for video files.
 
     Creates a unique S3 presigned URL for uploading a video file directly to S3.
@@ -78,6 +226,11 @@ def generate_upload_url(request: UploadURLRequest) -> UploadURLResponse:
     original file extension, and returns a presigned URL valid for 30 minutes
     (configurable).
 
+    When the request carries a content hash of a file uploaded before, no
+    URL is generated and the existing S3 path, video ID and placement result
+    are returned instead. Otherwise the URL only accepts content matching
+    the hash, sent with the checksum header listed in upload_headers.
+
     Args:
         request: Upload URL request with filename
 
@@ -88,16 +241,48 @@ def generate_upload_url(request: UploadURLRequest) -> UploadURLResponse:
         HTTPException: 400 for invalid filename, 500 for S3 errors, 503 for unavailable
     """
     try:
+        if request.content_sha256 is not None and request.content_size is not None:
+            entry = dedup_index.lookup(request.content_sha256, request.content_size)
+            if entry is not None:
+                placement_path = (
+                    f"results/placement_{entry.video_id}.json"
+                    if entry.video_id
+                    else None
+                )
+                if placement_path and not s3_service.object_exists(placement_path):
+                    placement_path = None
+
+                logger.info(
+                    "Duplicate upload, returning existing artifacts",
+                    extra={"s3_path": entry.s3_path, "video_id": entry.video_id},
+                )
+                return UploadURLResponse.create_duplicate(entry, placement_path)
+
         # Generate presigned URL
         result = s3_service.generate_upload_url(
-            filename=request.filename, expiration=settings.upload_url_expiration
+            filename=request.filename,
+            expiration=settings.upload_url_expiration,
+            content_sha256=request.content_sha256,
         )
 
+        if request.content_sha256 is not None and request.content_size is not None:
+            # Entered in the index once /analyze verified the uploaded file
+            dedup_index.record_upload(
+                request.content_sha256, request.content_size, result["s3_path"]
+            )
+
+        tracing.set_attributes(s3_path=result["s3_path"])
+
         # Create response with expiration metadata
         response = UploadURLResponse.create(
             upload_url=result["upload_url"],
             s3_path=result["s3_path"],
             expires_in=settings.upload_url_expiration,
+            upload_headers=(
+                {"x-amz-checksum-sha256": result["checksum_sha256"]}
+                if "checksum_sha256" in result
+                else None
+            ),
         )
 
         logger.info(
@@ -137,23 +322,75 @@ def generate_upload_url(request: UploadURLRequest) -> UploadURLResponse:
         ) from e
 
 
+def set_analysis_status(
+    state_store: StateStore,
+    video_id: str,
+    status: Literal["queued", "running", "completed", "failed"],
+    error: str | None = None,
+) -> None:
+    """Record the analysis job status of a video in the shared state store.
+
+    Args:
+        state_store: StateStore instance
+        video_id: ID of the video
+        status: New job status
+        error: Error message for failed jobs
+    """
+    state_store.set(
+        f"analysis_status:{video_id}",
+        AnalyzeStatusResponse(
+            video_id=video_id,
+            status=status,
+            updated_at=datetime.now(timezone.utc).isoformat(),
+            error=error,
+        ).model_dump(),
+    )
+
+
 def start_analyze_video_task(
-    index_id: str, video_id: str, type: Literal["creator", "ad"]
+    twelve_labs_service: TwelveLabsService,
+    state_store: StateStore,
+    usage_ledger: UsageLedger,
+    index_id: str,
+    video_id: str,
+    type: Literal["creator", "ad"],
 ) -> None:
     """Uses FastAPI background tasks to analyze a video using TwelveLabs.
 
     Args:
+        twelve_labs_service: TwelveLabsService instance
+        state_store: StateStore holding the job status and in-flight marker
+        usage_ledger: UsageLedger accounting the API usage of the analysis
         index_id: Index ID for the video
         video_id: ID of the video
         video_path: Path to the video
         type: Type of video (creator or ad)
     """
-    twelve_labs_service.analyze_video(index_id, video_id, type)
+    set_analysis_status(state_store, video_id, "running")
+    try:
+        with usage_ledger.collect(video_id, "analyze"):
+            twelve_labs_service.analyze_video(index_id, video_id, type)
+        set_analysis_status(state_store, video_id, "completed")
+    except Exception as e:
+        logger.error(
+            "Video analysis failed", extra={"video_id": video_id}, exc_info=True
+        )
+        set_analysis_status(state_store, video_id, "failed", error=str(e))
+    finally:
+        state_store.delete(f"analysis_in_flight:{video_id}")
 
 
 @app.post("/analyze")
+@tracing.watched
 def analyze_video(
-    request: AnalyzeRequest, background_tasks: BackgroundTasks
+    request: AnalyzeRequest,
+    background_tasks: BackgroundTasks,
+    settings: Settings = Depends(get_settings),
+    twelve_labs_service: TwelveLabsService = Depends(get_twelve_labs_service),
+    state_store: StateStore = Depends(get_state_store),
+    s3_service: S3Service = Depends(get_s3_service),
+    dedup_index: DedupIndex = Depends(get_dedup_index),
+    usage_ledger: UsageLedger = Depends(get_usage_ledger),
 ) -> dict[str, Any]:
     """Analyze a video using TwelveLabs.
 
@@ -161,6 +398,10 @@ def analyze_video(
     Videos are routed to different indexes based on whether they are
     creator content or advertisements.
 
+    An analysis already in flight for the same video, in any worker, is not
+    started a second time. Files whose content was indexed before reuse the
+    existing video and its placement result instead of being indexed again.
+
     Args:
         request: Analyze request with video URL and type
 
@@ -168,7 +409,21 @@ def analyze_video(
         HTTPException: 400 for invalid video type, 500 for TwelveLabs errors
     """
     try:
-        if request.video_path is not None:
+        entry = (
+            dedup_index.verify_upload(str(request.video_path))
+            if request.video_path is not None
+            else None
+        )
+
+        if entry is not None and entry.video_id is not None:
+            video_id = entry.video_id
+            logger.info(
+                "Video content already indexed, reusing video",
+                extra={"video_path": request.video_path, "video_id": video_id},
+            )
+            if s3_service.object_exists(f"results/placement_{video_id}.json"):
+                return {"video_id": video_id}
+        elif request.video_path is not None:
             # Create video indexing task in TwelveLabs
             task_result = twelve_labs_service.create_video_indexing_task(
                 video_path=str(request.video_path), video_type=request.type
@@ -188,6 +443,8 @@ def analyze_video(
                 },
             )
             video_id = task_result["video_id"]
+            if entry is not None:
+                dedup_index.record_video(entry, video_id)
         elif request.video_id is not None:
             video_id = request.video_id
         else:
@@ -199,8 +456,24 @@ def analyze_video(
                 },
             )
 
+        tracing.set_attributes(video_id=video_id, video_path=request.video_path)
+        if not state_store.add(
+            f"analysis_in_flight:{video_id}",
+            True,
+            ttl=settings.analysis_in_flight_ttl,
+        ):
+            logger.info(
+                "Video analysis already in flight", extra={"video_id": video_id}
+            )
+            return {"video_id": video_id}
+
+        set_analysis_status(state_store, video_id, "queued")
+        # Background tasks run after the response, outside the request span
         background_tasks.add_task(
-            start_analyze_video_task,
+            tracing.propagate(start_analyze_video_task),
+            twelve_labs_service=twelve_labs_service,
+            state_store=state_store,
+            usage_ledger=usage_ledger,
             index_id=settings.twelve_labs_creators_index_id,
             video_id=video_id,
             type=request.type,
@@ -231,8 +504,109 @@ def analyze_video(
         ) from e
 
 
-@app.post("/suggest", response_model=SuggestAdsResponse)
-async def suggest_ads(request: SuggestAdsRequest) -> SuggestAdsResponse:
+@app.get("/analyze/{video_id}", response_model=AnalyzeStatusResponse)
+@tracing.watched
+def get_analysis_status(
+    video_id: str, state_store: StateStore = Depends(get_state_store)
+) -> AnalyzeStatusResponse:
+    """Get the status of the analysis job of a video.
+
+    Args:
+        video_id: ID of the video
+
+    Raises:
+        HTTPException: 404 if no analysis was started for the video
+    """
+    status = state_store.get(f"analysis_status:{video_id}")
+    if status is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "detail": "No analysis found for video",
+                "error_code": "ANALYSIS_NOT_FOUND",
+            },
+        )
+    return AnalyzeStatusResponse.model_validate(status)
+
+
+def placement_result_paths(
+    video_id: str, version: Literal["final", "partial", "latest"]
+) -> list[str]:
+    """S3 paths to try, in order, when loading a placement result version."""
+    return {
+        "final": [f"results/placement_{video_id}.json"],
+        "partial": [f"results/placement_{video_id}_partial.json"],
+        "latest": [
+            f"results/placement_{video_id}.json",
+            f"results/placement_{video_id}_partial.json",
+        ],
+    }[version]
+
+
+async def load_placement_result(
+    s3_service: S3Service,
+    video_id: str,
+    version: Literal["final", "partial", "latest"] = "final",
+) -> PlacementResult | None:
+    """Load the stored placement result for a video.
+
+    Args:
+        s3_service: S3Service instance
+        video_id: ID of the video
+        version: "final", "partial" or "latest" (final with partial fallback)
+
+    Returns:
+        The placement result or None if the requested version is not stored
+    """
+    for placement_file in placement_result_paths(video_id, version):
+        logger.info(
+            "Loading placement result",
+            extra={"video_id": video_id, "file": placement_file},
+        )
+        placement_result_json = await s3_service.download_json_file_async(
+            placement_file
+        )
+        if placement_result_json is not None:
+            return PlacementResult.model_validate(placement_result_json)
+
+    return None
+
+
+async def collect_suggest_usage(
+    request: SuggestAdsRequest,
+    usage_ledger: UsageLedger = Depends(get_usage_ledger),
+) -> AsyncIterator[UsageCollector]:
+    """Account the API usage of a /suggest request to its video.
+
+    Args:
+        request: Request containing the video_id
+
+    Yields:
+        Collector of the run
+    """
+    with usage_ledger.collect(request.video_id, "suggest") as collector:
+        yield collector
+
+
+@app.post(
+    "/suggest",
+    response_model=SuggestAdsResponse,
+    dependencies=[Depends(collect_suggest_usage)],
+)
+async def suggest_ads(
+    request: SuggestAdsRequest,
+    settings: Settings = Depends(get_settings),
+    s3_service: S3Service = Depends(get_s3_service),
+    twelve_labs_service: TwelveLabsService = Depends(get_twelve_labs_service),
+    ad_schedule_cache: AdScheduleCache = Depends(get_ad_schedule_cache),
+    frequency_capper: FrequencyCapper | None = Depends(get_frequency_capper),
+    ad_assignment_optimizer: AdAssignmentOptimizer = Depends(
+        get_ad_assignment_optimizer
+    ),
+    ad_profile_index: AdProfileIndex | None = Depends(get_ad_profile_index),
+    openai_rate_limiter: RateLimiter | None = Depends(get_openai_rate_limiter),
+    cassette: Cassette | None = Depends(get_cassette),
+) -> SuggestAdsResponse:
     """Suggest relevant ads for a video based on its placement analysis.
 
     Loads the placement result for a video and uses an AI agent to search
@@ -245,22 +619,43 @@ async def suggest_ads(request: SuggestAdsRequest) -> SuggestAdsResponse:
     Returns:
         SuggestAdsResponse with suggested ads and placement information
 
+    The whole request is bounded by a deadline (settings.suggest_timeout or
+    request.timeout). When it runs out, the ads ranked so far are returned
+    with partial set instead of an error.
+
     Raises:
         HTTPException: 404 if placement file not found, 500 for other errors
     """
+    deadline = Deadline(request.timeout or settings.suggest_timeout)
+    tracing.set_attributes(video_id=request.video_id)
+
     try:
-        # Load placement result from local file
-        placement_file = f"results/placement_{request.video_id}.json"
-        logger.info(
-            "Loading placement result",
-            extra={"video_id": request.video_id, "file": placement_file},
-        )
+        try:
+            placement_result = await asyncio.wait_for(
+                load_placement_result(
+                    s3_service, request.video_id, request.placement_version
+                ),
+                timeout=deadline.remaining(),
+            )
+        except TimeoutError:
+            logger.warning(
+                "Deadline exceeded loading placement result",
+                extra={"video_id": request.video_id},
+            )
+            return SuggestAdsResponse(
+                video_id=request.video_id,
+                suggested_ads=[],
+                placement_count=0,
+                partial=True,
+            )
 
-        placement_result_json = s3_service.download_json_file(placement_file)
-        if placement_result_json is None:
+        if placement_result is None:
             logger.warning(
                 "Placement file not found",
-                extra={"video_id": request.video_id, "file": placement_file},
+                extra={
+                    "video_id": request.video_id,
+                    "placement_version": request.placement_version,
+                },
             )
             return SuggestAdsResponse(
                 video_id=request.video_id,
@@ -268,35 +663,79 @@ async def suggest_ads(request: SuggestAdsRequest) -> SuggestAdsResponse:
                 placement_count=0,
             )
 
-        placement_result = PlacementResult.model_validate(placement_result_json)
-
         logger.info(
             "Placement result loaded",
             extra={
                 "video_id": request.video_id,
                 "placement_count": len(placement_result.placements),
+                "partial": placement_result.partial,
             },
         )
 
-        # Use the ads agent to find relevant ads
-        logger.info(
-            "Running ads agent",
-            extra={"video_id": request.video_id},
-        )
+        if ad_profile_index is not None:
+            # A matrix product and a frequency cap lookup, off the loop
+            ads_response = await asyncio.to_thread(
+                match_ads_locally,
+                request.video_id,
+                s3_service,
+                placement_result,
+                ad_profile_index,
+                frequency_capper,
+            )
+        else:
+            # Deferred, the agent stack is slow to import and only needed here
+            from aim.services.agent import find_best_ads
 
-        ads_response = await find_best_ads(
-            request.video_id,
-            s3_service,
-            placement_result,
-            twelve_labs_service.search_ads,
+            # Use the ads agent to find relevant ads
+            logger.info(
+                "Running ads agent",
+                extra={"video_id": request.video_id},
+            )
+
+            ads_response = await find_best_ads(
+                request.video_id,
+                s3_service,
+                placement_result,
+                # Video tags route the searches to the relevant ads shards
+                functools.partial(
+                    twelve_labs_service.search_ads, tags=placement_result.tags
+                ),
+                deadline=deadline,
+                max_turns=settings.suggest_max_turns,
+                is_capped=(
+                    (lambda ad_id: frequency_capper.is_capped(ad_id, request.video_id))
+                    if frequency_capper
+                    else None
+                ),
+                rate_limiter=openai_rate_limiter,
+                cassette=cassette,
+            )
+
+        # The assignment solver is CPU-bound, keep it off the event loop
+        schedule = await asyncio.to_thread(
+            ad_assignment_optimizer.assign,
+            placement_result.placements,
+            ads_response.results,
         )
 
+        # Serve the new suggestions from /decide in this worker right away,
+        # other workers pick them up when their cached schedule expires
+        if not ads_response.partial and not placement_result.partial:
+            ad_schedule_cache.put(
+                AdSchedule.from_results(
+                    request.video_id, placement_result, ads_response, schedule
+                )
+            )
+
         # Create response
         response = SuggestAdsResponse(
             video_id=request.video_id,
             suggested_ads=ads_response.results,
             placement_count=len(placement_result.placements),
             placements=placement_result.placements,
+            placements_partial=placement_result.partial,
+            schedule=schedule,
+            partial=ads_response.partial,
         )
 
         logger.info(
@@ -304,6 +743,7 @@ async def suggest_ads(request: SuggestAdsRequest) -> SuggestAdsResponse:
             extra={
                 "video_id": request.video_id,
                 "suggested_ads_count": len(response.suggested_ads),
+                "partial": response.partial,
             },
         )
 
@@ -329,8 +769,235 @@ async def suggest_ads(request: SuggestAdsRequest) -> SuggestAdsResponse:
         ) from e
 
 
+def parse_video_ids(video_ids: list[str], max_ids: int) -> list[str]:
+    """Parse the video IDs of a bulk read request.
+
+    Accepts repeated query parameters as well as comma separated values.
+
+    Args:
+        video_ids: Raw video_ids query parameter values
+        max_ids: Maximum number of distinct video IDs
+
+    Returns:
+        Distinct video IDs in request order
+
+    Raises:
+        HTTPException: If no video ID is given or there are too many
+    """
+    parsed = list(
+        dict.fromkeys(
+            video_id.strip()
+            for value in video_ids
+            for video_id in value.split(",")
+            if video_id.strip()
+        )
+    )
+    if not parsed:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "detail": "At least one video ID is required",
+                "error_code": "MISSING_VIDEO_IDS",
+            },
+        )
+    if len(parsed) > max_ids:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "detail": f"At most {max_ids} video IDs are allowed per request",
+                "error_code": "TOO_MANY_VIDEO_IDS",
+            },
+        )
+    return parsed
+
+
+@app.get("/placements", response_model=BulkPlacementsResponse)
+async def get_placements(
+    video_ids: list[str] = Query(...),
+    version: Literal["final", "partial", "latest"] = "final",
+    settings: Settings = Depends(get_settings),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> BulkPlacementsResponse:
+    """Get the stored placement results of many videos at once.
+
+    Results are read from S3 concurrently. Videos without a stored result
+    map to null.
+
+    Args:
+        video_ids: Video IDs, repeated or comma separated
+        version: "final", "partial" or "latest" (final with partial fallback)
+        settings: Application settings
+        s3_service: S3Service instance
+
+    Returns:
+        BulkPlacementsResponse mapping each video ID to its placement result
+    """
+    ids = parse_video_ids(video_ids, settings.bulk_read_max_ids)
+    logger.info(
+        "Loading placement results",
+        extra={"video_count": len(ids), "placement_version": version},
+    )
+
+    placements: dict[str, PlacementResult | None] = dict.fromkeys(ids)
+    # One concurrent round per fallback path, only for videos still missing
+    for attempt in range(len(placement_result_paths(ids[0], version))):
+        missing = {
+            placement_result_paths(video_id, version)[attempt]: video_id
+            for video_id, result in placements.items()
+            if result is None
+        }
+        if not missing:
+            break
+        downloaded = await s3_service.download_json_files_async(
+            list(missing), concurrency=settings.bulk_read_concurrency
+        )
+        for path, data in downloaded.items():
+            if data is not None:
+                placements[missing[path]] = PlacementResult.model_validate(data)
+
+    return BulkPlacementsResponse(placements=placements)
+
+
+@app.get("/suggestions", response_model=BulkSuggestionsResponse)
+async def get_suggestions(
+    video_ids: list[str] = Query(...),
+    settings: Settings = Depends(get_settings),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> BulkSuggestionsResponse:
+    """Get the stored ad suggestions of many videos at once.
+
+    Reads the results of earlier /suggest calls from S3 concurrently,
+    without running the ads agent. Videos without stored suggestions map
+    to null.
+
+    Args:
+        video_ids: Video IDs, repeated or comma separated
+        settings: Application settings
+        s3_service: S3Service instance
+
+    Returns:
+        BulkSuggestionsResponse mapping each video ID to its ad suggestions
+    """
+    ids = parse_video_ids(video_ids, settings.bulk_read_max_ids)
+    logger.info("Loading ad suggestions", extra={"video_count": len(ids)})
+
+    paths = {f"results/ads_search_{video_id}.json": video_id for video_id in ids}
+    downloaded = await s3_service.download_json_files_async(
+        list(paths), concurrency=settings.bulk_read_concurrency
+    )
+
+    return BulkSuggestionsResponse(
+        suggestions={
+            paths[path]: (
+                AdSearchResponse.model_validate(data) if data is not None else None
+            )
+            for path, data in downloaded.items()
+        }
+    )
+
+
+async def load_ad_schedule(
+    s3_service: S3Service,
+    video_id: str,
+    ad_assignment_optimizer: AdAssignmentOptimizer,
+) -> AdSchedule | None:
+    """Build the ad schedule of a video from its stored results.
+
+    The stored ads are assigned to the placements again, as /suggest does.
+
+    Args:
+        s3_service: S3Service instance
+        video_id: ID of the video
+        ad_assignment_optimizer: AdAssignmentOptimizer instance
+
+    Returns:
+        The schedule, or None if the video has no final placement result
+    """
+    placement_result, ads_json = await asyncio.gather(
+        load_placement_result(s3_service, video_id),
+        s3_service.download_json_file_async(f"results/ads_search_{video_id}.json"),
+    )
+    if placement_result is None:
+        return None
+
+    if ads_json is None:
+        return AdSchedule.from_results(video_id, placement_result, None)
+
+    ads_response = AdSearchResponse.model_validate(ads_json)
+    schedule = await asyncio.to_thread(
+        ad_assignment_optimizer.assign,
+        placement_result.placements,
+        ads_response.results,
+    )
+    return AdSchedule.from_results(video_id, placement_result, ads_response, schedule)
+
+
+@app.get("/decide/{video_id}", response_model=AdDecisionResponse)
+async def decide_ad(
+    video_id: str,
+    t: float = Query(..., ge=0),
+    s3_service: S3Service = Depends(get_s3_service),
+    ad_schedule_cache: AdScheduleCache = Depends(get_ad_schedule_cache),
+    frequency_capper: FrequencyCapper | None = Depends(get_frequency_capper),
+    ad_assignment_optimizer: AdAssignmentOptimizer = Depends(
+        get_ad_assignment_optimizer
+    ),
+) -> AdDecisionResponse:
+    """Get the next ad placement of a video at a playback time.
+
+    Served from an in-memory schedule, S3 is only read when the schedule
+    of the video is not cached. With frequency capping enabled, capped ads
+    are skipped and the served ad counts as an impression.
+
+    Args:
+        video_id: ID of the video
+        t: Playback time in seconds
+        s3_service: S3Service instance
+        ad_schedule_cache: AdScheduleCache instance
+        frequency_capper: FrequencyCapper instance, None when disabled
+        ad_assignment_optimizer: AdAssignmentOptimizer instance
+
+    Returns:
+        AdDecisionResponse with the next placement and its ad
+
+    Raises:
+        HTTPException: If the video has no placement result
+    """
+    schedule = await ad_schedule_cache.get_or_load(
+        video_id,
+        lambda: load_ad_schedule(s3_service, video_id, ad_assignment_optimizer),
+    )
+    if schedule is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "detail": f"No placement result for video {video_id}",
+                "error_code": "SCHEDULE_NOT_FOUND",
+            },
+        )
+
+    if frequency_capper is None:
+        decision = schedule.next(t)
+    else:
+        decision = schedule.next(
+            t, lambda ad_id: frequency_capper.is_capped(ad_id, video_id)
+        )
+    if decision is None:
+        return AdDecisionResponse(video_id=video_id, t=t)
+
+    placement, ad = decision
+    if ad is not None and frequency_capper is not None:
+        frequency_capper.record(ad.id, video_id)
+    return AdDecisionResponse(video_id=video_id, t=t, placement=placement, ad=ad)
+
+
+# The TwelveLabs SDK models are returned as-is, annotating them would import
+# the SDK at startup
 @app.get("/12/index")
-def get_indexes() -> list[IndexSchema]:
+@tracing.watched
+def get_indexes(
+    twelve_labs_service: TwelveLabsService = Depends(get_twelve_labs_service),
+) -> list[Any]:
     """Get a video from S3.
 
     Args:
@@ -340,7 +1007,11 @@ def get_indexes() -> list[IndexSchema]:
 
 
 @app.get("/12/index/{index_id}/video")
-def get_index_videos(index_id: str) -> list[VideoVector]:
+@tracing.watched
+def get_index_videos(
+    index_id: str,
+    twelve_labs_service: TwelveLabsService = Depends(get_twelve_labs_service),
+) -> list[Any]:
     """Get a video from S3.
 
     Args:
@@ -353,7 +1024,12 @@ def get_index_videos(index_id: str) -> list[VideoVector]:
 
 
 @app.get("/12/index/{index_id}/video/{video_id}")
-def get_index_video(index_id: str, video_id: str) -> VideoVector:
+@tracing.watched
+def get_index_video(
+    index_id: str,
+    video_id: str,
+    twelve_labs_service: TwelveLabsService = Depends(get_twelve_labs_service),
+) -> Any:
     """Get a video from S3.
 
     Args:
@@ -0,0 +1,537 @@
+"""Process-wide metrics in the Prometheus text format.
+
+Stages of the request pipeline (S3 calls, TwelveLabs calls, OpenAI calls,
+agent runs and tool calls) are timed with track(), which opens a tracing
+span of the stage and records a latency
+histogram labelled by stage and outcome, an error counter labelled by stage
+and exception type, and an in-flight gauge labelled by stage. GET /metrics
+renders them. Inside an analysis or suggestion run, track() also accounts
+the stage to the usage ledger of the video, see aim.usage.
+
+Each worker process keeps its own metrics. Workers started by python -m aim
+serve share one port, so they also write snapshots of their metrics to a
+shared directory and /metrics renders the metrics of all workers merged.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Literal, TypeVar
+
+from aim.tracing import span
+from aim.usage import current_collector
+
+if TYPE_CHECKING:
+    from aim.services.hedging import RequestHedger
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the stage latency buckets
+STAGE_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    float("inf"),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+M = TypeVar("M", "Counter", "Gauge", "Histogram")
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        """Initialize counter.
+
+        Args:
+            name: Metric name
+            help: Description shown by Prometheus
+            labelnames: Names of the labels
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add amount to the counter of a label set."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current values, as JSON-serializable data."""
+        with self._lock:
+            samples = [[list(labels), value] for labels, value in self._values.items()]
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "help": self.help,
+            "labelnames": list(self.labelnames),
+            "samples": samples,
+        }
+
+
+class Gauge(Counter):
+    """Value that goes up and down, with labels."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        mode: Literal["sum", "max"] = "sum",
+    ):
+        """Initialize gauge.
+
+        Args:
+            name: Metric name
+            help: Description shown by Prometheus
+            labelnames: Names of the labels
+            mode: How the values of worker processes are merged, "sum" for
+                amounts such as running stages, "max" for levels such as
+                latency percentiles (default: sum)
+        """
+        super().__init__(name, help, labelnames)
+        self.mode = mode
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        """Subtract amount from the gauge of a label set."""
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the gauge of a label set."""
+        with self._lock:
+            self._values[labels] = value
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current values, as JSON-serializable data."""
+        return super().snapshot() | {"mode": self.mode}
+
+
+class Histogram:
+    """Latency histogram with labels and fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = STAGE_BUCKETS,
+    ):
+        """Initialize histogram.
+
+        Args:
+            name: Metric name
+            help: Description shown by Prometheus
+            labelnames: Names of the labels
+            buckets: Increasing bucket upper bounds, ending with +Inf
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # Per label set: non-cumulative bucket counts and the sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record a value for a label set."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(labels) or self._values.setdefault(
+                labels, ([0] * len(self.buckets), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current values, as JSON-serializable data."""
+        with self._lock:
+            samples = [
+                [list(labels), list(counts), total[0]]
+                for labels, (counts, total) in self._values.items()
+            ]
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "help": self.help,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "samples": samples,
+        }
+
+
+def _render_metric(metric: dict[str, Any]) -> Iterable[str]:
+    name, labelnames = metric["name"], tuple(metric["labelnames"])
+    yield f"# HELP {name} {metric['help']}"
+    yield f"# TYPE {name} {metric['kind']}"
+    if metric["kind"] != "histogram":
+        for labels, value in metric["samples"]:
+            yield f"{name}{_format_labels(labelnames, tuple(labels))} {_format_value(value)}"
+        return
+
+    bucket_names = (*labelnames, "le")
+    for labels, counts, total in metric["samples"]:
+        cumulative = 0
+        for bound, count in zip(metric["buckets"], counts):
+            cumulative += count
+            bucket_labels = _format_labels(
+                bucket_names, (*labels, _format_value(bound))
+            )
+            yield f"{name}_bucket{bucket_labels} {cumulative}"
+        label_text = _format_labels(labelnames, tuple(labels))
+        yield f"{name}_sum{label_text} {_format_value(total)}"
+        yield f"{name}_count{label_text} {cumulative}"
+
+
+def render(metrics: Iterable[dict[str, Any]]) -> str:
+    """Render metric snapshots in the Prometheus text format.
+
+    Args:
+        metrics: Snapshots of the metrics
+
+    Returns:
+        Text exposition of the metrics
+    """
+    lines = []
+    for metric in metrics:
+        lines.extend(_render_metric(metric))
+    return "\n".join(lines) + "\n"
+
+
+def merge_snapshots(
+    snapshots: Iterable[tuple[list[dict[str, Any]], bool]],
+) -> list[dict[str, Any]]:
+    """Merge the metric snapshots of several worker processes.
+
+    Counters and histograms are summed over every process, exited ones
+    included, so totals do not drop when a worker is replaced. Gauges are
+    merged over the live processes only, by their mode.
+
+    Args:
+        snapshots: Metric snapshots of each process, with whether the
+            process is still running
+
+    Returns:
+        Merged metric snapshots
+    """
+    merged: dict[str, dict[str, Any]] = {}
+    # Per metric and label set: the value, or the bucket counts and the sum
+    values: dict[str, dict[tuple[str, ...], list[Any]]] = {}
+    for metrics, live in snapshots:
+        for metric in metrics:
+            if metric["kind"] == "gauge" and not live:
+                continue
+            name = metric["name"]
+            merged.setdefault(name, metric)
+            target = values.setdefault(name, {})
+            for labels, *sample in metric["samples"]:
+                existing = target.get(tuple(labels))
+                if existing is None:
+                    target[tuple(labels)] = list(sample)
+                elif metric["kind"] == "histogram":
+                    existing[0] = [a + b for a, b in zip(existing[0], sample[0])]
+                    existing[1] += sample[1]
+                elif metric.get("mode") == "max":
+                    existing[0] = max(existing[0], sample[0])
+                else:
+                    existing[0] += sample[0]
+
+    return [
+        merged[name]
+        | {"samples": [[list(labels), *value] for labels, value in samples.items()]}
+        for name, samples in values.items()
+    ]
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Metrics of the process and collectors adding computed ones.
+
+    A single process renders its own metrics. When several worker processes
+    serve the same port, each scrape reaches an arbitrary worker, so every
+    worker periodically writes a snapshot of its metrics to a shared
+    directory and renders the merged snapshots of all workers.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Callable[[], Iterable[Counter | Histogram]]] = []
+        self._directory: Path | None = None
+        self._stop = threading.Event()
+        self._writer: threading.Thread | None = None
+
+    def register(self, metric: M) -> M:
+        """Add a metric to the rendered output and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(
+        self, collector: Callable[[], Iterable[Counter | Histogram]]
+    ) -> None:
+        """Add a callable returning metrics computed when rendering."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Snapshots of every metric of this process."""
+        metrics = [metric.snapshot() for metric in self._metrics]
+        for collector in self._collectors:
+            metrics.extend(metric.snapshot() for metric in collector())
+        return metrics
+
+    def enable_multiprocess(self, directory: str, interval: float = 5.0) -> None:
+        """Share the metrics of this process with the other workers.
+
+        Args:
+            directory: Directory shared by the workers, emptied before they
+                start so metrics of earlier runs are not merged
+            interval: Seconds between snapshots of this process
+        """
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._writer = threading.Thread(
+            target=self._write_periodically,
+            args=(interval,),
+            name="metrics-snapshot",
+            daemon=True,
+        )
+        self._writer.start()
+
+    def _write_periodically(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.write_snapshot()
+
+    def write_snapshot(self) -> None:
+        """Write the snapshot of this process to the shared directory."""
+        if self._directory is None:
+            return
+        path = self._directory / f"{os.getpid()}.json"
+        staging = path.with_suffix(".tmp")
+        try:
+            staging.write_text(json.dumps(self.snapshot()))
+            os.replace(staging, path)
+        except OSError:
+            logger.warning(
+                "Failed to write metrics snapshot", extra={"path": str(path)}
+            )
+
+    def _read_snapshots(self) -> Iterable[tuple[list[dict[str, Any]], bool]]:
+        for path in self._directory.glob("*.json"):
+            try:
+                pid = int(path.stem)
+                metrics = json.loads(path.read_text())
+            except (ValueError, OSError):
+                continue
+            yield metrics, _process_alive(pid)
+
+    def render(self) -> str:
+        """Render the metrics of this process, or of every worker."""
+        if self._directory is None:
+            return render(self.snapshot())
+        self.write_snapshot()
+        return render(merge_snapshots(self._read_snapshots()))
+
+    def close(self) -> None:
+        """Stop sharing metrics, leaving the last snapshot for the others."""
+        if self._writer is None:
+            return
+        self._stop.set()
+        self._writer.join()
+        self._writer = None
+        self.write_snapshot()
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "aim_stage_duration_seconds",
+        "Duration of pipeline stages",
+        ("stage", "outcome"),
+    )
+)
+STAGE_ERRORS = REGISTRY.register(
+    Counter(
+        "aim_stage_errors_total",
+        "Pipeline stages that raised, by exception type",
+        ("stage", "error"),
+    )
+)
+STAGE_IN_FLIGHT = REGISTRY.register(
+    Gauge("aim_stage_in_flight", "Pipeline stages currently running", ("stage",))
+)
+
+
+class track:
+    """Time a pipeline stage, as a context manager.
+
+    The stage also runs in a tracing span named after it. The outcome is
+    "ok", or "error" ("timeout" for TimeoutError) when the block raises, in
+    which case the exception type is counted too. Callers can set outcome
+    to a more specific value, such as "not_found", before leaving the block,
+    and report the tokens and bytes of the call with add_usage().
+
+    Example:
+        with track("s3.get") as stage:
+            ...
+    """
+
+    __slots__ = ("stage", "usage_stage", "outcome", "_started", "_span", "_usage")
+
+    def __init__(self, stage: str, usage_stage: str | None = None, **attributes: Any):
+        """Initialize stage timer.
+
+        Args:
+            stage: Stage name, such as "twelvelabs.analyze"
+            usage_stage: Stage the call is accounted to in the usage ledger,
+                such as the prompt of an analyze call (default: stage)
+            **attributes: Attributes of the tracing span, such as the video ID
+        """
+        self.stage = stage
+        self.usage_stage = usage_stage or stage
+        self.outcome = "ok"
+        self._started = 0.0
+        self._span = span(stage, **attributes)
+        self._usage: dict[str, int] = {}
+
+    def add_usage(self, **counts: int) -> None:
+        """Report usage of the call for the ledger of the video.
+
+        Args:
+            **counts: input_tokens, output_tokens, bytes_sent or
+                bytes_received
+        """
+        for key, value in counts.items():
+            self._usage[key] = self._usage.get(key, 0) + value
+
+    def __enter__(self) -> "track":
+        self._span.__enter__()
+        STAGE_IN_FLIGHT.inc(self.stage)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        elapsed = time.perf_counter() - self._started
+        if exc_type is not None:
+            if self.outcome == "ok":
+                timeout = issubclass(exc_type, TimeoutError)
+                self.outcome = "timeout" if timeout else "error"
+            STAGE_ERRORS.inc(self.stage, exc_type.__name__)
+        STAGE_IN_FLIGHT.dec(self.stage)
+        STAGE_DURATION.observe(elapsed, self.stage, self.outcome)
+        collector = current_collector()
+        if collector is not None:
+            collector.add(
+                self.usage_stage,
+                calls=1,
+                errors=int(exc_type is not None),
+                wall_time=elapsed,
+                **self._usage,
+            )
+        self._span.span.set_attribute("outcome", self.outcome)
+        self._span.__exit__(exc_type, exc, traceback)
+
+
+def hedger_collector(
+    hedger: "RequestHedger",
+) -> Callable[[], Iterable[Counter | Histogram]]:
+    """Build a collector exporting the counters of an ads search hedger.
+
+    Args:
+        hedger: Hedger of the ads searches
+
+    Returns:
+        Collector for MetricsRegistry.register_collector
+    """
+
+    def collect() -> Iterable[Counter | Histogram]:
+        stats = hedger.stats()
+        for name, key, help in (
+            (
+                "aim_search_hedge_requests_total",
+                "requests",
+                "Ads searches sent through the hedger",
+            ),
+            (
+                "aim_search_hedges_total",
+                "hedges",
+                "Duplicate requests sent for slow ads searches",
+            ),
+            (
+                "aim_search_hedge_wins_total",
+                "hedge_wins",
+                "Ads searches answered first by the duplicate",
+            ),
+        ):
+            counter = Counter(name, help)
+            counter.inc(amount=stats[key])
+            yield counter
+
+        latency = Gauge(
+            "aim_search_hedge_recent_latency_seconds",
+            "Ads search latency percentiles over the recent window",
+            ("quantile",),
+            mode="max",
+        )
+        for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+            if stats[key] is not None:
+                latency.set(stats[key], quantile)
+        yield latency
+
+    return collect
@@ -1,6 +1,8 @@
 """Ads search request and response models."""
 
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 from aim.models.placement import Placement
 
@@ -31,17 +33,48 @@ class AdSearchResult(BaseModel):
         return sum(clip.score for clip in self.clips) / len(self.clips)
 
 
+class AdProfile(BaseModel):
+    """Structured description of an ad, used to match ads locally."""
+
+    video_id: str
+    duration: float | None = None
+    summary: str = ""
+    themes: list[str] = []
+    tone: list[str] = []
+    keywords: list[str] = []
+
+
 class AdSearchResponse(BaseModel):
     """Response model for ad search containing multiple results."""
 
     results: list[AdSearchResult]
     query: str
+    # True when the search stopped early on its deadline or turn limit
+    partial: bool = False
+
+
+class PlacementSchedule(BaseModel):
+    """Ad clips scheduled in the pod of a placement, in play order."""
+
+    placement: Placement
+    clips: list[AdClip] = []
+    score: float = 0.0
 
 
 class SuggestAdsRequest(BaseModel):
-    """Request model for suggesting ads for a video."""
+    """Request model for suggesting ads for a video.
+
+    Attributes:
+        video_id: ID of the video
+        placement_version: Which placement result to use. "final" only reads
+            the completed analysis, "partial" only the provisional one and
+            "latest" prefers the final result and falls back to the partial.
+        timeout: Time budget in seconds, overrides the configured default
+    """
 
     video_id: str
+    placement_version: Literal["final", "partial", "latest"] = "final"
+    timeout: float | None = Field(None, gt=0)
 
 
 class SuggestAdsResponse(BaseModel):
@@ -51,3 +84,25 @@ class SuggestAdsResponse(BaseModel):
     suggested_ads: list[AdSearchResult]
     placement_count: int
     placements: list[Placement] | None = None
+    placements_partial: bool = False
+    # Clips assigned to each placement, without repeating an ad
+    schedule: list[PlacementSchedule] | None = None
+    # True when the time budget ran out and suggested_ads is incomplete
+    partial: bool = False
+
+
+class AdDecisionResponse(BaseModel):
+    """Response model for the ad to play next at a playback time."""
+
+    video_id: str
+    t: float
+    # Next placement at or after t, None once playback is past the last one
+    placement: Placement | None = None
+    ad: AdSearchResult | None = None
+
+
+class BulkSuggestionsResponse(BaseModel):
+    """Response model for reading the stored ad suggestions of many videos."""
+
+    # Videos without stored suggestions map to None
+    suggestions: dict[str, AdSearchResponse | None]
@@ -47,3 +47,19 @@ class AnalyzeResponse(BaseModel):
         description="The unique identifier of the video",
         examples=["660e8400-e29b-41d4-a716-446655440001"],
     )
+
+
+class AnalyzeStatusResponse(BaseModel):
+    """Response model describing the analysis job of a video.
+
+    Attributes:
+        video_id: The unique identifier of the video in TwelveLabs
+        status: Current job status
+        updated_at: ISO 8601 timestamp of the last status change (UTC)
+        error: Error message when the job failed
+    """
+
+    video_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    updated_at: str
+    error: str | None = None
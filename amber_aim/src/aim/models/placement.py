@@ -61,8 +61,8 @@ class Character(BaseModel):
     arc: str
 
 
-class PlacementResult(BaseModel):
-    """Result model for placing ads in a video."""
+class PlacementAnalysis(BaseModel):
+    """Ad placement analysis of a video, the output schema of the LLM."""
 
     summary: str
     tags: list[str]
@@ -78,3 +78,21 @@ class PlacementResult(BaseModel):
     natural_breakpoints: list[str]
     narrative_structure: list[Narration]
     placements: list[Placement]
+
+
+class PlacementResult(PlacementAnalysis):
+    """Result model for placing ads in a video.
+
+    Kept apart from PlacementAnalysis so the bookkeeping fields set by the
+    server are not part of the schema the LLM fills in.
+    """
+
+    # True for provisional results built from a subset of the prompt outputs
+    partial: bool = False
+
+
+class BulkPlacementsResponse(BaseModel):
+    """Response model for reading the placement results of many videos."""
+
+    # Videos without a stored result map to None
+    placements: dict[str, PlacementResult | None]
@@ -2,7 +2,7 @@
 
 from datetime import datetime, timedelta
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class UploadURLRequest(BaseModel):
@@ -10,6 +10,8 @@ class UploadURLRequest(BaseModel):
 
     Attributes:
         filename: Original filename with extension (e.g., "video.mp4")
+        content_sha256: Hex SHA-256 digest of the file, enables deduplication
+        content_size: File size in bytes, required with content_sha256
     """
 
     filename: str = Field(
@@ -17,6 +19,14 @@ class UploadURLRequest(BaseModel):
         description="Original filename with extension",
         examples=["video.mp4", "recording.mov"],
     )
+    content_sha256: str | None = Field(
+        None,
+        description="Hex SHA-256 digest of the file content",
+        pattern=r"^[0-9a-fA-F]{64}$",
+    )
+    content_size: int | None = Field(
+        None, description="File size in bytes", gt=0, examples=[104857600]
+    )
 
     @field_validator("filename")
     @classmethod
@@ -40,37 +50,80 @@ class UploadURLRequest(BaseModel):
             raise ValueError("filename too long (max 255 chars)")
         return v.strip()
 
+    @model_validator(mode="after")
+    def validate_content_hash(self) -> "UploadURLRequest":
+        """Validate that content hash and size are given together.
+
+        Raises:
+            ValueError: If only one of them is set
+        """
+        if (self.content_sha256 is None) != (self.content_size is None):
+            raise ValueError("content_sha256 and content_size must be set together")
+        if self.content_sha256 is not None:
+            self.content_sha256 = self.content_sha256.lower()
+        return self
+
 
 class UploadURLResponse(BaseModel):
     """Response model containing presigned URL and metadata.
 
+    For duplicate uploads no upload is needed: upload_url, expires_in and
+    expires_at are None and s3_path points to the existing file.
+
     Attributes:
         upload_url: AWS S3 presigned URL for video upload (PUT request)
+        upload_headers: Headers the PUT request must send, the checksum of
+            the announced content hash
         s3_path: S3 object key where video will be stored
         expires_in: Seconds until URL expires
         expires_at: ISO 8601 timestamp when URL expires (UTC)
+        duplicate: Whether the same content was uploaded before
+        video_id: TwelveLabs video ID of the existing upload, if indexed
+        placement_path: S3 key of the existing placement result, if analyzed
     """
 
-    upload_url: str = Field(
+    upload_url: str | None = Field(
         ..., description="Presigned S3 URL for video upload (PUT request)"
     )
+    upload_headers: dict[str, str] = Field(
+        default_factory=dict,
+        description="Headers the PUT request must send",
+        examples=[
+            {"x-amz-checksum-sha256": "LXEWQrcmsEQBYnyp+6wy9chTD7GQPMTbAiWHF5IaSIE="}
+        ],
+    )
     s3_path: str = Field(
         ...,
         description="S3 object key where video will be stored",
         examples=["upload/550e8400-e29b-41d4-a716-446655440000.mp4"],
     )
-    expires_in: int = Field(
+    expires_in: int | None = Field(
         ..., description="Seconds until URL expires", gt=0, examples=[1800]
     )
-    expires_at: str = Field(
+    expires_at: str | None = Field(
         ...,
         description="ISO 8601 timestamp when URL expires (UTC)",
         examples=["2025-10-04T12:30:00Z"],
     )
+    duplicate: bool = Field(
+        False, description="Whether the same content was uploaded before"
+    )
+    video_id: str | None = Field(
+        None, description="TwelveLabs video ID of the existing upload"
+    )
+    placement_path: str | None = Field(
+        None,
+        description="S3 key of the existing placement result",
+        examples=["results/placement_660e8400-e29b-41d4-a716-446655440001.json"],
+    )
 
     @classmethod
     def create(
-        cls, upload_url: str, s3_path: str, expires_in: int
+        cls,
+        upload_url: str,
+        s3_path: str,
+        expires_in: int,
+        upload_headers: dict[str, str] | None = None,
     ) -> "UploadURLResponse":
         """Factory method to create response with calculated expiration.
 
@@ -78,6 +131,7 @@ class UploadURLResponse(BaseModel):
             upload_url: The presigned S3 URL
             s3_path: The S3 object key
             expires_in: Expiration time in seconds
+            upload_headers: Headers the upload must send
 
         Returns:
             UploadURLResponse instance with calculated expiration timestamp
@@ -85,7 +139,47 @@ class UploadURLResponse(BaseModel):
         expires_at = datetime.now() + timedelta(seconds=expires_in)
         return cls(
             upload_url=upload_url,
+            upload_headers=upload_headers or {},
             s3_path=s3_path,
             expires_in=expires_in,
             expires_at=expires_at.isoformat() + "Z",
         )
+
+    @classmethod
+    def create_duplicate(
+        cls, entry: "UploadDedupEntry", placement_path: str | None
+    ) -> "UploadURLResponse":
+        """Factory method to create response pointing to an existing upload.
+
+        Args:
+            entry: Dedup index entry of the existing upload
+            placement_path: S3 key of the existing placement result, if any
+
+        Returns:
+            UploadURLResponse instance without upload URL
+        """
+        return cls(
+            upload_url=None,
+            s3_path=entry.s3_path,
+            expires_in=None,
+            expires_at=None,
+            duplicate=True,
+            video_id=entry.video_id,
+            placement_path=placement_path,
+        )
+
+
+class UploadDedupEntry(BaseModel):
+    """Dedup index entry linking file content to its existing artifacts.
+
+    Attributes:
+        content_sha256: Hex SHA-256 digest of the file content
+        content_size: File size in bytes
+        s3_path: S3 object key of the uploaded file
+        video_id: TwelveLabs video ID once the file has been indexed
+    """
+
+    content_sha256: str
+    content_size: int
+    s3_path: str
+    video_id: str | None = None
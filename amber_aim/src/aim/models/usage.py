@@ -0,0 +1,76 @@
+"""API usage ledger models."""
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class StageUsage(BaseModel):
+    """Calls, tokens, bytes and wall time of one pipeline stage.
+
+    Wall times of nested stages overlap, ads_search includes the
+    twelvelabs.search calls it makes for example.
+    """
+
+    calls: int = 0
+    errors: int = 0
+    wall_time: float = Field(0.0, description="Seconds spent in the stage")
+    input_tokens: int = 0
+    output_tokens: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    def add(self, other: "StageUsage") -> None:
+        """Add the usage of other to this one."""
+        self.calls += other.calls
+        self.errors += other.errors
+        self.wall_time += other.wall_time
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.bytes_sent += other.bytes_sent
+        self.bytes_received += other.bytes_received
+
+
+def _add_stages(target: dict[str, StageUsage], source: dict[str, StageUsage]) -> None:
+    for name, usage in source.items():
+        target.setdefault(name, StageUsage()).add(usage)
+
+
+class VideoUsage(BaseModel):
+    """Usage of the analyses and ads suggestions of one video.
+
+    Attributes:
+        video_id: ID of the video
+        runs: Analysis and suggestion runs, keyed by kind, with their calls
+            and total wall time
+        stages: Usage of the stages the runs went through, keyed by stage name
+        updated_at: When the last run finished
+    """
+
+    video_id: str
+    runs: dict[str, StageUsage] = Field(default_factory=dict)
+    stages: dict[str, StageUsage] = Field(default_factory=dict)
+    updated_at: datetime | None = None
+
+    def merge(self, other: "VideoUsage") -> None:
+        """Add the runs and stages of other to this ledger."""
+        _add_stages(self.runs, other.runs)
+        _add_stages(self.stages, other.stages)
+        if other.updated_at is not None and (
+            self.updated_at is None or other.updated_at > self.updated_at
+        ):
+            self.updated_at = other.updated_at
+
+
+class UsageResponse(BaseModel):
+    """Usage of the runs finished by this worker since it started.
+
+    Attributes:
+        videos: Distinct videos with a finished run
+        runs: Runs keyed by kind
+        stages: Stages keyed by name, the longest total wall time first
+    """
+
+    videos: int
+    runs: dict[str, StageUsage]
+    stages: dict[str, StageUsage]
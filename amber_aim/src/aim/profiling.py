@@ -0,0 +1,297 @@
+"""On-demand sampling profiles of single requests.
+
+A profiled request is followed through its trace: every thread inside a
+span or propagated call of the trace is sampled, so the profile covers the
+request handler, the thread pools it fans out to and, for /analyze, the
+background analysis continuing after the response. The profile ends once
+no thread has worked on the trace for a grace period.
+
+Sync route handlers run on worker threads that open no span, they are
+sampled because they are decorated with aim.tracing.watched. Sync
+dependencies are resolved in separate worker thread calls before the
+handler runs and are not sampled, nor is a sync handler left undecorated.
+
+Samples are taken from sys._current_frames() by a dedicated thread, which
+measures wall time, waiting included, without slowing the profiled code
+down beyond the sampling itself. Async requests share the event loop
+thread with other requests, so their loop samples can include work of
+concurrent requests.
+
+Each profile is written to the profile directory as REQUEST_ID.folded,
+collapsed stacks readable by flamegraph.pl and speedscope, and
+REQUEST_ID.json with the request details and the hottest functions.
+"""
+
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from types import FrameType
+from typing import Any
+from uuid import uuid4
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from aim import tracing
+from aim.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Request IDs name the profile files, anything else is replaced
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """Sampling profile of the threads working on one trace."""
+
+    def __init__(
+        self,
+        request_id: str,
+        trace_id: str,
+        details: dict[str, Any],
+        path: str,
+        interval: float = 0.005,
+        idle_grace: float = 1.0,
+        max_seconds: float = 300.0,
+    ):
+        """Initialize profile session.
+
+        Args:
+            request_id: ID of the request, names the profile files
+            trace_id: Trace of the request
+            details: Request details written with the profile, such as the
+                method and path
+            path: Profile directory, created if missing
+            interval: Seconds between samples
+            idle_grace: Seconds without any thread on the trace after which
+                the profile ends, covering the gap before background tasks
+            max_seconds: Seconds after which the profile ends regardless
+        """
+        self.request_id = request_id
+        self.trace_id = trace_id
+        self.details = details
+        self.path = Path(path)
+        self.interval = interval
+        self.idle_grace = idle_grace
+        self.max_seconds = max_seconds
+
+        self.samples: Counter[str] = Counter()
+        self.sample_count = 0
+        self._lock = threading.Lock()
+        # Thread ID to the number of spans it has open on the trace
+        self._threads: dict[int, int] = {}
+        self._idle_since: float | None = None
+        self._sampler = threading.Thread(
+            target=self._run, name=f"profile-{request_id}", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start watching the trace and sampling its threads."""
+        self._started = time.monotonic()
+        self._idle_since = self._started
+        tracing.watch(self.trace_id, self)
+        self._sampler.start()
+
+    def enter(self) -> None:
+        """Sample the calling thread until the matching exit()."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+            self._idle_since = None
+
+    def exit(self) -> None:
+        """Stop sampling the calling thread once all its entries exited."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            count = self._threads.get(thread_id, 0) - 1
+            if count > 0:
+                self._threads[thread_id] = count
+            else:
+                self._threads.pop(thread_id, None)
+            if not self._threads:
+                self._idle_since = time.monotonic()
+
+    def _finished(self, now: float) -> bool:
+        with self._lock:
+            idle = (
+                self._idle_since is not None
+                and now - self._idle_since >= self.idle_grace
+            )
+        return idle or now - self._started >= self.max_seconds
+
+    def _sample(self) -> None:
+        with self._lock:
+            thread_ids = list(self._threads)
+        if not thread_ids:
+            return
+
+        frames = sys._current_frames()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id in thread_ids:
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def _run(self) -> None:
+        try:
+            while not self._finished(time.monotonic()):
+                self._sample()
+                time.sleep(self.interval)
+        finally:
+            tracing.unwatch(self.trace_id)
+        try:
+            self.write(time.monotonic() - self._started)
+        except Exception:
+            logger.warning(
+                "Failed to write profile",
+                extra={"request_id": self.request_id},
+                exc_info=True,
+            )
+
+    def top_functions(self, limit: int = 30) -> list[dict[str, Any]]:
+        """Functions ranked by the samples they were running in.
+
+        Args:
+            limit: Maximum functions returned
+
+        Returns:
+            List of dictionaries with the function, its self samples (on top
+            of the stack, where the time went) and its total samples
+            (anywhere in the stack)
+        """
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            # The first entry is the thread name
+            functions = stack.split(";")[1:]
+            if functions:
+                own[functions[-1]] += count
+            for function in set(functions):
+                total[function] += count
+        return [
+            {"function": function, "self": own[function], "total": total[function]}
+            for function, _ in own.most_common(limit)
+        ]
+
+    def write(self, wall_time: float) -> None:
+        """Write the collapsed stacks and the summary of the profile.
+
+        Args:
+            wall_time: Seconds from the start of the request to the end of
+                the profile
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        folded = self.path / f"{self.request_id}.folded"
+        with open(folded, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        summary = {
+            "request_id": self.request_id,
+            "trace_id": self.trace_id,
+            **self.details,
+            "wall_time": round(wall_time, 3),
+            "interval": self.interval,
+            "samples": self.sample_count,
+            "top_functions": self.top_functions(),
+        }
+        with open(self.path / f"{self.request_id}.json", "w") as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info(
+            "Profile written",
+            extra={
+                "request_id": self.request_id,
+                "path": str(folded),
+                "samples": self.sample_count,
+            },
+        )
+
+
+class ProfilingMiddleware:
+    """Profile the requests carrying the profiling token.
+
+    A plain ASGI middleware, so requests without the token only cost a
+    settings lookup. The token is sent in the X-Profile header or the
+    profile query parameter, and profiling is disabled while it is not
+    configured. The profile is named after a valid X-Request-ID header, or a
+    generated ID, returned in the X-Profile-Id response header.
+    """
+
+    def __init__(self, app: ASGIApp, settings: Callable[[], Settings]):
+        """Initialize profiling middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            settings: Returns the application settings
+        """
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.settings().profiling_token:
+            await self.app(scope, receive, send)
+            return
+
+        settings = self.settings()
+        headers = Headers(scope=scope)
+        supplied = headers.get("x-profile") or QueryParams(scope["query_string"]).get(
+            "profile"
+        )
+        span = tracing.current_span()
+        if (
+            not supplied
+            or not hmac.compare_digest(supplied, settings.profiling_token)
+            or span is None
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = headers.get("x-request-id", "")
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid4().hex
+        session = ProfileSession(
+            request_id,
+            span.trace_id,
+            {"method": scope["method"], "path": scope["path"]},
+            settings.profiling_path,
+            interval=settings.profiling_interval,
+            max_seconds=settings.profiling_max_seconds,
+        )
+        session.start()
+        logger.info("Profiling request", extra={"request_id": request_id})
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [
+                    *message["headers"],
+                    (b"x-profile-id", request_id.encode()),
+                ]
+            await send(message)
+
+        session.enter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session.exit()
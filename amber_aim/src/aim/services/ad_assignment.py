@@ -0,0 +1,198 @@
+"""Assignment of ad clips to the placements of a video."""
+
+import logging
+import re
+
+import numpy as np
+
+from aim.models.ads import AdClip, AdSearchResult, PlacementSchedule
+from aim.models.placement import Placement
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> set[str]:
+    return set(WORD_PATTERN.findall(text.lower()))
+
+
+def _bag_of_words(word_sets: list[set[str]], vocabulary: dict[str, int]) -> np.ndarray:
+    """Binary matrix with one row per word set, words outside vocabulary ignored."""
+    rows, columns = [], []
+    for row, words in enumerate(word_sets):
+        for word in words:
+            if word in vocabulary:
+                rows.append(row)
+                columns.append(vocabulary[word])
+
+    matrix = np.zeros((len(word_sets), len(vocabulary)), dtype=np.float32)
+    matrix[rows, columns] = 1.0
+    return matrix
+
+
+class AdAssignmentOptimizer:
+    """Assign ranked ad clips to placements under pod constraints.
+
+    Every placement and candidate clip pair is scored at once in a NumPy
+    matrix, combining the search score of the clip, the overlap between
+    the clip transcription and the placement keywords, and how close the
+    clip duration is to the target. Clips are then assigned in rounds:
+    each placement takes its best clip that still fits its pod, conflicts
+    over the same ad go to the higher score, and an ad is never scheduled
+    twice in the same video.
+    """
+
+    def __init__(
+        self,
+        max_pod_seconds: float = 90.0,
+        max_clips_per_pod: int = 3,
+        target_clip_seconds: float = 30.0,
+        score_weight: float = 0.6,
+        keyword_weight: float = 0.3,
+        duration_weight: float = 0.1,
+    ):
+        """Initialize ad assignment optimizer.
+
+        Args:
+            max_pod_seconds: Maximum total duration of the clips of a placement
+            max_clips_per_pod: Maximum number of clips of a placement
+            target_clip_seconds: Preferred clip duration
+            score_weight: Weight of the normalized search score
+            keyword_weight: Weight of the keyword overlap
+            duration_weight: Weight of the duration fit
+        """
+        self.max_pod_seconds = max_pod_seconds
+        self.max_clips_per_pod = max_clips_per_pod
+        self.target_clip_seconds = target_clip_seconds
+        self.score_weight = score_weight
+        self.keyword_weight = keyword_weight
+        self.duration_weight = duration_weight
+
+    def score_matrix(
+        self, placements: list[Placement], clips: list[AdClip]
+    ) -> np.ndarray:
+        """Score every placement and clip pair.
+
+        Args:
+            placements: Ad placements of the video
+            clips: Candidate ad clips
+
+        Returns:
+            Matrix of shape (placements, clips), -inf where a clip can never
+            fit a pod
+        """
+        scores = np.array([clip.score for clip in clips], dtype=np.float64)
+        durations = np.array(
+            [clip.end - clip.start for clip in clips], dtype=np.float64
+        )
+
+        max_score = scores.max(initial=0.0)
+        normalized = scores / max_score if max_score > 0 else np.zeros_like(scores)
+        duration_fit = 1.0 - np.minimum(
+            np.abs(durations - self.target_clip_seconds) / self.target_clip_seconds,
+            1.0,
+        )
+
+        # Binary bag of words over the placement keywords only, transcription
+        # words that no placement asks for cannot add to the overlap
+        placement_words = [
+            set().union(*(_words(keyword) for keyword in placement.ad_keywords))
+            for placement in placements
+        ]
+        vocabulary = {
+            word: index
+            for index, word in enumerate(sorted(set().union(*placement_words)))
+        }
+        placement_matrix = _bag_of_words(placement_words, vocabulary)
+        clip_matrix = _bag_of_words(
+            [_words(clip.transcription or "") for clip in clips], vocabulary
+        )
+
+        keyword_counts = np.maximum(placement_matrix.sum(axis=1, keepdims=True), 1.0)
+        keyword_overlap = (placement_matrix @ clip_matrix.T) / keyword_counts
+
+        # Clip-only terms are combined first, then added to every row at once
+        matrix = keyword_overlap
+        matrix *= self.keyword_weight
+        matrix += (
+            self.score_weight * normalized + self.duration_weight * duration_fit
+        ).astype(np.float32)[np.newaxis, :]
+        feasible = (durations > 0) & (durations <= self.max_pod_seconds)
+        matrix[:, ~feasible] = -np.inf
+        return matrix
+
+    def assign(
+        self, placements: list[Placement], ads: list[AdSearchResult]
+    ) -> list[PlacementSchedule]:
+        """Build the per-placement ad schedule of a video.
+
+        Args:
+            placements: Ad placements of the video
+            ads: Ranked ads with their candidate clips
+
+        Returns:
+            One schedule per placement, in playback order. Placements left
+            without a fitting clip get an empty pod.
+        """
+        placements = sorted(placements, key=lambda p: p.timestamp)
+        clips = [clip for ad in ads for clip in ad.clips]
+        if not placements or not clips:
+            return [PlacementSchedule(placement=p) for p in placements]
+
+        ad_ids = [ad.id for ad in ads for _ in ad.clips]
+        _, clip_ads = np.unique(ad_ids, return_inverse=True)
+        durations = np.array([clip.end - clip.start for clip in clips])
+        # Masked in place: infeasible pairs are set to -inf as pods fill up
+        # and ads get used, so every round is a single argmax per placement
+        matrix = self.score_matrix(placements, clips)
+
+        pods: list[list[int]] = [[] for _ in placements]
+        pod_scores = np.zeros(len(placements))
+        remaining = np.full(len(placements), self.max_pod_seconds)
+        rows = np.arange(len(placements))
+
+        while True:
+            best = matrix.argmax(axis=1)
+            best_scores = matrix[rows, best]
+            candidates = np.flatnonzero(np.isfinite(best_scores))
+            if not candidates.size:
+                break
+
+            # Placements competing for the same ad: the highest score wins
+            order = candidates[np.argsort(-best_scores[candidates], kind="stable")]
+            _, first = np.unique(clip_ads[best[order]], return_index=True)
+
+            used_ads = np.zeros(clip_ads.max() + 1, dtype=bool)
+            for row in order[first]:
+                column = best[row]
+                pods[row].append(column)
+                pod_scores[row] += best_scores[row]
+                remaining[row] -= durations[column]
+                used_ads[clip_ads[column]] = True
+
+                if len(pods[row]) >= self.max_clips_per_pod:
+                    matrix[row] = -np.inf
+                else:
+                    # Pods only shrink, a clip that does not fit never will
+                    matrix[row, durations > remaining[row]] = -np.inf
+
+            matrix[:, used_ads[clip_ads]] = -np.inf
+
+        logger.info(
+            "Ad clips assigned to placements",
+            extra={
+                "placement_count": len(placements),
+                "clip_count": len(clips),
+                "assigned_clips": sum(len(pod) for pod in pods),
+            },
+        )
+
+        return [
+            PlacementSchedule(
+                placement=placement,
+                clips=[clips[column] for column in pod],
+                score=float(pod_scores[row]),
+            )
+            for row, (placement, pod) in enumerate(zip(placements, pods))
+        ]
@@ -0,0 +1,323 @@
+"""Local vector index of ad profiles for matching ads without remote search."""
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from aim.models.ads import AdClip, AdProfile, AdSearchResponse, AdSearchResult
+from aim.models.placement import Placement, PlacementResult
+from aim.services.frequency_cap import FrequencyCapper
+from aim.services.s3_service import S3Service
+from aim.services.twelve_labs_service import TwelveLabsService, TwelveLabsServiceError
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Similarity thresholds mapped to the confidence labels of the search API
+CONFIDENCE_THRESHOLDS = ((0.5, "high"), (0.3, "medium"), (0.0, "low"))
+
+
+def embed_terms(term_lists: list[list[str]], dim: int) -> np.ndarray:
+    """Embed lists of terms as L2-normalized hashed bags of words.
+
+    Every word and every multi-word term is hashed to one of dim buckets
+    with a hashed sign, so the same vocabulary always maps to the same
+    vector without keeping a vocabulary around.
+
+    Args:
+        term_lists: One list of terms per vector
+        dim: Vector dimension
+
+    Returns:
+        Matrix of shape (len(term_lists), dim)
+    """
+    vectors = np.zeros((len(term_lists), dim), dtype=np.float32)
+    for row, terms in enumerate(term_lists):
+        for term in terms:
+            words = WORD_PATTERN.findall(term.lower())
+            features = words + ([" ".join(words)] if len(words) > 1 else [])
+            for feature in features:
+                digest = zlib.crc32(feature.encode())
+                sign = 1.0 if digest & 1 else -1.0
+                vectors[row, (digest >> 1) % dim] += sign
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def profile_terms(profile: AdProfile) -> list[str]:
+    """Terms describing an ad profile."""
+    return [*profile.themes, *profile.tone, *profile.keywords]
+
+
+def placement_terms(placement: Placement) -> list[str]:
+    """Terms describing what a placement asks for."""
+    return [*placement.themes, *placement.ad_keywords]
+
+
+class AdProfileIndex:
+    """Matrix of ad profile vectors with the matching ad IDs.
+
+    Saved as plain .npy files and loaded memory-mapped, so every worker
+    shares the same pages and loading does not read the whole index.
+    Matching placements is a single matrix product.
+    """
+
+    def __init__(self, ids: np.ndarray, vectors: np.ndarray, durations: np.ndarray):
+        """Initialize ad profile index.
+
+        Args:
+            ids: Ad video IDs, one per row of vectors
+            vectors: L2-normalized profile vectors, shape (ads, dim)
+            durations: Ad durations in seconds, 0 when unknown
+        """
+        self.ids = ids
+        self.vectors = vectors
+        self.durations = durations
+
+    @property
+    def dim(self) -> int:
+        """Dimension of the profile vectors."""
+        return self.vectors.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, profiles: list[AdProfile], dim: int = 512) -> "AdProfileIndex":
+        """Build an index from ad profiles.
+
+        Args:
+            profiles: Ad profiles
+            dim: Vector dimension
+
+        Returns:
+            AdProfileIndex instance
+        """
+        return cls(
+            ids=np.array([profile.video_id for profile in profiles], dtype=str),
+            vectors=embed_terms([profile_terms(p) for p in profiles], dim),
+            durations=np.array(
+                [profile.duration or 0.0 for profile in profiles], dtype=np.float32
+            ),
+        )
+
+    def save(self, path: str, profiles: list[AdProfile] | None = None) -> None:
+        """Write the index to a directory, replacing any earlier index.
+
+        Every index is written to a new versioned directory next to path,
+        and path is a symlink swapped atomically to the new version, so
+        readers see either the old or the new index, never a mix or none.
+        The previous version is kept for readers still loading it, older
+        ones are removed.
+
+        Args:
+            path: Index directory
+            profiles: Profiles the index was built from, kept for inspection
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        version = Path(tempfile.mkdtemp(dir=target.parent, prefix=f".{target.name}-"))
+
+        np.save(version / "ids.npy", self.ids)
+        np.save(version / "vectors.npy", self.vectors)
+        np.save(version / "durations.npy", self.durations)
+        if profiles is not None:
+            with open(version / "profiles.jsonl", "w") as f:
+                for profile in profiles:
+                    f.write(profile.model_dump_json() + "\n")
+
+        previous = None
+        if target.is_symlink():
+            previous = os.path.basename(os.readlink(target))
+        elif target.exists():
+            # Index written before versioning, a directory cannot be
+            # replaced by a symlink, move it aside first
+            previous = f".{target.name}-unversioned"
+            shutil.rmtree(target.with_name(previous), ignore_errors=True)
+            os.replace(target, target.with_name(previous))
+
+        link = target.with_name(f".{target.name}.link")
+        link.unlink(missing_ok=True)
+        os.symlink(version.name, link)
+        os.replace(link, target)
+
+        for stale in target.parent.glob(f".{target.name}-*"):
+            if stale.name not in (version.name, previous):
+                shutil.rmtree(stale, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> "AdProfileIndex":
+        """Load an index written by save, memory-mapping the vectors.
+
+        Args:
+            path: Index directory
+
+        Returns:
+            AdProfileIndex instance
+
+        Raises:
+            FileNotFoundError: If there is no index at path
+        """
+        for attempt in range(2):
+            # Resolved once, so that every file comes from the same version
+            directory = Path(path).resolve(strict=True)
+            try:
+                return cls(
+                    ids=np.load(directory / "ids.npy"),
+                    vectors=np.load(directory / "vectors.npy", mmap_mode="r"),
+                    durations=np.load(directory / "durations.npy", mmap_mode="r"),
+                )
+            except FileNotFoundError:
+                # The version was removed by two saves in a row while it
+                # was loading, load the current one
+                if attempt == 1:
+                    raise
+
+    def match(
+        self,
+        placements: list[Placement],
+        top_k: int = 5,
+        min_score: float = 0.1,
+        limit: int | None = 10,
+    ) -> list[AdSearchResult]:
+        """Find the ads closest to a set of placements.
+
+        Each matching placement contributes one clip covering the whole ad,
+        scored on the 0-100 scale of the search API, so the results can be
+        ranked and scheduled like remote search results.
+
+        Args:
+            placements: Ad placements of the video
+            top_k: Ads kept per placement
+            min_score: Minimum cosine similarity of a match
+            limit: Maximum number of ads returned, None for every match
+
+        Returns:
+            Matched ads, best average score first
+        """
+        if not placements or not len(self):
+            return []
+
+        queries = embed_terms([placement_terms(p) for p in placements], self.dim)
+        similarities = queries @ self.vectors.T
+
+        k = min(top_k, len(self))
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+
+        results: dict[str, AdSearchResult] = {}
+        for row, columns in enumerate(top):
+            for column in columns:
+                similarity = float(similarities[row, column])
+                if similarity < min_score:
+                    continue
+                ad_id = str(self.ids[column])
+                confidence = next(
+                    label
+                    for threshold, label in CONFIDENCE_THRESHOLDS
+                    if similarity >= threshold
+                )
+                clip = AdClip(
+                    score=round(similarity * 100, 2),
+                    start=0.0,
+                    end=float(self.durations[column]),
+                    video_id=ad_id,
+                    confidence=confidence,
+                )
+                results.setdefault(ad_id, AdSearchResult(id=ad_id, clips=[]))
+                results[ad_id].clips.append(clip)
+
+        ranked = sorted(results.values(), key=lambda x: x.average_score, reverse=True)
+        return ranked[:limit]
+
+
+def build_ad_index(
+    twelve_labs_service: TwelveLabsService,
+    path: str,
+    dim: int = 512,
+    max_workers: int = 4,
+) -> AdProfileIndex:
+    """Profile every ad of the ads index and write the local index.
+
+    Ads that fail to be profiled are logged and left out.
+
+    Args:
+        twelve_labs_service: TwelveLabsService instance
+        path: Index directory
+        dim: Vector dimension
+        max_workers: Ads profiled concurrently
+
+    Returns:
+        The new index
+    """
+    videos = twelve_labs_service.list_ad_videos()
+    logger.info("Profiling ads", extra={"ad_count": len(videos)})
+
+    def profile(video: tuple[str, float | None]) -> AdProfile | None:
+        try:
+            return twelve_labs_service.profile_ad(*video)
+        except TwelveLabsServiceError:
+            logger.warning("Skipping ad", extra={"video_id": video[0]})
+            return None
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="ad-profile"
+    ) as executor:
+        profiles = [p for p in executor.map(profile, videos) if p is not None]
+
+    index = AdProfileIndex.build(profiles, dim)
+    index.save(path, profiles)
+    logger.info(
+        "Ad index written",
+        extra={
+            "path": path,
+            "ad_count": len(profiles),
+            "skipped": len(videos) - len(profiles),
+        },
+    )
+    return index
+
+
+def match_ads_locally(
+    video_id: str,
+    s3_service: S3Service,
+    placement_result: PlacementResult,
+    ad_profile_index: AdProfileIndex,
+    frequency_capper: FrequencyCapper | None = None,
+) -> AdSearchResponse:
+    """Match ads to the placements of a video with the local ad index.
+
+    Args:
+        video_id: ID of the video
+        s3_service: S3Service instance
+        placement_result: The placement analysis result for the video
+        ad_profile_index: AdProfileIndex instance
+        frequency_capper: FrequencyCapper instance, None when disabled
+
+    Returns:
+        AdSearchResponse with the matched ads, stored like agent results
+    """
+    logger.info(
+        "Matching ads with the local ad index",
+        extra={"video_id": video_id, "ad_count": len(ad_profile_index)},
+    )
+
+    # Capped ads are dropped before truncating so they do not take up slots
+    results = ad_profile_index.match(placement_result.placements, limit=None)
+    if frequency_capper is not None:
+        results = frequency_capper.filter(results, video_id)
+    results = results[:10]
+
+    ads_response = AdSearchResponse(results=results, query="local ad index")
+    s3_service.upload_json_file_background(
+        f"results/ads_search_{video_id}.json", ads_response.model_dump()
+    )
+    return ads_response
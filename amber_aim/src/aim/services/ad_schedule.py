@@ -0,0 +1,222 @@
+"""In-memory per-video ad schedules for playback time ad decisions."""
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from aim.models.ads import AdSearchResponse, AdSearchResult, PlacementSchedule
+from aim.models.placement import Placement, PlacementResult
+
+logger = logging.getLogger(__name__)
+
+
+class AdSchedule:
+    """Ads assigned to the placements of one video, sorted by timestamp.
+
+    Each placement serves the ads the assignment optimizer scheduled in its
+    pod, in play order. Placements without a schedule, or whose scheduled
+    ads are all capped, fall back to the ranked ads in playback order, so
+    the best ad plays first and ads only repeat once every ad has been
+    used.
+    """
+
+    def __init__(
+        self,
+        video_id: str,
+        placements: list[Placement],
+        ads: list[AdSearchResult],
+        schedule: list[PlacementSchedule] | None = None,
+    ):
+        """Initialize ad schedule.
+
+        Args:
+            video_id: ID of the video
+            placements: Ad placements of the video, in any order
+            ads: Candidate ads, best ranked first
+            schedule: Clips assigned to each placement by the assignment
+                optimizer, its placements replace placements when given
+                (default: ranked ads only)
+        """
+        self.video_id = video_id
+        if schedule is None:
+            schedule = [PlacementSchedule(placement=p) for p in placements]
+        schedule = sorted(schedule, key=lambda pod: pod.placement.timestamp)
+        self.placements = [pod.placement for pod in schedule]
+        self.timestamps = [placement.timestamp for placement in self.placements]
+        self.ads = ads
+        # Scheduled ads of each placement, aligned with placements
+        self.assigned = [self._pod_ads(pod) for pod in schedule]
+
+    @staticmethod
+    def _pod_ads(pod: PlacementSchedule) -> list[AdSearchResult]:
+        """Group the clips of a pod by ad, in play order."""
+        ads: dict[str, AdSearchResult] = {}
+        for clip in pod.clips:
+            ads.setdefault(clip.video_id, AdSearchResult(id=clip.video_id, clips=[]))
+            ads[clip.video_id].clips.append(clip)
+        return list(ads.values())
+
+    @classmethod
+    def from_results(
+        cls,
+        video_id: str,
+        placement_result: PlacementResult,
+        ads_response: AdSearchResponse | None,
+        schedule: list[PlacementSchedule] | None = None,
+    ) -> "AdSchedule":
+        """Build the schedule of a video from its stored analysis results.
+
+        Args:
+            video_id: ID of the video
+            placement_result: Placement analysis of the video
+            ads_response: Ranked ads suggested for the video, if any
+            schedule: Clips assigned to each placement by the assignment
+                optimizer, if any
+
+        Returns:
+            AdSchedule instance
+        """
+        return cls(
+            video_id,
+            placement_result.placements,
+            ads_response.results if ads_response else [],
+            schedule,
+        )
+
+    def next(
+        self, t: float, is_capped: Callable[[str], bool] | None = None
+    ) -> tuple[Placement, AdSearchResult | None] | None:
+        """Find the first placement at or after a playback time.
+
+        Args:
+            t: Playback time in seconds
+            is_capped: Called with an ad ID, returns True if the ad must not
+                be served
+
+        Returns:
+            Tuple of (placement, scheduled ad), or None if no placement is
+            left. The ad is None when there are no ads or all are capped.
+        """
+        index = bisect.bisect_left(self.timestamps, t)
+        if index == len(self.placements):
+            return None
+
+        placement = self.placements[index]
+        for ad in self.assigned[index]:
+            if is_capped is None or not is_capped(ad.id):
+                return placement, ad
+
+        # Nothing scheduled can be served, rotate through the ranked ads
+        for offset in range(len(self.ads)):
+            ad = self.ads[(index + offset) % len(self.ads)]
+            if is_capped is None or not is_capped(ad.id):
+                return placement, ad
+        return placement, None
+
+
+class AdScheduleCache:
+    """LRU cache of ad schedules, local to the worker process.
+
+    Entries expire after a TTL so results written by other workers are
+    picked up. Concurrent misses for the same video share a single load,
+    and videos without stored results are remembered for a shorter TTL so
+    repeated requests for them do not all go to S3.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 300.0, miss_ttl: float = 5.0):
+        """Initialize ad schedule cache.
+
+        Args:
+            max_size: Maximum number of cached schedules and misses
+            ttl: Seconds a schedule is served before being reloaded
+            miss_ttl: Seconds a video without stored results is remembered
+                before it is loaded again
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        # None schedules are cached misses
+        self._entries: OrderedDict[str, tuple[AdSchedule | None, float]] = OrderedDict()
+        self._loading: dict[str, asyncio.Future[AdSchedule | None]] = {}
+
+    def _lookup(self, video_id: str) -> tuple[bool, AdSchedule | None]:
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None:
+                return False, None
+            schedule, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[video_id]
+                return False, None
+            self._entries.move_to_end(video_id)
+            return True, schedule
+
+    def _store(self, video_id: str, schedule: AdSchedule | None, ttl: float) -> None:
+        with self._lock:
+            self._entries[video_id] = (schedule, time.monotonic() + ttl)
+            self._entries.move_to_end(video_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, video_id: str) -> AdSchedule | None:
+        """Return the cached schedule of a video, None if missing or expired."""
+        return self._lookup(video_id)[1]
+
+    def put(self, schedule: AdSchedule) -> None:
+        """Cache a schedule, evicting the least recently used one if full."""
+        self._store(schedule.video_id, schedule, self.ttl)
+
+    def invalidate(self, video_id: str) -> None:
+        """Drop the cached schedule of a video."""
+        with self._lock:
+            self._entries.pop(video_id, None)
+
+    async def get_or_load(
+        self,
+        video_id: str,
+        load: Callable[[], Awaitable[AdSchedule | None]],
+    ) -> AdSchedule | None:
+        """Return the cached schedule of a video, loading it on a miss.
+
+        Args:
+            video_id: ID of the video
+            load: Coroutine function building the schedule, returning None
+                when the video has no stored results
+
+        Returns:
+            The schedule, or None if the video has no stored results
+        """
+        cached, schedule = self._lookup(video_id)
+        if cached:
+            return schedule
+
+        # Only called from the event loop, no lock needed for _loading
+        loading = self._loading.get(video_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[video_id] = loading
+        try:
+            schedule = await load()
+            if schedule is not None:
+                self.put(schedule)
+            else:
+                self._store(video_id, None, self.miss_ttl)
+            loading.set_result(schedule)
+            return schedule
+        except asyncio.CancelledError:
+            loading.cancel()
+            raise
+        except Exception as e:
+            loading.set_exception(e)
+            # Waiters re-raise the error, nobody else retrieves it
+            loading.exception()
+            raise
+        finally:
+            del self._loading[video_id]
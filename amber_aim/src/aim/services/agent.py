@@ -1,19 +1,63 @@
+import asyncio
 import json
 import logging
+import os
+import time
 from collections.abc import Callable
-
-from agents import Agent, Runner, function_tool
-from openai import OpenAI, api_key
-
+from typing import Any
+
+from agents import (
+    Agent,
+    MaxTurnsExceeded,
+    OpenAIProvider,
+    RunConfig,
+    RunContextWrapper,
+    RunHooks,
+    Runner,
+    function_tool,
+)
+from agents.items import ModelResponse
+from openai import AsyncOpenAI, OpenAI, api_key
+
+from aim.deadline import Deadline
+from aim.metrics import track
 from aim.models.ads import AdSearchResponse, AdSearchResult
-from aim.models.placement import PlacementResult
+from aim.models.placement import PlacementAnalysis, PlacementResult
+from aim.services.cassette import Cassette
+from aim.services.rate_limit import RateLimiter
 from aim.services.s3_service import S3Service
+from aim.usage import current_collector
 
 logger = logging.getLogger(__name__)
 
 
-def find_placements(prompt: str) -> PlacementResult:
-    schema_str = json.dumps(PlacementResult.model_json_schema(), indent=2)
+def openai_client(
+    client_class: type[OpenAI] | type[AsyncOpenAI],
+    cassette: Cassette | None = None,
+    **kwargs: Any,
+) -> Any:
+    """Create an OpenAI client, recording or replaying through a cassette.
+
+    Args:
+        client_class: OpenAI or AsyncOpenAI
+        cassette: Cassette wrapping the client (default: live calls)
+        **kwargs: Client options such as timeout
+
+    Returns:
+        The client, or its cassette proxy
+    """
+    if cassette is None:
+        return client_class(**kwargs)
+    if cassette.replaying:
+        # Replays never reach the API, any key will do
+        kwargs.setdefault("api_key", os.environ.get("OPENAI_API_KEY", "replay"))
+    return cassette.wrap(client_class(**kwargs), "openai")
+
+
+def find_placements(
+    prompt: str, timeout: float | None = None, cassette: Cassette | None = None
+) -> PlacementResult:
+    schema_str = json.dumps(PlacementAnalysis.model_json_schema(), indent=2)
 
     with open(
         "/Users/leo/workspace/ny_twelvelabs_hackathon/amber_aim/prompts/agents/placements_agent.txt"
@@ -22,37 +66,150 @@ def find_placements(prompt: str) -> PlacementResult:
 
     placements_agent_prompt = placements_agent_prompt.format(schema_str=schema_str)
 
-    client = OpenAI()
+    client = openai_client(
+        OpenAI, cassette, **({"timeout": timeout} if timeout is not None else {})
+    )
 
     logger.info("Running OpenAI analysis")
-    response = client.beta.chat.completions.parse(
-        model="gpt-5-mini",
-        messages=[
-            {"role": "system", "content": placements_agent_prompt},
-            {"role": "user", "content": prompt},
-        ],
-        response_format=PlacementResult,
-    )
+    with track("openai.placements") as stage:
+        response = client.beta.chat.completions.parse(
+            model="gpt-5-mini",
+            messages=[
+                {"role": "system", "content": placements_agent_prompt},
+                {"role": "user", "content": prompt},
+            ],
+            response_format=PlacementAnalysis,
+        )
+        if response.usage is not None:
+            stage.add_usage(
+                input_tokens=response.usage.prompt_tokens,
+                output_tokens=response.usage.completion_tokens,
+            )
 
     result = response.choices[0].message.parsed
     if result is None:
         raise ValueError("Failed to parse OpenAI response into PlacementResult")
 
     # Parse the output as PlacementResult
-    return result
+    return PlacementResult.model_validate(result.model_dump())
+
+
+class UsageHooks(RunHooks):
+    """Account every model call of an agent run to the usage ledger.
+
+    Calls are accounted as they finish, so runs cut short by the deadline
+    or the turn limit still report the turns they took.
+    """
+
+    def __init__(self) -> None:
+        """Initialize usage hooks."""
+        self._started = 0.0
+
+    async def on_llm_start(
+        self,
+        context: RunContextWrapper[Any],
+        agent: Agent[Any],
+        system_prompt: str | None,
+        input_items: list[Any],
+    ) -> None:
+        """Start timing a model call.
+
+        Args:
+            context: Context of the agent run
+            agent: Agent making the call
+            system_prompt: System prompt sent to the model
+            input_items: Input items sent to the model
+        """
+        self._started = time.perf_counter()
+
+    async def on_llm_end(
+        self,
+        context: RunContextWrapper[Any],
+        agent: Agent[Any],
+        response: ModelResponse,
+    ) -> None:
+        """Account a finished model call to the request usage collector.
+
+        Args:
+            context: Context of the agent run
+            agent: Agent that made the call
+            response: Model response with the token usage of the call
+        """
+        collector = current_collector()
+        if collector is not None:
+            collector.add(
+                "openai.agent",
+                calls=1,
+                wall_time=time.perf_counter() - self._started,
+                input_tokens=response.usage.input_tokens,
+                output_tokens=response.usage.output_tokens,
+            )
+
+
+def rank_ad_results(
+    search_results: list[AdSearchResult],
+    is_capped: Callable[[str], bool] | None = None,
+) -> list[AdSearchResult]:
+    """Merge search results by video ID and rank them by average clip score.
+
+    Args:
+        search_results: Results collected across all searches
+        is_capped: Called with an ad ID, returns True if the ad must be
+            skipped
+
+    Returns:
+        The top 10 results, best first
+    """
+    # Deduplicate results by video ID and merge clips
+    unique_results: dict[str, AdSearchResult] = {}
+    for search_result in search_results:
+        if search_result.id not in unique_results:
+            unique_results[search_result.id] = search_result.model_copy(deep=True)
+        else:
+            # Merge clips if the same video appears multiple times
+            unique_results[search_result.id].clips.extend(search_result.clips)
+
+    # Sort by average score
+    sorted_results = sorted(
+        (
+            result
+            for result in unique_results.values()
+            if is_capped is None or not is_capped(result.id)
+        ),
+        key=lambda x: x.average_score,
+        reverse=True,
+    )
+
+    return sorted_results[:10]  # Return top 10 results
 
 
 async def find_best_ads(
     video_id: str,
     s3_service: S3Service,
     placement_result: PlacementResult,
-    search_ads_callback: Callable[[str], list[AdSearchResult]],
+    search_ads_callback: Callable[..., list[AdSearchResult]],
+    deadline: Deadline | None = None,
+    max_turns: int = 10,
+    is_capped: Callable[[str], bool] | None = None,
+    rate_limiter: RateLimiter | None = None,
+    cassette: Cassette | None = None,
 ) -> AdSearchResponse:
     """Get ads suggestions using an AI agent with search capabilities.
 
+    When the deadline expires or the agent runs out of turns, the results
+    found so far are ranked and returned with partial set.
+
     Args:
         placement_result: The placement analysis result for the video
-        search_ads_callback: Callback function to search for ads
+        search_ads_callback: Callback function to search for ads, called with
+            the query text and a timeout keyword argument
+        deadline: Overall time budget for the agent run and its searches
+        max_turns: Maximum number of agent turns
+        is_capped: Called with an ad ID, returns True if the ad must be
+            left out of the results
+        rate_limiter: Limits the agent runs, one token per run
+        cassette: Records or replays the model calls of the agent run
+            (default: live calls)
 
     Returns:
         AdSearchResponse containing search results
@@ -62,7 +219,7 @@ async def find_best_ads(
     all_queries: list[str] = []
 
     @function_tool
-    def search_ads(query_text: str) -> str:
+    async def search_ads(query_text: str) -> str:
         """Search for relevant ads based on a query text.
 
         This tool searches the TwelveLabs ads index for advertisements
@@ -77,9 +234,18 @@ async def find_best_ads(
             A summary of the search results including video IDs and scores
         """
         logger.info(f"Agent searching for ads with query: {query_text}")
+        if deadline is not None and deadline.expired:
+            return "Time budget exhausted, stop searching and finish now."
+
         all_queries.append(query_text)
 
-        results = search_ads_callback(query_text)
+        # Searches block, run them off the event loop so the deadline holds
+        timeout = deadline.remaining() if deadline is not None else None
+        with track("agent.tool.search_ads"):
+            results = await asyncio.wait_for(
+                asyncio.to_thread(search_ads_callback, query_text, timeout=timeout),
+                timeout=timeout,
+            )
         all_search_results.extend(results)
 
         # Return a summary for the agent to understand
@@ -148,36 +314,57 @@ Based on this video analysis, please search for relevant ads using the search_ad
         tools=[search_ads],
     )
 
+    run_config = (
+        RunConfig(
+            model_provider=OpenAIProvider(
+                openai_client=openai_client(AsyncOpenAI, cassette)
+            ),
+            # Traces are uploaded to OpenAI, which replays must not depend on
+            tracing_disabled=cassette.replaying,
+        )
+        if cassette is not None
+        else None
+    )
+
     logger.info("Running ads search agent")
-    result = await Runner.run(agent, prompt)
+    partial = False
+    try:
+        if rate_limiter is not None:
+            await asyncio.to_thread(rate_limiter.acquire)
+        with track("agent.run"):
+            await asyncio.wait_for(
+                Runner.run(
+                    agent,
+                    prompt,
+                    max_turns=max_turns,
+                    hooks=UsageHooks(),
+                    run_config=run_config,
+                ),
+                timeout=deadline.remaining() if deadline is not None else None,
+            )
+    except (TimeoutError, MaxTurnsExceeded) as e:
+        logger.warning(
+            "Ads search agent stopped early, returning partial results",
+            extra={"video_id": video_id, "reason": type(e).__name__},
+        )
+        partial = True
 
     logger.info(
         f"Agent completed with {len(all_search_results)} total results from {len(all_queries)} queries",
         extra={"queries": all_queries},
     )
 
-    # Deduplicate results by video ID and merge clips
-    unique_results: dict[str, AdSearchResult] = {}
-    for search_result in all_search_results:
-        if search_result.id not in unique_results:
-            unique_results[search_result.id] = search_result
-        else:
-            # Merge clips if the same video appears multiple times
-            unique_results[search_result.id].clips.extend(search_result.clips)
-
-    # Sort by average score
-    sorted_results = sorted(
-        unique_results.values(), key=lambda x: x.average_score, reverse=True
-    )
-
     results = AdSearchResponse(
-        results=sorted_results[:10],  # Return top 10 results
+        results=rank_ad_results(list(all_search_results), is_capped),
         query="; ".join(all_queries),
+        partial=partial,
     )
 
-    s3_service.upload_json_file(
-        f"results/ads_search_{video_id}.json",
-        results.model_dump(),
-    )
+    # Partial results must not replace a complete earlier search
+    if not partial:
+        s3_service.upload_json_file_background(
+            f"results/ads_search_{video_id}.json",
+            results.model_dump(),
+        )
 
     return results
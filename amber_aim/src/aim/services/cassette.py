@@ -0,0 +1,540 @@
+"""Record and replay of external API calls for offline runs.
+
+A Cassette wraps an API client (the TwelveLabs SDK, the OpenAI clients or
+the boto3 S3 client) in a proxy. In record mode calls go through to the
+real client and their responses, errors and latencies are appended to
+JSONL files. In replay mode the responses are served from those files,
+rebuilt as the original SDK types, after an injected latency drawn from a
+configurable distribution, so production workloads can be reproduced
+without network access.
+"""
+
+import asyncio
+import base64
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Arguments that change between runs of the same workload and do not
+# identify a call, such as the per-run prompt cache key of agent runs and
+# the timeouts derived from the time left before a request deadline
+VOLATILE_KWARGS = frozenset(
+    {"prompt_cache_key", "extra_headers", "request_options", "timeout"}
+)
+
+# Types returned as-is by the proxy instead of being wrapped
+PLAIN_TYPES = (str, bytes, int, float, bool, type(None), dict, list, tuple, set)
+
+
+class CassetteMissError(LookupError):
+    """Raised in strict replay when a call was never recorded."""
+
+
+def _import(path: str) -> Any:
+    module, _, name = path.rpartition(".")
+    return getattr(importlib.import_module(module), name)
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _canonical(value: Any) -> Any:
+    """JSON fallback for request arguments, stable across processes."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha1(value).hexdigest()
+    if isinstance(value, (set, frozenset)):
+        return sorted(map(str, value))
+    # Files, sentinels and clients: only their type is stable
+    return f"<{type(value).__name__}>"
+
+
+def request_key(operation: str, args: tuple, kwargs: dict[str, Any]) -> str:
+    """Hash identifying a call by its operation and arguments."""
+    kwargs = {k: v for k, v in kwargs.items() if k not in VOLATILE_KWARGS}
+    payload = json.dumps([operation, args, kwargs], sort_keys=True, default=_canonical)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def encode(value: Any) -> Any:
+    """Encode an SDK response as JSON, keeping enough to rebuild its type."""
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, BaseModel):
+        # Encoded field by field, so nested models keep their exact class
+        # even under generic or Any fields, such as parsed OpenAI outputs
+        cls = type(value)
+        metadata = getattr(cls, "__pydantic_generic_metadata__", None)
+        if metadata and metadata.get("origin") is not None:
+            cls = metadata["origin"]
+        fields = {
+            name: getattr(value, name)
+            for name in type(value).model_fields
+            if name in value.model_fields_set
+        }
+        fields.update(value.model_extra or {})
+        return {
+            "__type__": "model",
+            "class": _class_path(cls),
+            "fields": {name: encode(field) for name, field in fields.items()},
+        }
+    if isinstance(value, (bytes, bytearray)):
+        return {"__type__": "bytes", "data": base64.b64encode(value).decode()}
+    if isinstance(value, datetime):
+        return {"__type__": "datetime", "value": value.isoformat()}
+    if hasattr(value, "read") and callable(value.read):
+        # botocore StreamingBody, read once here and served again on replay
+        return {"__type__": "stream", "data": base64.b64encode(value.read()).decode()}
+    if isinstance(value, dict):
+        return {"__type__": "dict", "items": {k: encode(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    return str(value)
+
+
+def decode(value: Any) -> Any:
+    """Rebuild a response encoded by encode."""
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    kind = value["__type__"]
+    if kind == "model":
+        fields = {name: decode(field) for name, field in value["fields"].items()}
+        return _import(value["class"]).model_construct(**fields)
+    if kind == "bytes":
+        return base64.b64decode(value["data"])
+    if kind == "datetime":
+        return datetime.fromisoformat(value["value"])
+    if kind == "stream":
+        from botocore.response import StreamingBody
+
+        data = base64.b64decode(value["data"])
+        return StreamingBody(io.BytesIO(data), len(data))
+    return {k: decode(v) for k, v in value["items"].items()}
+
+
+def encode_error(error: BaseException) -> dict[str, Any]:
+    """Encode an exception raised by a client."""
+    encoded: dict[str, Any] = {
+        "class": _class_path(type(error)),
+        "message": str(error),
+    }
+    # botocore ClientError carries the parsed error response
+    if hasattr(error, "response") and hasattr(error, "operation_name"):
+        encoded["response"] = encode(error.response)
+        encoded["operation_name"] = error.operation_name
+    return encoded
+
+
+def decode_error(encoded: dict[str, Any]) -> BaseException:
+    """Rebuild an exception encoded by encode_error."""
+    try:
+        cls = _import(encoded["class"])
+        if "response" in encoded:
+            return cls(decode(encoded["response"]), encoded["operation_name"])
+        return cls(encoded["message"])
+    except Exception:
+        # Exceptions whose constructor takes other arguments
+        return RuntimeError(f"{encoded['class']}: {encoded['message']}")
+
+
+def is_async(method: Callable[..., Any]) -> bool:
+    """Whether a client method is async, looking through its decorators."""
+    return inspect.iscoroutinefunction(inspect.unwrap(method))
+
+
+def is_pager(value: Any) -> bool:
+    """Whether value is a TwelveLabs SDK pager."""
+    return all(hasattr(value, name) for name in ("has_next", "items", "get_next"))
+
+
+class LatencyModel:
+    """Distribution of the latency injected before a replayed response.
+
+    Specs are "recorded" (the latency measured when recording), "none",
+    "fixed:SECONDS", "uniform:LOW,HIGH" or "lognormal:MEDIAN,SIGMA".
+    """
+
+    def __init__(self, spec: str = "recorded"):
+        """Initialize latency model.
+
+        Args:
+            spec: Distribution spec
+
+        Raises:
+            ValueError: If the spec is not recognized
+        """
+        name, _, params = spec.partition(":")
+        self.name = name
+        self.params = [float(p) for p in params.split(",")] if params else []
+        expected = {"recorded": 0, "none": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+        if expected.get(name) != len(self.params):
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self, recorded: float, rng: random.Random) -> float:
+        """Draw a latency in seconds.
+
+        Args:
+            recorded: Latency measured when the call was recorded
+            rng: Random generator of the call
+
+        Returns:
+            Latency in seconds
+        """
+        if self.name == "recorded":
+            return recorded
+        if self.name == "none":
+            return 0.0
+        if self.name == "fixed":
+            return self.params[0]
+        if self.name == "uniform":
+            return rng.uniform(*self.params)
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma)
+
+
+class Cassette:
+    """Recorded API calls, keyed by operation and arguments.
+
+    Calls with the same key are replayed in recording order, the last one
+    repeating. In non-strict replay a call that was never recorded, for
+    example an analyze request with an edited prompt, is served from the
+    recordings of the same operation instead, which keeps timing realistic
+    when only the request content changed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: Literal["record", "replay"],
+        latency: dict[str, str] | None = None,
+        seed: int = 0,
+        strict: bool = False,
+    ):
+        """Initialize cassette.
+
+        Args:
+            path: Directory of the cassette files, one JSONL file per client
+            mode: "record" to capture calls, "replay" to serve them
+            latency: Latency specs by operation prefix, such as
+                "twelvelabs.analyze" or "s3", the longest matching prefix
+                wins (default: recorded latencies)
+            seed: Seed of the injected latencies, the same seed and calls
+                give the same latencies
+            strict: Raise CassetteMissError for calls never recorded
+        """
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = {
+            prefix: LatencyModel(spec) for prefix, spec in (latency or {}).items()
+        }
+        self.seed = seed
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self._by_operation: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self._cursors: dict[str, int] = defaultdict(int)
+
+        if mode == "replay":
+            self._load()
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        """Whether responses are served from the cassette."""
+        return self.mode == "replay"
+
+    def _load(self) -> None:
+        for file in sorted(self.path.glob("*.jsonl")):
+            with open(file) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+                    self._by_operation[entry["operation"]].append(entry)
+        logger.info(
+            "Cassette loaded",
+            extra={
+                "path": str(self.path),
+                "entry_count": sum(len(e) for e in self._entries.values()),
+            },
+        )
+
+    def wrap(self, target: Any, namespace: str) -> Any:
+        """Wrap a client so its calls are recorded or replayed.
+
+        Args:
+            target: API client
+            namespace: Name of the client, prefix of its operation names and
+                name of its cassette file
+
+        Returns:
+            Proxy of the client
+        """
+        return CassetteProxy(self, target, namespace, namespace)
+
+    def _write(self, namespace: str, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry) + "\n"
+        with self._lock, open(self.path / f"{namespace}.jsonl", "a") as f:
+            f.write(line)
+
+    def _next_entry(self, operation: str, key: str) -> tuple[dict[str, Any], int]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                if self.strict or not self._by_operation.get(operation):
+                    raise CassetteMissError(
+                        f"No recorded call for {operation} with key {key}"
+                    )
+                logger.debug(
+                    "Call not recorded, replaying same operation",
+                    extra={"operation": operation},
+                )
+                entries, key = self._by_operation[operation], operation
+
+            index = self._cursors[key]
+            self._cursors[key] += 1
+        return entries[min(index, len(entries) - 1)], index
+
+    def _latency(self, operation: str, call_id: str, recorded: float) -> float:
+        prefixes = [p for p in self.latency if operation.startswith(p)]
+        if not prefixes:
+            return recorded
+        # Seeded per call, independent of the order concurrent calls run in
+        rng = random.Random(f"{self.seed}:{call_id}")
+        return self.latency[max(prefixes, key=len)].sample(recorded, rng)
+
+    def _build_pager(
+        self, pages: list[dict[str, Any]], latency: Callable[[int, float], float]
+    ) -> Any:
+        """Rebuild a recorded chain of pages as SDK pagers."""
+        from twelvelabs.core.pagination import SyncPager
+
+        def page(number: int) -> SyncPager:
+            recorded = pages[number]
+            has_next = recorded["has_next"] and number + 1 < len(pages)
+
+            def get_next() -> SyncPager:
+                delay = latency(number + 1, pages[number + 1]["latency"])
+                if delay > 0:
+                    time.sleep(delay)
+                return page(number + 1)
+
+            return SyncPager(
+                get_next=get_next if has_next else None,
+                has_next=has_next,
+                items=decode(recorded["items"]),
+                response=None,
+            )
+
+        return page(0)
+
+    def _record_pager(self, pager: Any) -> list[dict[str, Any]]:
+        """Fetch every page of a live pager, timing each page request."""
+        pages = [{"items": encode(pager.items or []), "has_next": pager.has_next}]
+        pages[0]["latency"] = 0.0
+        while pager is not None and pager.has_next:
+            started = time.monotonic()
+            pager = pager.next_page()
+            if pager is None:
+                break
+            pages.append(
+                {
+                    "items": encode(pager.items or []),
+                    "has_next": pager.has_next,
+                    "latency": time.monotonic() - started,
+                }
+            )
+        return pages
+
+    def _finish_record(
+        self,
+        namespace: str,
+        operation: str,
+        key: str,
+        request: Any,
+        started: float,
+        result: Any = None,
+        error: BaseException | None = None,
+    ) -> Any:
+        entry: dict[str, Any] = {
+            "operation": operation,
+            "key": key,
+            "request": request,
+            "latency": time.monotonic() - started,
+        }
+        if error is not None:
+            entry["error"] = encode_error(error)
+        elif is_pager(result):
+            # Pages are fetched eagerly so the whole chain can be replayed
+            entry["pages"] = self._record_pager(result)
+            result = self._build_pager(entry["pages"], lambda number, _: 0.0)
+        else:
+            entry["response"] = encode(result)
+            # Encoding consumes response streams, hand out the rebuilt response
+            # so recording behaves like the replay will
+            result = decode(entry["response"])
+        self._write(namespace, entry)
+        return result
+
+    def _replay(self, operation: str, key: str) -> tuple[float, Callable[[], Any]]:
+        """Look up a call, returning its latency and a result factory."""
+        entry, index = self._next_entry(operation, key)
+        call_id = f"{key}:{index}"
+        delay = self._latency(operation, call_id, entry["latency"])
+
+        def result() -> Any:
+            if "error" in entry:
+                raise decode_error(entry["error"])
+            if "pages" in entry:
+                return self._build_pager(
+                    entry["pages"],
+                    lambda number, recorded: self._latency(
+                        operation, f"{call_id}:page{number}", recorded
+                    ),
+                )
+            return decode(entry["response"])
+
+        return delay, result
+
+    def call(
+        self,
+        namespace: str,
+        operation: str,
+        method: Callable[..., Any],
+        args: tuple,
+        kwargs: dict[str, Any],
+    ) -> Any:
+        """Record or replay one call of a wrapped client method.
+
+        Args:
+            namespace: Name of the client
+            operation: Dotted name of the method, prefixed by the namespace
+            method: Real client method
+            args: Positional arguments of the call
+            kwargs: Keyword arguments of the call
+
+        Returns:
+            The response, or an awaitable of it for async methods
+        """
+        key = request_key(operation, args, kwargs)
+        request = json.loads(
+            json.dumps({"args": args, "kwargs": kwargs}, default=_canonical)
+        )
+
+        if is_async(method):
+            return self._call_async(
+                namespace, operation, method, args, kwargs, key, request
+            )
+
+        if self.replaying:
+            delay, result = self._replay(operation, key)
+            if delay > 0:
+                time.sleep(delay)
+            return result()
+
+        started = time.monotonic()
+        try:
+            result = method(*args, **kwargs)
+        except Exception as e:
+            self._finish_record(namespace, operation, key, request, started, error=e)
+            raise
+        return self._finish_record(
+            namespace, operation, key, request, started, result=result
+        )
+
+    async def _call_async(
+        self,
+        namespace: str,
+        operation: str,
+        method: Callable[..., Any],
+        args: tuple,
+        kwargs: dict[str, Any],
+        key: str,
+        request: Any,
+    ) -> Any:
+        if self.replaying:
+            delay, result = self._replay(operation, key)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return result()
+
+        started = time.monotonic()
+        try:
+            result = await method(*args, **kwargs)
+        except Exception as e:
+            self._finish_record(namespace, operation, key, request, started, error=e)
+            raise
+        return self._finish_record(
+            namespace, operation, key, request, started, result=result
+        )
+
+
+class CassetteProxy:
+    """Proxy of a client, or one of its resources, routing calls to a cassette."""
+
+    def __init__(self, cassette: Cassette, target: Any, namespace: str, path: str):
+        """Initialize cassette proxy.
+
+        Args:
+            cassette: Cassette recording or replaying the calls
+            target: Wrapped client or resource
+            namespace: Name of the client
+            path: Dotted path of target from the client
+        """
+        self._cassette = cassette
+        self._target = target
+        self._namespace = namespace
+        self._path = path
+        self._package = type(target).__module__.split(".")[0]
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._target, name)
+        path = f"{self._path}.{name}"
+
+        if inspect.ismethod(value) or inspect.isfunction(value):
+
+            def method(*args: Any, **kwargs: Any) -> Any:
+                return self._cassette.call(self._namespace, path, value, args, kwargs)
+
+            if is_async(value):
+
+                async def async_method(*args: Any, **kwargs: Any) -> Any:
+                    return await self._cassette.call(
+                        self._namespace, path, value, args, kwargs
+                    )
+
+                return async_method
+            return method
+
+        # Resources of the SDK, such as client.tasks or client.chat.completions
+        if not isinstance(value, PLAIN_TYPES) and (
+            type(value).__module__.split(".")[0] == self._package
+        ):
+            return CassetteProxy(self._cassette, value, self._namespace, path)
+        return value
+
+    def __repr__(self) -> str:
+        return f"CassetteProxy({self._path}, {self._cassette.mode})"
@@ -0,0 +1,134 @@
+"""Content-hash index for deduplicating video uploads."""
+
+import logging
+
+from aim.models.upload import UploadDedupEntry
+from aim.services.s3_service import S3Service
+
+logger = logging.getLogger(__name__)
+
+
+class DedupIndex:
+    """Index mapping file content to the artifacts of an earlier upload.
+
+    Entries are small JSON objects in S3, shared by every worker and kept
+    across deployments. The hash announced for an upload is kept under the
+    uploaded file path, and the entry of the content is only stored under
+    its hash once the uploaded file was checked against it, so content
+    uploaded under a wrong hash is never handed out as a duplicate. The
+    TwelveLabs video ID is attached to the entry once the file is indexed.
+    """
+
+    def __init__(self, s3_service: S3Service, prefix: str = "dedup"):
+        """Initialize dedup index.
+
+        Args:
+            s3_service: S3Service instance
+            prefix: S3 key prefix of the index objects
+        """
+        self.s3_service = s3_service
+        self.prefix = prefix
+
+    def _entry_key(self, content_sha256: str, content_size: int) -> str:
+        return f"{self.prefix}/sha256/{content_sha256}_{content_size}.json"
+
+    def _path_key(self, s3_path: str) -> str:
+        return f"{self.prefix}/path/{s3_path}.json"
+
+    def lookup(self, content_sha256: str, content_size: int) -> UploadDedupEntry | None:
+        """Find an earlier upload of the same content whose file still exists.
+
+        Args:
+            content_sha256: Hex SHA-256 digest of the file content
+            content_size: File size in bytes
+
+        Returns:
+            The dedup entry, or None if the content was never uploaded
+        """
+        data = self.s3_service.download_json_file(
+            self._entry_key(content_sha256, content_size)
+        )
+        if data is None:
+            return None
+
+        entry = UploadDedupEntry.model_validate(data)
+        # The file may have been deleted since it was verified
+        if entry.video_id is None and not self.s3_service.object_exists(entry.s3_path):
+            return None
+        return entry
+
+    def record_upload(
+        self, content_sha256: str, content_size: int, s3_path: str
+    ) -> None:
+        """Register the content hash announced for an upload.
+
+        The content is not deduplicated against before verify_upload has
+        checked the uploaded file.
+
+        Args:
+            content_sha256: Hex SHA-256 digest of the file content
+            content_size: File size in bytes
+            s3_path: S3 object key the file is uploaded to
+        """
+        self.s3_service.upload_json_file_background(
+            self._path_key(s3_path),
+            {"content_sha256": content_sha256, "content_size": content_size},
+        )
+
+    def verify_upload(self, s3_path: str) -> UploadDedupEntry | None:
+        """Check an uploaded file against its announced hash.
+
+        The SHA-256 checksum S3 verified on upload must match the announced
+        hash. The first file verified for a content becomes its entry.
+
+        Args:
+            s3_path: S3 object key of the uploaded file
+
+        Returns:
+            The dedup entry of the content, or None if the file was uploaded
+            without a hash or does not match it
+        """
+        pointer = self.s3_service.download_json_file(self._path_key(s3_path))
+        if pointer is None:
+            return None
+        content_sha256 = pointer["content_sha256"]
+        content_size = pointer["content_size"]
+        entry_key = self._entry_key(content_sha256, content_size)
+
+        data = self.s3_service.download_json_file(entry_key)
+        entry = UploadDedupEntry.model_validate(data) if data else None
+        if entry is not None and entry.s3_path == s3_path:
+            return entry
+
+        if self.s3_service.object_sha256(s3_path) != content_sha256:
+            logger.warning(
+                "Uploaded file does not match its content hash",
+                extra={"s3_path": s3_path},
+            )
+            return None
+
+        if entry is None:
+            entry = UploadDedupEntry(
+                content_sha256=content_sha256,
+                content_size=content_size,
+                s3_path=s3_path,
+            )
+            self.s3_service.upload_json_file_background(entry_key, entry.model_dump())
+        return entry
+
+    def record_video(self, entry: UploadDedupEntry, video_id: str) -> None:
+        """Attach the TwelveLabs video ID to the entry of an uploaded file.
+
+        Args:
+            entry: Dedup entry returned by verify_upload for the file
+            video_id: TwelveLabs video ID the file was indexed as
+        """
+        entry = entry.model_copy(update={"video_id": video_id})
+        self.s3_service.upload_json_file_background(
+            self._entry_key(entry.content_sha256, entry.content_size),
+            entry.model_dump(),
+        )
+        logger.info(
+            "Dedup entry linked to video",
+            extra={"s3_path": entry.s3_path, "video_id": video_id},
+        )
@@ -0,0 +1,207 @@
+"""Frequency capping and pacing of ad impressions."""
+
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from aim.models.ads import AdSearchResult
+
+logger = logging.getLogger(__name__)
+
+
+class _Shard:
+    """Counters of a subset of keys, guarded by their own lock."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Totals read back from the durable store, shared by every worker
+        self.durable: dict[tuple[str, int], int] = {}
+        # Impressions recorded since the last flush, local to this worker
+        self.pending: dict[tuple[str, int], int] = {}
+
+
+class FrequencyCapper:
+    """Impression counters per ad and per ad and video, by time window.
+
+    Ads reaching the pacing limit within a window are capped everywhere,
+    ads reaching the per-video limit only on that video. Counters live in
+    memory, split across shards so concurrent requests rarely contend, and
+    a background thread flushes them to a local SQLite file shared by the
+    workers. Decisions never wait on the file, so impressions from other
+    workers are seen up to one flush interval late.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        window: float = 3600.0,
+        max_impressions_per_video: int = 2,
+        max_impressions_per_ad: int = 1000,
+        flush_interval: float = 5.0,
+        shards: int = 16,
+    ):
+        """Initialize frequency capper.
+
+        Args:
+            path: Path of the database file, created if missing
+            window: Length in seconds of the counting window
+            max_impressions_per_video: Impressions of an ad per video and
+                window, 0 for no limit
+            max_impressions_per_ad: Impressions of an ad per window across
+                all videos, 0 for no limit
+            flush_interval: Seconds between flushes to the database file
+            shards: Number of counter shards
+        """
+        self.path = path
+        self.window = window
+        self.max_impressions_per_video = max_impressions_per_video
+        self.max_impressions_per_ad = max_impressions_per_ad
+        self.flush_interval = flush_interval
+
+        self._shards = [_Shard() for _ in range(shards)]
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Used by the flush thread only, and by flush() calls serialized by
+        # the flush lock
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS impressions ("
+            "key TEXT NOT NULL, window INTEGER NOT NULL, count INTEGER NOT NULL, "
+            "PRIMARY KEY (key, window))"
+        )
+        self.flush()
+
+        self._worker = threading.Thread(
+            target=self._run, name="frequency-cap-flush", daemon=True
+        )
+        self._worker.start()
+
+    def _current_window(self) -> int:
+        return int(time.time() // self.window)
+
+    def _shard_index(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % len(self._shards)
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[self._shard_index(key)]
+
+    def _count(self, key: str, window: int) -> int:
+        shard = self._shard(key)
+        with shard.lock:
+            return shard.durable.get((key, window), 0) + shard.pending.get(
+                (key, window), 0
+            )
+
+    def record(self, ad_id: str, video_id: str) -> None:
+        """Count an impression of an ad on a video.
+
+        Args:
+            ad_id: Video ID of the ad
+            video_id: ID of the video the ad was served on
+        """
+        window = self._current_window()
+        for key in (f"ad:{ad_id}", f"ad_video:{ad_id}:{video_id}"):
+            shard = self._shard(key)
+            with shard.lock:
+                shard.pending[(key, window)] = shard.pending.get((key, window), 0) + 1
+
+    def is_capped(self, ad_id: str, video_id: str) -> bool:
+        """Whether an ad must not be served on a video in the current window.
+
+        Args:
+            ad_id: Video ID of the ad
+            video_id: ID of the video the ad would be served on
+
+        Returns:
+            True if the ad reached its pacing or per-video limit
+        """
+        window = self._current_window()
+        if (
+            self.max_impressions_per_ad
+            and self._count(f"ad:{ad_id}", window) >= self.max_impressions_per_ad
+        ):
+            return True
+        return bool(
+            self.max_impressions_per_video
+            and self._count(f"ad_video:{ad_id}:{video_id}", window)
+            >= self.max_impressions_per_video
+        )
+
+    def filter(
+        self, results: list[AdSearchResult], video_id: str
+    ) -> list[AdSearchResult]:
+        """Drop the ads that are capped on a video, keeping the order.
+
+        Args:
+            results: Ranked ad search results
+            video_id: ID of the video the ads would be served on
+
+        Returns:
+            The results that can still be served
+        """
+        return [result for result in results if not self.is_capped(result.id, video_id)]
+
+    def flush(self) -> None:
+        """Write pending impressions to the database and reload the totals."""
+        with self._flush_lock:
+            window = self._current_window()
+            pending: dict[tuple[str, int], int] = {}
+            for shard in self._shards:
+                with shard.lock:
+                    # Counted as durable until the reload below replaces them
+                    for item, count in shard.pending.items():
+                        shard.durable[item] = shard.durable.get(item, 0) + count
+                    pending.update(shard.pending)
+                    shard.pending = {}
+
+            try:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT INTO impressions (key, window, count) "
+                        "VALUES (?, ?, ?) ON CONFLICT(key, window) DO UPDATE SET "
+                        "count = count + excluded.count",
+                        [(key, w, count) for (key, w), count in pending.items()],
+                    )
+                    self._connection.execute(
+                        "DELETE FROM impressions WHERE window < ?", (window,)
+                    )
+            except Exception:
+                # Keep the impressions pending for the next flush
+                for item, count in pending.items():
+                    shard = self._shard(item[0])
+                    with shard.lock:
+                        shard.durable[item] -= count
+                        shard.pending[item] = shard.pending.get(item, 0) + count
+                raise
+
+            rows = self._connection.execute(
+                "SELECT key, count FROM impressions WHERE window = ?", (window,)
+            ).fetchall()
+
+            durable: list[dict[tuple[str, int], int]] = [{} for _ in self._shards]
+            for key, count in rows:
+                durable[self._shard_index(key)][(key, window)] = count
+            for shard, totals in zip(self._shards, durable):
+                with shard.lock:
+                    shard.durable = totals
+
+    def close(self) -> None:
+        """Stop the flush thread and write pending impressions."""
+        self._stop.set()
+        self._worker.join()
+        self.flush()
+        self._connection.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.warning("Frequency cap flush failed", exc_info=True)
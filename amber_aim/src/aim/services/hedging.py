@@ -0,0 +1,190 @@
+"""Hedged execution of slow, idempotent requests."""
+
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, TypeVar
+
+from aim.tracing import propagate
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+
+class RequestHedger:
+    """Run a request and send a duplicate when it is slower than usual.
+
+    The hedge is sent once the first attempt has been running longer than
+    the configured percentile of recent latencies, and whichever attempt
+    finishes first wins. Hedges are capped to a fraction of the recent
+    requests so duplicates cannot overrun the provider rate limit.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        max_hedge_ratio: float = 0.1,
+        window: int = 200,
+        min_samples: int = 20,
+        max_workers: int = 8,
+    ):
+        """Initialize request hedger.
+
+        Args:
+            percentile: Latency percentile after which a hedge is sent
+            max_hedge_ratio: Maximum fraction of recent requests that are hedged
+            window: Number of recent requests used for latency and hedge rate
+            min_samples: Requests needed before hedging starts
+            max_workers: Maximum concurrent attempts
+        """
+        self.percentile = percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hedged-request"
+        )
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._hedged: deque[bool] = deque(maxlen=window)
+        # Hedges sent by calls that have not finished yet
+        self._hedges_in_flight = 0
+        self._histogram = [0] * len(LATENCY_BUCKETS)
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+
+    def hedge_delay(self) -> float | None:
+        """Delay after which a hedge is sent, None while hedging is off."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return ordered[index]
+
+    def _submit_hedge(self, fn: Callable[[], T]) -> Future | None:
+        # Checked and submitted under the lock, so that concurrent callers
+        # cannot all see room for one more hedge and overrun the ratio
+        with self._lock:
+            hedged = sum(self._hedged) + self._hedges_in_flight
+            if hedged + 1 > self.max_hedge_ratio * max(len(self._hedged), 1):
+                return None
+            future = self._executor.submit(fn)
+            self._hedges_in_flight += 1
+            return future
+
+    def _record(self, latency: float, hedged: bool, hedge_won: bool) -> None:
+        with self._lock:
+            self._hedges_in_flight -= hedged
+            self._latencies.append(latency)
+            self._hedged.append(hedged)
+            self._histogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            self._requests += 1
+            self._hedges += hedged
+            self._hedge_wins += hedge_won
+
+    def call(self, fn: Callable[[], T], timeout: float | None = None) -> T:
+        """Call fn, hedging it with a second attempt if it is slow.
+
+        Args:
+            fn: Idempotent callable performing the request
+            timeout: Maximum time in seconds to wait for any attempt
+
+        Returns:
+            The result of the first attempt that succeeds
+
+        Raises:
+            TimeoutError: If no attempt finished within the timeout
+            Exception: The error of the last failing attempt
+        """
+        started_at = time.monotonic()
+        deadline = started_at + timeout if timeout is not None else None
+
+        def remaining() -> float | None:
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        # Attempts run on pool threads, in the trace of the caller
+        fn = propagate(fn)
+        primary = self._executor.submit(fn)
+        attempts: dict[Future, bool] = {primary: False}
+
+        delay = self.hedge_delay()
+        if delay is not None:
+            wait_for = delay if deadline is None else min(delay, remaining())
+            wait([primary], timeout=wait_for)
+            if not primary.done() and (deadline is None or remaining() > 0):
+                hedge = self._submit_hedge(fn)
+                if hedge is not None:
+                    logger.info(
+                        "Sending hedged request",
+                        extra={"hedge_delay": delay},
+                    )
+                    attempts[hedge] = True
+
+        pending = set(attempts)
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(
+                pending, timeout=remaining(), return_when=FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    hedged = len(attempts) > 1
+                    self._record(
+                        time.monotonic() - started_at,
+                        hedged,
+                        hedged and attempts[future],
+                    )
+                    return future.result()
+                error = future.exception()
+
+        self._record(time.monotonic() - started_at, len(attempts) > 1, False)
+        if error is not None and not pending:
+            raise error
+        raise TimeoutError("No attempt finished before the timeout")
+
+    def stats(self) -> dict[str, Any]:
+        """Latency histogram and hedging counters.
+
+        Returns:
+            Dictionary with request and hedge counts, the hedge win rate,
+            latency percentiles over the recent window and the histogram
+        """
+        with self._lock:
+            ordered = sorted(self._latencies)
+            requests, hedges, hedge_wins = (
+                self._requests,
+                self._hedges,
+                self._hedge_wins,
+            )
+            histogram = list(self._histogram)
+
+        def percentile(value: float) -> float | None:
+            if not ordered:
+                return None
+            return ordered[min(len(ordered) - 1, int(value * len(ordered)))]
+
+        return {
+            "requests": requests,
+            "hedges": hedges,
+            "hedge_wins": hedge_wins,
+            "hedge_win_rate": hedge_wins / hedges if hedges else 0.0,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "histogram": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS, histogram)
+            },
+        }
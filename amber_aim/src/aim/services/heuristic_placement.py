@@ -0,0 +1,470 @@
+"""Deterministic placement engine working directly on TwelveLabs outputs.
+
+Produces a PlacementResult with simple rules and text features instead of an
+LLM call, so placements can still be served when OpenAI is unavailable and
+bulk backfills can run without network access.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+from aim.models.placement import Narration, Placement, PlacementResult
+
+# Matches h:mm:ss / m:ss clock times and plain second counts such as "45s"
+TIMESTAMP_PATTERN = re.compile(
+    r"(?<!\d)(?<!\d:)(?:(?P<h>\d{1,2}):)?(?P<m>\d{1,2}):(?P<s>\d{2})(?:\.\d+)?"
+    r"(?!\d|:\d)"
+    r"|(?<![\w.])(?P<secs>\d+(?:\.\d+)?)\s*(?:s|sec|secs|seconds)\b",
+    re.IGNORECASE,
+)
+NUMBERED_ITEM_PATTERN = re.compile(r"^\s*\d{1,2}\.\s+\S")
+WORD_PATTERN = re.compile(r"[a-z][a-z'\-]{2,}")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+SECTION_KEYWORDS = {
+    "summary": ("summary", "main story"),
+    "style": ("style",),
+    "length": ("length", "duration"),
+    "color": ("color", "colour"),
+    "obstacle": ("obstacle",),
+    "emotion": ("emotion",),
+    "segment": ("segment",),
+    "breakpoint": ("breakpoint", "break point", "ad break"),
+    "tone": ("tone classification", "scene-level", "scene level"),
+    "narrative": ("act", "trope", "hero", "arc", "narrative"),
+}
+
+BREAKPOINT_WORDS = (
+    "transition",
+    "breakpoint",
+    "break point",
+    "end of scene",
+    "scene change",
+    "change in topic",
+    "cut to",
+    "fade",
+    "pause",
+    "wraps up",
+    "concludes",
+)
+POSITIVE_WORDS = (
+    "joy",
+    "happy",
+    "laugh",
+    "smile",
+    "triumph",
+    "relief",
+    "celebrat",
+    "excite",
+    "hope",
+    "love",
+    "success",
+)
+NEGATIVE_WORDS = (
+    "cry",
+    "sad",
+    "fear",
+    "loss",
+    "setback",
+    "anger",
+    "angry",
+    "frustrat",
+    "tense",
+    "danger",
+    "fail",
+    "despair",
+)
+TURNING_WORDS = ("turning point", "shift", "realiz", "reveal", "twist")
+SEGMENT_LABELS = ("intro", "story", "tip", "recap", "cta", "outro", "tutorial")
+TONE_WORDS = (
+    "relaxing",
+    "urgent",
+    "informative",
+    "uplifting",
+    "humorous",
+    "dramatic",
+    "suspenseful",
+    "calm",
+    "energetic",
+    "emotional",
+    "inspirational",
+    "melancholic",
+    "playful",
+)
+STYLE_WORDS = (
+    "2d animation",
+    "3d animation",
+    "animation",
+    "documentary",
+    "vlog",
+    "film",
+    "live action",
+    "tutorial",
+    "stop motion",
+)
+TROPES = (
+    ("narrative hook", "narrative_hook"),
+    ("inciting incident", "inciting_incident"),
+    ("rising action", "rising_action"),
+    ("midpoint", "midpoint"),
+    ("climax", "climax"),
+    ("denouement", "denouement"),
+    ("resolution", "resolution"),
+    ("flashback", "flashback"),
+    ("flashforward", "flashforward"),
+    ("flash-forward", "flashforward"),
+    ("setup", "setup"),
+)
+ACTS = (
+    ("act 1", "act_1_setup"),
+    ("act i ", "act_1_setup"),
+    ("act 2", "act_2_confrontation"),
+    ("act ii ", "act_2_confrontation"),
+    ("act 3", "act_3_resolution"),
+    ("act iii", "act_3_resolution"),
+)
+HERO_STAGES = (
+    ("ordinary world", "ordinary_world"),
+    ("call to adventure", "call_to_adventure"),
+    ("refusal", "refusal"),
+    ("mentor", "meeting_mentor"),
+    ("crossing", "crossing_threshold"),
+    ("threshold", "crossing_threshold"),
+    ("tests", "tests_allies_enemies"),
+    ("allies", "tests_allies_enemies"),
+    ("approach", "approach"),
+    ("ordeal", "ordeal"),
+    ("reward", "reward"),
+    ("road back", "road_back"),
+    ("resurrection", "resurrection"),
+    ("elixir", "return_with_elixir"),
+)
+STOPWORDS = frozenset("""
+    the and for with that this from into onto over under are was were been being
+    has have had his her hers him she they them their there then than these those
+    its it's who whom which what when where while about after before during each
+    also just very more most some such only other all any both can could would
+    should will shall may might must not nor but yet our your you video scene
+    scenes segment segments start end timestamp timestamps shows showing shown
+    appears around between through within while again further here out off
+    character characters story main moment moments part parts one two three
+    summary total length style styles color colour tone tones obstacle obstacles
+    emotional emotion emotions label labels classification natural breakpoints
+    breakpoint structure narrative
+    """.split())
+
+# Viewers need time to settle in before the first ad
+MIN_FIRST_PLACEMENT_SECONDS = 30
+MIN_PLACEMENT_GAP_SECONDS = 60
+SECONDS_PER_PLACEMENT = 180
+MAX_PLACEMENTS = 5
+
+
+@dataclass
+class _Line:
+    """A single line of prompt output with its extracted features."""
+
+    text: str
+    section: str | None
+    timestamps: list[int] = field(default_factory=list)
+
+    @property
+    def lower(self) -> str:
+        return self.text.lower()
+
+
+def _parse_timestamps(text: str) -> list[int]:
+    """Extract timestamps in seconds from a line of text, in order."""
+    timestamps = []
+    for match in TIMESTAMP_PATTERN.finditer(text):
+        if match.group("secs") is not None:
+            timestamps.append(int(float(match.group("secs"))))
+        else:
+            hours = int(match.group("h") or 0)
+            timestamps.append(
+                hours * 3600 + int(match.group("m")) * 60 + int(match.group("s"))
+            )
+    return timestamps
+
+
+def _detect_section(text: str) -> str | None:
+    """Return the section a heading line introduces, if any."""
+    lower = text.lower()
+    for section, keywords in SECTION_KEYWORDS.items():
+        if section == "narrative":
+            # "act" is too short to match as a substring
+            if re.search(r"\bacts?\b|trope|hero|\barc\b|narrative", lower):
+                return section
+        elif any(keyword in lower for keyword in keywords):
+            return section
+    return None
+
+
+def _is_heading(raw: str, text: str) -> bool:
+    """Whether a line looks like a section heading rather than content."""
+    stripped = raw.strip()
+    return (
+        stripped.startswith("#")
+        or (stripped.startswith("**") and stripped.rstrip(":").endswith("**"))
+        or (text.endswith(":") and len(text) < 80)
+        or bool(NUMBERED_ITEM_PATTERN.match(stripped) and len(text) < 60)
+    )
+
+
+def _parse_lines(results_data: dict[str, str]) -> list[_Line]:
+    """Split prompt outputs into classified lines."""
+    lines: list[_Line] = []
+    for output in results_data.values():
+        section = None
+        for raw in str(output or "").splitlines():
+            text = raw.strip().strip("#*>-• \t").strip()
+            if not text:
+                continue
+
+            timestamps = _parse_timestamps(text)
+            if NUMBERED_ITEM_PATTERN.match(raw):
+                # Numbered items answer one question of the prompt each
+                text = re.sub(r"^\d{1,2}\.\s+", "", text)
+                section = _detect_section(text)
+                if not timestamps and ":" not in text.rstrip(":"):
+                    continue
+            elif not timestamps and _is_heading(raw, text):
+                section = _detect_section(text) or section
+                # Headings like "Color tone: warm" carry their own content
+                if ":" not in text.rstrip(":"):
+                    continue
+
+            lines.append(_Line(text=text, section=section, timestamps=timestamps))
+    return lines
+
+
+def _has_any(text: str, words: tuple[str, ...]) -> bool:
+    return any(word in text for word in words)
+
+
+def _value_after_colon(text: str) -> str:
+    return text.split(":", 1)[1].strip() if ":" in text else text
+
+
+def _description(text: str) -> str:
+    """Line text without its timestamps and the separators around them."""
+    description = TIMESTAMP_PATTERN.sub(" ", text)
+    description = re.sub(
+        r"^[\s\-–:()\[\],]*(?:to\b|at\b)?[\s\-–:()\[\],]*", "", description
+    )
+    return re.sub(r"\s+", " ", description).strip() or text
+
+
+def _keywords(text: str, limit: int) -> list[str]:
+    """Most frequent non-stopword terms of a text."""
+    counts = Counter(
+        word
+        for word in WORD_PATTERN.findall(text.lower())
+        if word not in STOPWORDS and len(word) > 3
+    )
+    return [word for word, _ in counts.most_common(limit)]
+
+
+def _summary(lines: list[_Line]) -> str:
+    summary_lines = [line.text for line in lines if line.section == "summary"]
+    if not summary_lines:
+        summary_lines = [
+            line.text for line in lines if not line.timestamps and len(line.text) > 80
+        ][:1]
+    sentences = SENTENCE_PATTERN.split(
+        " ".join(_value_after_colon(text) for text in summary_lines)
+    )
+    return " ".join(sentences[:8]).strip()
+
+
+def _first_match(text: str, words: tuple[str, ...]) -> str | None:
+    return next((word for word in words if word in text), None)
+
+
+def _emotional_arc(text: str) -> str | None:
+    if _has_any(text, TURNING_WORDS):
+        return "turning_point"
+    positive = _has_any(text, POSITIVE_WORDS)
+    negative = _has_any(text, NEGATIVE_WORDS)
+    if positive and negative:
+        return "turning_point"
+    if positive:
+        return "positive"
+    if negative:
+        return "negative"
+    return None
+
+
+def _narration(line: _Line) -> Narration:
+    lower = f" {line.lower} "
+    trope = next((value for key, value in TROPES if key in lower), None)
+    act = next((value for key, value in ACTS if key in lower), None)
+    stage = next((value for key, value in HERO_STAGES if key in lower), None)
+    return Narration(
+        timestamp=line.timestamps[0],
+        narration=line.text,
+        situation_description=_description(line.text),
+        themes=_keywords(_description(line.text), 3),
+        narrative_trope=trope,
+        act=act,
+        emotional_arc=_emotional_arc(lower),
+        hero_journey_stage=stage,
+    )
+
+
+def _video_duration(lines: list[_Line]) -> int:
+    length_timestamps = [
+        timestamp
+        for line in lines
+        if line.section == "length" or "length" in line.lower
+        for timestamp in line.timestamps
+    ]
+    if length_timestamps:
+        return max(length_timestamps)
+    return max((max(line.timestamps) for line in lines if line.timestamps), default=0)
+
+
+def _candidate_score(line: _Line, previous_arc: str | None) -> tuple[int, float]:
+    """Score a timestamped line as an ad insertion point.
+
+    Returns:
+        Tuple of (insertion time in seconds, score)
+    """
+    lower = line.lower
+    # Ads go at the end of a segment, never in the middle of it
+    timestamp = line.timestamps[1] if len(line.timestamps) > 1 else line.timestamps[0]
+
+    score = 0.0
+    if line.section == "breakpoint" or _has_any(lower, BREAKPOINT_WORDS):
+        score += 3.0
+    if line.section == "segment" or _has_any(lower, SEGMENT_LABELS):
+        score += 1.0
+    arc = _emotional_arc(lower)
+    if arc == "positive":
+        # Viewers are most receptive right after an uplifting moment
+        score += 1.5
+    elif arc == "turning_point" or (arc and previous_arc and arc != previous_arc):
+        score += 1.0
+    elif arc == "negative":
+        score -= 1.0
+    if _has_any(lower, ("climax", "key action", "mid-sentence", "middle of")):
+        score -= 2.0
+    return timestamp, score
+
+
+def _select_placements(
+    lines: list[_Line], duration: int
+) -> list[tuple[int, float, _Line]]:
+    """Pick the best spaced out insertion points."""
+    candidates: dict[int, tuple[float, _Line]] = {}
+    previous_arc = None
+    for line in sorted(
+        (line for line in lines if line.timestamps), key=lambda x: x.timestamps[0]
+    ):
+        timestamp, score = _candidate_score(line, previous_arc)
+        previous_arc = _emotional_arc(line.lower) or previous_arc
+        if timestamp < MIN_FIRST_PLACEMENT_SECONDS:
+            continue
+        if duration and timestamp >= duration - 5:
+            continue
+        if timestamp not in candidates or candidates[timestamp][0] < score:
+            candidates[timestamp] = (score, line)
+
+    count = min(MAX_PLACEMENTS, max(1, round(duration / SECONDS_PER_PLACEMENT)))
+    selected: list[tuple[int, float, _Line]] = []
+    # Highest score first, earlier timestamps win ties for determinism
+    for timestamp, (score, line) in sorted(
+        candidates.items(), key=lambda item: (-item[1][0], item[0])
+    ):
+        if score <= 0 or len(selected) >= count:
+            continue
+        if all(
+            abs(timestamp - other) >= MIN_PLACEMENT_GAP_SECONDS
+            for other, _, _ in selected
+        ):
+            selected.append((timestamp, score, line))
+
+    return sorted(selected, key=lambda item: item[0])
+
+
+def find_placements_heuristic(results_data: dict[str, str]) -> PlacementResult:
+    """Build a placement result from TwelveLabs outputs without an LLM.
+
+    Args:
+        results_data: Dictionary mapping prompt names to TwelveLabs outputs
+
+    Returns:
+        PlacementResult derived from rules and simple text features
+    """
+    lines = _parse_lines(results_data)
+    full_text = "\n".join(line.text for line in lines)
+    lower_text = full_text.lower()
+
+    tags = _keywords(full_text, 10)
+    themes = _keywords(
+        " ".join(line.text for line in lines if line.section in ("summary", "tone"))
+        or full_text,
+        5,
+    )
+
+    color_line = next((line for line in lines if line.section == "color"), None)
+    style = _first_match(lower_text, STYLE_WORDS)
+
+    def section_texts(section: str, words: tuple[str, ...] = ()) -> list[str]:
+        return [
+            line.text
+            for line in lines
+            if line.section == section
+            or (words and line.timestamps and _has_any(line.lower, words))
+        ]
+
+    narrative_structure = sorted(
+        (
+            _narration(line)
+            for line in lines
+            if line.timestamps
+            and (
+                line.section in ("narrative", "emotion")
+                or _emotional_arc(line.lower)
+                or _has_any(line.lower, tuple(key for key, _ in TROPES))
+            )
+        ),
+        key=lambda narration: narration.timestamp,
+    )
+
+    placements = []
+    for timestamp, _, line in _select_placements(lines, _video_duration(lines)):
+        line_keywords = _keywords(_description(line.text), 5)
+        placements.append(
+            Placement(
+                timestamp=timestamp,
+                reason=(
+                    f"Natural transition at {timestamp}s"
+                    + (
+                        f" following a {arc} moment"
+                        if (arc := _emotional_arc(line.lower))
+                        else ""
+                    )
+                ),
+                situation_description=_description(line.text),
+                themes=line_keywords[:3] or themes[:3],
+                ad_keywords=list(dict.fromkeys(line_keywords + tags[:3]))[:6],
+            )
+        )
+
+    return PlacementResult(
+        summary=_summary(lines),
+        tags=tags,
+        themes=themes,
+        artistic_style=style or "unknown",
+        general_color_tone=_value_after_colon(color_line.text) if color_line else "",
+        obstacles=section_texts("obstacle", ("obstacle",)),
+        emotional_parts=section_texts("emotion", POSITIVE_WORDS + NEGATIVE_WORDS),
+        segment_labels=section_texts("segment"),
+        tone_classification=[word for word in TONE_WORDS if word in lower_text],
+        characeters=[],
+        natural_breakpoints=section_texts("breakpoint", BREAKPOINT_WORDS),
+        narrative_structure=narrative_structure,
+        placements=placements,
+    )
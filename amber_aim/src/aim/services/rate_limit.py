@@ -0,0 +1,47 @@
+"""Client-side rate limiting of calls to external APIs."""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket shared by every thread calling the same API.
+
+    Tokens refill continuously at the configured rate, up to burst tokens,
+    and every call takes one. Callers block until a token is available, so
+    concurrent workers together stay under the provider rate limit.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        """Initialize rate limiter.
+
+        Args:
+            rate: Calls allowed per second
+            burst: Calls allowed at once after an idle period
+                (default: one second worth of calls, at least 1)
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+
+    def acquire(self) -> float:
+        """Take a token, waiting for one to be available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            # Reserve the token now, so waiters queue up in arrival order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
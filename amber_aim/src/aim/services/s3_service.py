@@ -1,13 +1,24 @@
 """S3 service for generating presigned upload URLs."""
 
+import asyncio
+import base64
+import binascii
 import json
 import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from uuid import uuid4
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 
+from aim.metrics import track
+from aim.services.cassette import Cassette
+from aim.services.write_behind import WriteBehindUploader
+from aim.tracing import propagate
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,18 +39,87 @@ class S3ServiceError(Exception):
 class S3Service:
     """Service for generating S3 presigned upload URLs."""
 
-    def __init__(self, bucket_name: str, region: str, base_path: str):
+    def __init__(
+        self,
+        bucket_name: str,
+        region: str,
+        base_path: str,
+        timeout: float | None = None,
+        max_pool_connections: int = 10,
+        max_attempts: int = 3,
+        retry_mode: str = "standard",
+        tcp_keepalive: bool = True,
+        write_behind: bool = False,
+        write_behind_queue_size: int = 1000,
+        cassette: Cassette | None = None,
+    ):
         """Initialize S3 service.
 
         Args:
             bucket_name: S3 bucket name
             region: AWS region
             base_path: Base path prefix for uploads
+            timeout: Connect and read timeout in seconds for S3 requests
+                (default: botocore defaults)
+            max_pool_connections: Size of the HTTP connection pool, also the
+                number of threads serving the async methods (default: 10)
+            max_attempts: Maximum attempts per request including retries
+                (default: 3)
+            retry_mode: botocore retry mode, "standard" or "adaptive"
+                (default: standard)
+            tcp_keepalive: Enable TCP keep-alive on pooled connections
+                (default: True)
+            write_behind: Upload background writes from a queue instead of
+                inline (default: False)
+            write_behind_queue_size: Maximum queued background writes, later
+                ones are uploaded outside of the queue (default: 1000)
+            cassette: Records or replays the S3 calls (default: live calls)
         """
         self.bucket_name = bucket_name
         self.region = region
         self.base_path = base_path
-        self.s3_client = boto3.client("s3", region_name=region)
+        config = Config(
+            # Signs the checksum header of upload URLs, which SigV2 URLs
+            # only carry as a query parameter
+            signature_version="s3v4",
+            max_pool_connections=max_pool_connections,
+            retries={"total_max_attempts": max_attempts, "mode": retry_mode},
+            tcp_keepalive=tcp_keepalive,
+        )
+        if timeout is not None:
+            config = config.merge(Config(connect_timeout=timeout, read_timeout=timeout))
+        self.s3_client = boto3.client("s3", region_name=region, config=config)
+        if cassette is not None:
+            self.s3_client = cassette.wrap(self.s3_client, "s3")
+
+        # Bounded to the connection pool so offloaded calls never wait on a
+        # connection while holding a thread
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_pool_connections, thread_name_prefix="s3"
+        )
+
+        self._write_behind = (
+            WriteBehindUploader(
+                self.upload_json_file, max_queue_size=write_behind_queue_size
+            )
+            if write_behind
+            else None
+        )
+
+    def close(self) -> None:
+        """Flush queued background writes and stop the worker threads."""
+        if self._write_behind is not None:
+            self._write_behind.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        # run_in_executor does not carry the current span over
+        return await loop.run_in_executor(self._executor, propagate(fn), *args)
+
+    def warmup(self) -> None:
+        """Open a connection to the bucket so the first request skips the handshake."""
+        self.s3_client.head_bucket(Bucket=self.bucket_name)
 
     def generate_get_url(self, s3_path: str, expiration: int = 1800) -> str:
         """Generate a presigned S3 URL for video download.
@@ -48,23 +128,33 @@ class S3Service:
             s3_path: S3 path of the video
             expiration: URL expiration time in seconds (default: 1800)
         """
-        return self.s3_client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": self.bucket_name, "Key": s3_path},
-            ExpiresIn=expiration,
-        )
+        with track("s3.presign"):
+            return self.s3_client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": self.bucket_name, "Key": s3_path},
+                ExpiresIn=expiration,
+            )
 
     def generate_upload_url(
-        self, filename: str, expiration: int = 1800
+        self,
+        filename: str,
+        expiration: int = 1800,
+        content_sha256: str | None = None,
     ) -> dict[str, str]:
         """Generate a presigned S3 URL for video upload.
 
+        With a content hash, the URL is signed with the SHA-256 checksum
+        header, so the upload must send the header and S3 rejects content
+        that does not match it.
+
         Args:
             filename: Original filename with extension
             expiration: URL expiration time in seconds (default: 1800)
+            content_sha256: Hex SHA-256 digest the uploaded content must have
 
         Returns:
-            Dictionary with 'upload_url' and 's3_path' keys
+            Dictionary with 'upload_url' and 's3_path' keys, and the
+            'checksum_sha256' header value when a content hash is given
 
         Raises:
             S3ServiceError: If S3 operation fails
@@ -80,17 +170,20 @@ class S3Service:
         file_uuid = str(uuid4())
         s3_key = f"{self.base_path}/{file_uuid}.{extension}"
 
+        # No ContentType, SigV4 would sign it and reject uploads sending the
+        # actual type of the file
+        params = {"Bucket": self.bucket_name, "Key": s3_key}
+        if content_sha256 is not None:
+            params["ChecksumSHA256"] = base64.b64encode(
+                bytes.fromhex(content_sha256)
+            ).decode()
+
         try:
             # Generate presigned URL for PUT operation
-            presigned_url = self.s3_client.generate_presigned_url(
-                "put_object",
-                Params={
-                    "Bucket": self.bucket_name,
-                    "Key": s3_key,
-                    "ContentType": "video/*",
-                },
-                ExpiresIn=expiration,
-            )
+            with track("s3.presign"):
+                presigned_url = self.s3_client.generate_presigned_url(
+                    "put_object", Params=params, ExpiresIn=expiration
+                )
 
             # Log successful URL generation
             logger.info(
@@ -103,7 +196,10 @@ class S3Service:
                 },
             )
 
-            return {"upload_url": presigned_url, "s3_path": s3_key}
+            result = {"upload_url": presigned_url, "s3_path": s3_key}
+            if "ChecksumSHA256" in params:
+                result["checksum_sha256"] = params["ChecksumSHA256"]
+            return result
 
         except NoCredentialsError as e:
             logger.error("AWS credentials not found", exc_info=True)
@@ -128,6 +224,56 @@ class S3Service:
                 "Unexpected error generating upload URL", "S3_SERVICE_ERROR"
             ) from e
 
+    def object_exists(self, s3_path: str) -> bool:
+        """Check whether an object exists in the bucket.
+
+        Background writes not uploaded yet count as existing.
+
+        Args:
+            s3_path: S3 path of the object
+
+        Returns:
+            True if the object exists, False otherwise
+        """
+        if self._write_behind is not None and self._write_behind.pending(s3_path):
+            return True
+
+        with track("s3.head") as stage:
+            try:
+                self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_path)
+                return True
+            except ClientError:
+                stage.outcome = "not_found"
+                return False
+
+    def object_sha256(self, s3_path: str) -> str | None:
+        """Return the SHA-256 checksum S3 verified when an object was uploaded.
+
+        Args:
+            s3_path: S3 path of the object
+
+        Returns:
+            Hex SHA-256 digest of the object content, None if the object is
+            missing or was uploaded without a full SHA-256 checksum
+        """
+        with track("s3.head") as stage:
+            try:
+                response = self.s3_client.head_object(
+                    Bucket=self.bucket_name, Key=s3_path, ChecksumMode="ENABLED"
+                )
+            except ClientError:
+                stage.outcome = "not_found"
+                return None
+
+        checksum = response.get("ChecksumSHA256")
+        if checksum is None:
+            return None
+        try:
+            # Multipart uploads have a checksum of their part checksums
+            return base64.b64decode(checksum, validate=True).hex()
+        except binascii.Error:
+            return None
+
     def download_json_file(self, s3_path: str) -> dict[str, Any] | None:
         """Download a JSON file from S3.
 
@@ -136,12 +282,38 @@ class S3Service:
 
         Returns:
             Dictionary containing the JSON data or None if the file is not found
+            or cannot be read, read errors are logged
         """
-        try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_path)
-            return json.loads(response["Body"].read().decode("utf-8"))
-        except Exception as e:
-            return None
+        # Background writes not uploaded yet are visible to this process
+        if self._write_behind is not None:
+            pending = self._write_behind.pending(s3_path)
+            if pending is not None:
+                return pending
+
+        with track("s3.get") as stage:
+            try:
+                response = self.s3_client.get_object(
+                    Bucket=self.bucket_name, Key=s3_path
+                )
+                body = response["Body"].read()
+                stage.add_usage(bytes_received=len(body))
+                return json.loads(body.decode("utf-8"))
+            except Exception as e:
+                error_code = (
+                    e.response.get("Error", {}).get("Code")
+                    if isinstance(e, ClientError)
+                    else None
+                )
+                if error_code in ("NoSuchKey", "404"):
+                    stage.outcome = "not_found"
+                    return None
+                stage.outcome = "error"
+                logger.error(
+                    "Failed to download JSON file",
+                    extra={"s3_path": s3_path},
+                    exc_info=True,
+                )
+                return None
 
     def upload_json_file(self, s3_path: str, data: dict[str, str]) -> None:
         """Upload a JSON file to S3.
@@ -153,6 +325,78 @@ class S3Service:
         Returns:
             None
         """
-        self.s3_client.put_object(
-            Bucket=self.bucket_name, Key=s3_path, Body=json.dumps(data)
-        )
+        body = json.dumps(data)
+        with track("s3.put") as stage:
+            stage.add_usage(bytes_sent=len(body.encode("utf-8")))
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=s3_path, Body=body)
+
+    def upload_json_file_background(self, s3_path: str, data: dict[str, str]) -> None:
+        """Upload a JSON file to S3 without waiting for the upload.
+
+        With write-behind enabled the write is queued and uploaded by a
+        background worker, otherwise it is uploaded inline.
+
+        Args:
+            s3_path: S3 path of the JSON file
+            data: Data to upload
+        """
+        if self._write_behind is not None:
+            self._write_behind.put(s3_path, data)
+        else:
+            self.upload_json_file(s3_path, data)
+
+    def wait_for_background_write(self, s3_path: str) -> bool:
+        """Block until a background write of a file is uploaded.
+
+        Args:
+            s3_path: S3 path of the file
+
+        Returns:
+            True if the file was uploaded or no write is pending, False if
+            the write was dropped after every upload attempt failed
+        """
+        if self._write_behind is None:
+            # Uploaded inline, failures were raised to the writer
+            return True
+        return self._write_behind.wait(s3_path)
+
+    async def download_json_file_async(self, s3_path: str) -> dict[str, Any] | None:
+        """Download a JSON file from S3 without blocking the event loop.
+
+        Args:
+            s3_path: S3 path of the JSON file
+
+        Returns:
+            Dictionary containing the JSON data or None if the file is not found
+        """
+        return await self._run_async(self.download_json_file, s3_path)
+
+    async def upload_json_file_async(self, s3_path: str, data: dict[str, str]) -> None:
+        """Upload a JSON file to S3 without blocking the event loop.
+
+        Args:
+            s3_path: S3 path of the JSON file
+            data: Data to upload
+        """
+        await self._run_async(self.upload_json_file, s3_path, data)
+
+    async def download_json_files_async(
+        self, s3_paths: list[str], concurrency: int = 32
+    ) -> dict[str, dict[str, Any] | None]:
+        """Download many JSON files from S3 concurrently.
+
+        Args:
+            s3_paths: S3 paths of the JSON files
+            concurrency: Maximum downloads in flight at once
+
+        Returns:
+            Dictionary mapping each path to its JSON data, None if not found
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def download(s3_path: str) -> dict[str, Any] | None:
+            async with semaphore:
+                return await self.download_json_file_async(s3_path)
+
+        results = await asyncio.gather(*(download(path) for path in s3_paths))
+        return dict(zip(s3_paths, results))
@@ -0,0 +1,158 @@
+"""Key-value state shared between API worker processes."""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+
+class StateStore(ABC):
+    """Interface for state that has to be visible to every worker.
+
+    Holds job status, in-flight markers used for deduplication and caches.
+    Values must be JSON serializable. Keys with a TTL disappear once expired.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        """Return the value stored under key, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store value under key, replacing any existing value."""
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        """Store value only if key is missing or expired.
+
+        Returns:
+            True if the value was stored, False if the key already existed
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key if present."""
+
+
+class MemoryStateStore(StateStore):
+    """State store local to the current process, for single worker setups."""
+
+    def __init__(self) -> None:
+        """Initialize memory state store."""
+        self._lock = threading.Lock()
+        self._data: dict[str, tuple[Any, float | None]] = {}
+
+    def _get_unlocked(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            return self._get_unlocked(key)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def add(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        with self._lock:
+            if self._get_unlocked(key) is not None:
+                return False
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteStateStore(StateStore):
+    """State store backed by a local SQLite file shared by all workers."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize SQLite state store.
+
+        Args:
+            path: Path of the database file, created if missing
+        """
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, sqlite3 connections are not thread-safe
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Any | None:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM state WHERE key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl if ttl else None),
+        )
+
+    def add(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE state.expires_at IS NOT NULL AND state.expires_at <= ?",
+            (key, json.dumps(value), now + ttl if ttl else None, now),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM state WHERE key = ?", (key,))
+
+
+def create_state_store(backend: str, path: str) -> StateStore:
+    """Create the configured state store.
+
+    Args:
+        backend: "sqlite" or "memory"
+        path: Database path for the sqlite backend
+
+    Returns:
+        StateStore instance
+
+    Raises:
+        ValueError: If backend is unknown
+    """
+    if backend == "sqlite":
+        return SQLiteStateStore(path)
+    elif backend == "memory":
+        return MemoryStateStore()
+    else:
+        raise ValueError(f"Invalid state backend: {backend}")
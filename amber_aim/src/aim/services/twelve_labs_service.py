@@ -2,16 +2,26 @@
 
 import json
 import logging
+import math
 import random
+import re
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Literal, TypedDict
+from typing import TYPE_CHECKING, Any, Literal, TypedDict
 
-from twelvelabs import TwelveLabs
-
-from aim.models.ads import AdClip, AdSearchResult
+from aim.metrics import track
+from aim.models.ads import AdClip, AdProfile, AdSearchResult
 from aim.models.placement import PlacementResult
 from aim.services import S3Service
+from aim.services.cassette import Cassette
+from aim.services.hedging import RequestHedger
+from aim.services.heuristic_placement import find_placements_heuristic
+from aim.services.rate_limit import RateLimiter
+from aim.tracing import propagate, span
+
+if TYPE_CHECKING:
+    from twelvelabs.core.pagination import SyncPager
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +48,100 @@ class TwelveLabsServiceError(Exception):
         super().__init__(self.message)
 
 
+PROMPTS_DIR = Path(__file__).parent.parent.parent.parent / "prompts"
+
+CONSOLIDATED_SECTION_PATTERN = re.compile(
+    r"^[#*\s]*=== SECTION: (?P<name>[\w\-]+) ===[*\s]*$", re.MULTILINE
+)
+
+
+def load_twelvelabs_prompts() -> list[tuple[str, str]]:
+    """Load the active TwelveLabs prompt set.
+
+    Returns:
+        List of (prompt name, prompt text) tuples sorted by file name
+    """
+    return [
+        (path.stem, path.read_text())
+        for path in sorted((PROMPTS_DIR / "twelvelabs").glob("*.txt"))
+    ]
+
+
+def build_consolidated_prompt(prompts: list[tuple[str, str]]) -> str:
+    """Combine several prompts into a single sectioned request.
+
+    Args:
+        prompts: List of (prompt name, prompt text) tuples
+
+    Returns:
+        Prompt asking for one delimited answer section per prompt
+    """
+    sections = "\n\n".join(
+        f"=== SECTION: {name} ===\n{prompt.strip()}" for name, prompt in prompts
+    )
+    return (
+        "Answer each of the following sections independently and in order. "
+        "Start the answer to every section with its header line exactly as "
+        "written below (for example `=== SECTION: name ===`) on a line of its "
+        "own, and do not use that header format anywhere else.\n\n"
+        f"{sections}"
+    )
+
+
+def split_consolidated_response(text: str, names: list[str]) -> dict[str, str]:
+    """Split a consolidated response back into its named sections.
+
+    Args:
+        text: Response to a prompt built with build_consolidated_prompt
+        names: Expected section names
+
+    Returns:
+        Dictionary mapping each section name found in the response to its text
+    """
+    matches = [
+        match
+        for match in CONSOLIDATED_SECTION_PATTERN.finditer(text)
+        if match.group("name") in names
+    ]
+
+    sections: dict[str, str] = {}
+    for match, next_match in zip(matches, matches[1:] + [None]):
+        end = next_match.start() if next_match else len(text)
+        section = text[match.end() : end].strip()
+        if section:
+            sections[match.group("name")] = section
+
+    return sections
+
+
+def parse_ad_profile(video_id: str, text: str) -> AdProfile:
+    """Parse the answer to the ad profile prompt.
+
+    Args:
+        video_id: ID of the ad video
+        text: Response text, a JSON object possibly wrapped in other text
+
+    Returns:
+        AdProfile instance
+
+    Raises:
+        ValueError: If the response has no valid JSON object
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in ad profile response")
+    data = json.loads(text[start : end + 1])
+    return AdProfile.model_validate({**data, "video_id": video_id})
+
+
+def _best_clip_score(item: Any) -> float:
+    """Best clip score of a search result grouped by video, 0 if none."""
+    return max(
+        (clip.score for clip in item.clips or [] if clip.score is not None),
+        default=0.0,
+    )
+
+
 class TwelveLabsService:
     """Service for interacting with TwelveLabs API."""
 
@@ -47,6 +151,20 @@ class TwelveLabsService:
         creators_index_id: str,
         ads_index_id: str,
         s3_service: S3Service,
+        progressive_placements: bool = False,
+        consolidated_prompts: bool = False,
+        placement_engine: Literal["llm", "heuristic"] = "llm",
+        placement_fallback: bool = True,
+        placement_llm_timeout: float | None = None,
+        search_hedger: RequestHedger | None = None,
+        ads_index_shards: dict[str, list[str]] | None = None,
+        search_min_score: float = 0.7,
+        search_max_results: int = 10,
+        search_prefetch: bool = True,
+        search_max_concurrency: int = 8,
+        rate_limiter: RateLimiter | None = None,
+        llm_rate_limiter: RateLimiter | None = None,
+        cassette: Cassette | None = None,
     ) -> None:
         """Initialize TwelveLabs service.
 
@@ -55,12 +173,67 @@ class TwelveLabsService:
             creators_index_id: Index ID for creator videos
             ads_index_id: Index ID for ad videos
             s3_service: S3Service instance
+            progressive_placements: Publish partial placement results while
+                the remaining prompts are still running
+            consolidated_prompts: Send the whole prompt set in a single
+                analyze request instead of one request per prompt
+            placement_engine: Engine producing placements, the OpenAI agent
+                ("llm") or the local rule-based engine ("heuristic")
+            placement_fallback: Use the heuristic engine when the LLM fails
+            placement_llm_timeout: Timeout in seconds for the OpenAI request
+            search_hedger: Hedges slow ads searches with a duplicate request
+                (default: no hedging)
+            ads_index_shards: Additional ads index IDs mapped to the video
+                tags routed to them, searched together with ads_index_id.
+                Shards without tags are always searched.
+            search_min_score: Default score threshold of ads searches, clips
+                at or below it are dropped and paging stops
+            search_max_results: Default number of ads returned per shard,
+                paging stops once reached
+            search_prefetch: Fetch the next search page in the background
+                while the current one is read, if it can still be useful
+            search_max_concurrency: Concurrent searches per shard, sizes the
+                search and page thread pools
+            rate_limiter: Limits the TwelveLabs API calls, shared with the
+                other users of the same limiter (default: no limit)
+            llm_rate_limiter: Limits the OpenAI placement requests
+                (default: no limit)
+            cassette: Records or replays the TwelveLabs and OpenAI calls
+                (default: live calls)
         """
         try:
+            # Deferred, the SDK is slow to import and only needed once used
+            from twelvelabs import TwelveLabs
+
             self.client = TwelveLabs(api_key=api_key)
+            if cassette is not None:
+                self.client = cassette.wrap(self.client, "twelvelabs")
+            self.cassette = cassette
             self.creators_index_id = creators_index_id
             self.ads_index_id = ads_index_id
             self.s3_service = s3_service
+            self.progressive_placements = progressive_placements
+            self.consolidated_prompts = consolidated_prompts
+            self.placement_engine = placement_engine
+            self.placement_fallback = placement_fallback
+            self.placement_llm_timeout = placement_llm_timeout
+            self.search_hedger = search_hedger
+            # The main ads index is a shard searched for every video
+            self.ads_index_shards = {ads_index_id: [], **(ads_index_shards or {})}
+            self._search_executor = ThreadPoolExecutor(
+                max_workers=search_max_concurrency * len(self.ads_index_shards),
+                thread_name_prefix="ads-search",
+            )
+            self.search_min_score = search_min_score
+            self.search_max_results = search_max_results
+            self.search_prefetch = search_prefetch
+            self.rate_limiter = rate_limiter
+            self.llm_rate_limiter = llm_rate_limiter
+            # Separate from the shard pool, whose workers wait on prefetches
+            self._page_executor = ThreadPoolExecutor(
+                max_workers=search_max_concurrency * len(self.ads_index_shards),
+                thread_name_prefix="ads-search-page",
+            )
             logger.info("TwelveLabs service initialized successfully")
         except Exception as e:
             logger.error("Failed to initialize TwelveLabs client", exc_info=True)
@@ -69,6 +242,44 @@ class TwelveLabsService:
                 error_code="INITIALIZATION_ERROR",
             ) from e
 
+    def _throttle(self) -> None:
+        """Wait for the TwelveLabs rate limiter before an API call."""
+        if self.rate_limiter is not None:
+            with track("twelvelabs.throttle"):
+                self.rate_limiter.acquire()
+
+    def _next_page(self, page: "SyncPager") -> "SyncPager | None":
+        """Fetch the page after page, within the rate limit."""
+        self._throttle()
+        with track("twelvelabs.search.page"):
+            return page.next_page()
+
+    def _analyze(self, video_id: str, prompt: str, prompt_name: str) -> Any:
+        """Run an analyze request, within the rate limit."""
+        self._throttle()
+        with track(
+            "twelvelabs.analyze",
+            # Accounted per prompt, to compare the cost of the prompts
+            usage_stage=f"twelvelabs.analyze.{prompt_name}",
+            video_id=video_id,
+            prompt=prompt_name,
+        ) as stage:
+            result = self.client.analyze(
+                video_id=video_id, prompt=prompt, temperature=0.2
+            )
+            usage = getattr(result, "usage", None)
+            stage.add_usage(
+                input_tokens=getattr(usage, "input_tokens", None) or 0,
+                output_tokens=getattr(usage, "output_tokens", None) or 0,
+                bytes_sent=len(prompt.encode("utf-8")),
+                bytes_received=len((result.data or "").encode("utf-8")),
+            )
+            return result
+
+    def warmup(self) -> None:
+        """Open a connection to TwelveLabs so the first request skips the handshake."""
+        self.client.indexes.retrieve(self.ads_index_id)
+
     def _get_index_id(self, video_type: Literal["creator", "ad"]) -> str:
         """Get the appropriate index ID based on video type.
 
@@ -117,10 +328,12 @@ class TwelveLabsService:
                 },
             )
 
-            task = self.client.tasks.create(
-                index_id=index_id,
-                video_url=video_url,
-            )
+            self._throttle()
+            with track("twelvelabs.tasks.create"):
+                task = self.client.tasks.create(
+                    index_id=index_id,
+                    video_url=video_url,
+                )
 
             result: TaskResponse = {"id": task.id, "video_id": task.video_id}
 
@@ -159,76 +372,226 @@ class TwelveLabsService:
             video_id: ID of the video
             type: Type of video (creator or ad)
         """
+        with span("analyze_video", video_id=video_id, index_id=index_id, type=type):
+            task = None
+            self._throttle()
+            with track("twelvelabs.tasks.list"):
+                for task in self.client.tasks.list(index_id=index_id):
+                    if task.video_id == video_id:
+                        break
+
+            while True:
+                if task is None:
+                    break
+
+                logger.info("Checking task status", extra={"task_id": task.id})
+                if task.status == "ready":
+                    logger.info("Task completed", extra={"task_id": task.id})
+                    break
+                time.sleep(1)
+
+            prompts = load_twelvelabs_prompts()
+
+            task_id = task.id if task else None
+            logger.info(
+                f"Loaded {len(prompts)} prompts",
+                extra={"task_id": task_id, "video_id": video_id},
+            )
 
-        task = None
-        for task in self.client.tasks.list(index_id=index_id):
-            if task.video_id == video_id:
-                break
+            results = {}
 
-        while True:
-            if task is None:
-                break
+            # In progressive mode partial placements are refined on a single
+            # background worker so the remaining prompts keep running meanwhile
+            refiner = (
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="placement-refine")
+                if self.progressive_placements
+                else None
+            )
+            pending_refinement: Future | None = None
 
-            logger.info("Checking task status", extra={"task_id": task.id})
-            if task.status == "ready":
-                logger.info("Task completed", extra={"task_id": task.id})
-                break
-            time.sleep(1)
+            logger.info(
+                "Analyzing video", extra={"task_id": task_id, "video_id": video_id}
+            )
 
-        prompts = [
-            (Path(path).stem, Path(path).read_text())
-            for path in sorted(
-                Path(__file__).parent.parent.parent.glob("prompts/twelvelabs/*.txt")
+            if self.consolidated_prompts:
+                # A single round trip yields every output at once, so there is
+                # no intermediate output to refine from
+                results = self.analyze_prompts_consolidated(video_id, prompts)
+                prompts = []
+
+            for index, (prompt_name, prompt) in enumerate(prompts):
+                logger.info(
+                    f"Analyzing video with prompt {prompt_name}",
+                    extra={"task_id": task_id, "video_id": video_id},
+                )
+                result = self._analyze(video_id, prompt, prompt_name)
+
+                results[prompt_name] = result.data
+
+                # The last output goes straight into the final placement result.
+                # While a refinement is still running newer outputs are picked up
+                # by the next one instead of queueing up.
+                is_last = index == len(prompts) - 1
+                if refiner is not None and result.data and not is_last:
+                    if pending_refinement is None or pending_refinement.done():
+                        pending_refinement = refiner.submit(
+                            propagate(self._publish_partial_placement),
+                            video_id,
+                            dict(results),
+                        )
+
+            if refiner is not None:
+                refiner.shutdown(wait=False, cancel_futures=True)
+                # The final LLM run is the slow part once every output is in,
+                # so publish a quick rule-based result ahead of it. This is
+                # the only partial result when there is a single prompt.
+                if self.placement_engine == "llm" and any(results.values()):
+                    self._publish_partial_placement(
+                        video_id, results, engine="heuristic"
+                    )
+
+            logger.info(
+                "Saving results", extra={"task_id": task_id, "video_id": video_id}
             )
-        ]
-        prompts = [
-            (Path(path).stem, Path(path).read_text())
-            for path in sorted(
-                Path(__file__).parent.parent.parent.glob("prompts/twelvelabs/*.txt")
+            with open(f"video_{video_id}.json", "w") as f:
+                json.dump(results, f)
+
+            placement_result = self.analyze_with_agent(video_id, results)
+
+            logger.info(
+                "Task completed", extra={"task_id": task_id, "results": results}
             )
-        ]
 
-        task_id = task.id if task else None
+            return placement_result
+
+    def analyze_prompts_consolidated(
+        self, video_id: str, prompts: list[tuple[str, str]]
+    ) -> dict[str, str]:
+        """Run a prompt set against a video with a single analyze request.
+
+        Sections missing from the combined response are requested again one
+        prompt at a time, so callers always get an output for every prompt.
+        A single prompt is already one request and is sent unchanged.
+
+        Args:
+            video_id: ID of the video
+            prompts: List of (prompt name, prompt text) tuples
+
+        Returns:
+            Dictionary mapping each prompt name to its output
+        """
+        names = [name for name, _ in prompts]
+
+        if len(prompts) == 1:
+            [(prompt_name, prompt)] = prompts
+            return {prompt_name: self._analyze(video_id, prompt, prompt_name).data}
+
         logger.info(
-            f"Loaded {len(prompts)} prompts",
-            extra={"task_id": task_id, "video_id": video_id},
+            "Analyzing video with consolidated prompt",
+            extra={"video_id": video_id, "prompt_names": names},
         )
+        result = self._analyze(
+            video_id, build_consolidated_prompt(prompts), "consolidated"
+        )
+        sections = split_consolidated_response(result.data or "", names)
 
         results = {}
+        for prompt_name, prompt in prompts:
+            if prompt_name in sections:
+                results[prompt_name] = sections[prompt_name]
+                continue
 
-        logger.info("Analyzing video", extra={"task_id": task_id, "video_id": video_id})
+            logger.warning(
+                f"Section {prompt_name} missing from consolidated response",
+                extra={"video_id": video_id},
+            )
+            result = self._analyze(video_id, prompt, prompt_name)
+            results[prompt_name] = result.data
 
-        for prompt_name, prompt in prompts:
+        return results
+
+    def _publish_partial_placement(
+        self,
+        video_id: str,
+        results_data: dict[str, str],
+        engine: Literal["llm", "heuristic"] | None = None,
+    ) -> None:
+        """Build and store a provisional placement result from partial outputs.
+
+        Failures are logged and swallowed, the final result is still produced
+        once every prompt has finished.
+
+        Args:
+            video_id: ID of the video
+            results_data: Prompt outputs received so far
+            engine: Engine overriding placement_engine for this result
+        """
+        try:
+            self.analyze_with_agent(video_id, results_data, partial=True, engine=engine)
             logger.info(
-                f"Analyzing video with prompt {prompt_name}",
-                extra={"task_id": task_id, "video_id": video_id},
+                "Partial placement result published",
+                extra={"video_id": video_id, "prompt_count": len(results_data)},
             )
-            result = self.client.analyze(
-                video_id=video_id, prompt=prompt, temperature=0.2
+        except TwelveLabsServiceError:
+            logger.warning(
+                "Failed to publish partial placement result",
+                extra={"video_id": video_id},
             )
 
-            results[prompt_name] = result.data
+    def _find_placements_llm(
+        self, video_id: str, results_data: dict[str, str]
+    ) -> PlacementResult:
+        """Run the OpenAI placements agent over the TwelveLabs outputs.
+
+        Args:
+            video_id: ID of the video
+            results_data: Dictionary containing the analysis results from TwelveLabs
 
-        logger.info("Saving results", extra={"task_id": task_id, "video_id": video_id})
-        with open(f"video_{video_id}.json", "w") as f:
-            json.dump(results, f)
+        Returns:
+            PlacementResult: Structured placement data
+        """
+        # Load the prompt template
+        prompt_path = PROMPTS_DIR / "openai" / "prompt.txt"
+        logger.info("Loading prompt template", extra={"prompt_path": str(prompt_path)})
 
-        placement_result = self.analyze_with_agent(video_id, results)
+        with open(prompt_path) as f:
+            prompt_template = f.read()
 
-        logger.info("Task completed", extra={"task_id": task_id, "results": results})
+        # Format context from results data
+        context = "\n\n".join(str(value) for value in results_data.values())
+        final_prompt = prompt_template.format(context=context)
+
+        # Create and run agent with structured output
+        logger.info(
+            "Creating agent for video analysis",
+            extra={"video_id": video_id},
+        )
 
-        return placement_result
+        # Import and call the placements agent
+        from aim.services.agent import find_placements
+
+        if self.llm_rate_limiter is not None:
+            self.llm_rate_limiter.acquire()
+        return find_placements(
+            final_prompt, timeout=self.placement_llm_timeout, cassette=self.cassette
+        )
 
     def analyze_with_agent(
         self,
         video_id: str,
         results_data: dict[str, str],
+        partial: bool = False,
+        engine: Literal["llm", "heuristic"] | None = None,
     ) -> PlacementResult:
         """Analyze video results using OpenAI agent and return structured placement data.
 
         Args:
             video_id: ID of the video
             results_data: Dictionary containing the analysis results from TwelveLabs
+            partial: Whether results_data only holds some of the prompt outputs.
+                Partial results are stored under results/placement_{video_id}_partial.json
+                and never overwrite the final result.
+            engine: Engine overriding placement_engine for this result
 
         Returns:
             PlacementResult: Structured placement data
@@ -236,35 +599,40 @@ class TwelveLabsService:
         Raises:
             TwelveLabsServiceError: If the agent analysis fails
         """
+        engine = engine or self.placement_engine
         try:
-            # Load the prompt template
-            prompt_path = (
-                Path(__file__).parent.parent.parent.parent
-                / "prompts"
-                / "openai"
-                / "prompt.txt"
-            )
-            logger.info(
-                "Loading prompt template", extra={"prompt_path": str(prompt_path)}
-            )
-
-            with open(prompt_path) as f:
-                prompt_template = f.read()
-
-            # Format context from results data
-            context = "\n\n".join(str(value) for value in results_data.values())
-            final_prompt = prompt_template.format(context=context)
-
-            # Create and run agent with structured output
-            logger.info(
-                "Creating agent for video analysis",
-                extra={"video_id": video_id},
-            )
+            with span(
+                "placements",
+                video_id=video_id,
+                engine=engine,
+                partial=partial,
+            ) as placements_span:
+                if engine == "heuristic":
+                    placement_result = find_placements_heuristic(results_data)
+                else:
+                    try:
+                        placement_result = self._find_placements_llm(
+                            video_id, results_data
+                        )
+                    except Exception:
+                        if not self.placement_fallback:
+                            raise
+                        logger.warning(
+                            "LLM placement analysis failed, using heuristic engine",
+                            extra={"video_id": video_id},
+                            exc_info=True,
+                        )
+                        placements_span.set_attribute("engine", "heuristic")
+                        placement_result = find_placements_heuristic(results_data)
 
-            # Import and call the placements agent
-            from aim.services.agent import find_placements
+            placement_result = placement_result.model_copy(update={"partial": partial})
 
-            placement_result = find_placements(final_prompt)
+            if partial:
+                self.s3_service.upload_json_file_background(
+                    f"results/placement_{video_id}_partial.json",
+                    placement_result.model_dump(),
+                )
+                return placement_result
 
             # Save intermediate results to JSON
             output_path = f"video_{video_id}_placement.json"
@@ -281,7 +649,7 @@ class TwelveLabsService:
                 extra={"video_id": video_id, "output_path": output_path},
             )
 
-            self.s3_service.upload_json_file(
+            self.s3_service.upload_json_file_background(
                 f"results/placement_{video_id}.json",
                 placement_result.model_dump(),
             )
@@ -302,16 +670,306 @@ class TwelveLabsService:
                 error_code="AGENT_ANALYSIS_ERROR",
             ) from e
 
+    def _route_ads_indexes(self, tags: list[str] | None) -> list[str]:
+        """Select the ads index shards relevant to a set of tags.
+
+        Args:
+            tags: Routing hints, usually the tags of the video, None to
+                search every shard
+
+        Returns:
+            Shards without routing tags, the main ads index among them, plus
+            the shards whose routing tags match
+        """
+        if not tags:
+            return list(self.ads_index_shards)
+
+        wanted = {tag.lower() for tag in tags}
+        return [
+            index_id
+            for index_id, routes in self.ads_index_shards.items()
+            if not routes or wanted & {route.lower() for route in routes}
+        ]
+
+    def _search_index(
+        self,
+        index_id: str,
+        query_text: str,
+        page_limit: int,
+        timeout: float | None,
+        min_score: float,
+        max_results: int,
+    ) -> list[AdSearchResult]:
+        """Search a single ads index shard.
+
+        Args:
+            index_id: Index ID of the shard
+            query_text: The search query describing the desired ad content
+            page_limit: Number of results per page
+            timeout: Time budget in seconds for the request
+            min_score: Clips scoring at or below this are dropped
+            max_results: Maximum number of results to return
+
+        Returns:
+            List of AdSearchResult objects with raw clip scores
+        """
+        started_at = time.monotonic()
+        request_options = None
+        if timeout is not None:
+            request_options = {"timeout_in_seconds": max(1, math.ceil(timeout))}
+
+        # Only the first page is fetched here, the pager fetches the next
+        # ones on demand
+        def query() -> "SyncPager":
+            self._throttle()
+            with track("twelvelabs.search"):
+                return self.client.search.query(
+                    index_id=index_id,
+                    search_options=["visual", "audio"],
+                    query_text=query_text,
+                    page_limit=page_limit,
+                    group_by="video",
+                    sort_option="score",
+                    request_options=request_options,
+                )
+
+        if self.search_hedger is not None:
+            first_page = self.search_hedger.call(query, timeout=timeout)
+        else:
+            first_page = query()
+
+        deadline = None if timeout is None else started_at + timeout
+        return self._consume_search_pages(
+            first_page, min_score, max_results, deadline, index_id
+        )
+
+    def _consume_search_pages(
+        self,
+        first_page: "SyncPager",
+        min_score: float,
+        max_results: int,
+        deadline: float | None,
+        index_id: str,
+    ) -> list[AdSearchResult]:
+        """Collect search results page by page, stopping once no longer useful.
+
+        Results are sorted by descending score, so reading stops at the
+        first video without a clip above min_score, or once max_results
+        videos are collected. While the current page is read, the next one
+        is prefetched if it can still contribute results.
+
+        Args:
+            first_page: First page of a search sorted by score
+            min_score: Clips scoring at or below this are dropped
+            max_results: Maximum number of results to return
+            deadline: time.monotonic() value after which no page is fetched
+            index_id: Index ID of the shard, for logging
+
+        Returns:
+            List of AdSearchResult objects with raw clip scores
+        """
+        results: list[AdSearchResult] = []
+        page: "SyncPager | None" = first_page
+        pages = 0
+
+        while page is not None:
+            pages += 1
+            items = page.items or []
+
+            # Worth fetching while this page ends above the threshold and
+            # cannot fill max_results on its own
+            fetch_next = (
+                page.has_next
+                and bool(items)
+                and _best_clip_score(items[-1]) > min_score
+                and len(results) + len(items) < max_results
+            )
+            prefetched: Future | None = None
+            if fetch_next and self.search_prefetch:
+                prefetched = self._page_executor.submit(
+                    propagate(self._next_page), page
+                )
+
+            exhausted = False
+            for item in items:
+                if not item.id or not item.clips:  # Grouped by video
+                    continue
+                if _best_clip_score(item) <= min_score:
+                    exhausted = True
+                    break
+
+                clips = [
+                    AdClip(
+                        score=float(clip.score),
+                        start=float(clip.start) if clip.start is not None else 0.0,
+                        end=float(clip.end) if clip.end is not None else 0.0,
+                        video_id=str(clip.video_id) if clip.video_id else "",
+                        confidence=str(clip.confidence) if clip.confidence else "",
+                        thumbnail_url=getattr(clip, "thumbnail_url", None),
+                        transcription=getattr(clip, "transcription", None),
+                    )
+                    for clip in item.clips
+                    if clip.score is not None and clip.score > min_score
+                ]
+                results.append(AdSearchResult(id=item.id, clips=clips))
+                if len(results) >= max_results:
+                    exhausted = True
+                    break
+
+            if not fetch_next or exhausted:
+                if prefetched is not None:
+                    prefetched.cancel()
+                break
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+            try:
+                if prefetched is not None:
+                    page = prefetched.result(timeout=remaining)
+                else:
+                    page = self._next_page(page)
+            except TimeoutError:
+                logger.warning(
+                    "Search deadline reached before the next page",
+                    extra={"index_id": index_id, "pages": pages},
+                )
+                break
+            except Exception:
+                # Keep what the earlier pages returned
+                logger.warning(
+                    "Failed to fetch next search page",
+                    extra={"index_id": index_id, "pages": pages},
+                    exc_info=True,
+                )
+                break
+
+        logger.info(
+            "Search pages consumed",
+            extra={"index_id": index_id, "pages": pages, "results": len(results)},
+        )
+        return results
+
+    def _scatter_search(
+        self,
+        index_ids: list[str],
+        query_text: str,
+        page_limit: int,
+        timeout: float | None,
+        min_score: float,
+        max_results: int,
+    ) -> list[AdSearchResult]:
+        """Search several shards concurrently and merge normalized results.
+
+        Clip scores are divided by the best score of their shard, so shards
+        of different size and content rank on the same 0-100 scale. Shards
+        that fail or time out are logged and left out, as long as one shard
+        succeeds.
+
+        Args:
+            index_ids: Index IDs of the shards
+            query_text: The search query describing the desired ad content
+            page_limit: Number of results per page
+            timeout: Time budget in seconds for the whole search
+            min_score: Clips scoring at or below this are dropped
+            max_results: Maximum number of results per shard and overall
+
+        Returns:
+            Merged AdSearchResult objects, best average score first
+
+        Raises:
+            TimeoutError: If no shard answered within the timeout
+            Exception: The error of a failing shard if no shard succeeded
+        """
+        futures = {
+            index_id: self._search_executor.submit(
+                propagate(self._search_index),
+                index_id,
+                query_text,
+                page_limit,
+                timeout,
+                min_score,
+                max_results,
+            )
+            for index_id in index_ids
+        }
+        done, _ = wait(futures.values(), timeout=timeout)
+        if not done:
+            raise TimeoutError("No ads index shard answered before the timeout")
+
+        merged: list[AdSearchResult] = []
+        error: BaseException | None = None
+        succeeded = 0
+        for index_id, future in futures.items():
+            if future not in done:
+                logger.warning(
+                    "Ads index shard timed out", extra={"index_id": index_id}
+                )
+                continue
+            if future.exception() is not None:
+                error = future.exception()
+                logger.warning(
+                    "Ads index shard search failed",
+                    extra={"index_id": index_id, "error": str(error)},
+                )
+                continue
+
+            succeeded += 1
+            shard_results = future.result()
+            best = max(
+                (clip.score for result in shard_results for clip in result.clips),
+                default=0.0,
+            )
+            scale = 100 / best if best > 0 else 0.0
+            for result in shard_results:
+                clips = [
+                    clip.model_copy(update={"score": clip.score * scale})
+                    for clip in result.clips
+                ]
+                merged.append(result.model_copy(update={"clips": clips}))
+
+        if not succeeded:
+            if error is not None:
+                raise error
+            raise TimeoutError("No ads index shard answered before the timeout")
+
+        merged.sort(key=lambda x: x.average_score, reverse=True)
+        return merged[:max_results]
+
     def search_ads(
         self,
         query_text: str,
         page_limit: int = 5,
+        timeout: float | None = None,
+        tags: list[str] | None = None,
+        min_score: float | None = None,
+        max_results: int | None = None,
     ) -> list[AdSearchResult]:
-        """Search for ads in the ads index using TwelveLabs search API.
+        """Search for ads in the ads indexes using TwelveLabs search API.
+
+        Pages are read lazily and reading stops at the first result without
+        a clip above min_score or once max_results results are collected, so
+        a larger max_results only costs the pages it actually uses.
+
+        With several ads index shards, the shards routed by tags are searched
+        concurrently. Clip scores are then divided by the best score of
+        their shard, so shards of different size and content rank on the
+        same 0-100 scale, and the results are merged by average score.
 
         Args:
             query_text: The search query describing the desired ad content
-            page_limit: Maximum number of results to return (default: 5)
+            page_limit: Number of results per page (default: 5)
+            timeout: Time budget in seconds for the whole search, including
+                the jitter delay before the request
+            tags: Routing hints selecting the shards to search, usually the
+                tags of the video (default: every shard)
+            min_score: Clips scoring at or below this are dropped
+                (default: the service search_min_score)
+            max_results: Maximum number of results to return
+                (default: the service search_max_results)
 
         Returns:
             List of AdSearchResult objects containing matched ads
@@ -319,55 +977,156 @@ class TwelveLabsService:
         Raises:
             TwelveLabsServiceError: If the search request fails
         """
+        index_ids = self._route_ads_indexes(tags)
+        if min_score is None:
+            min_score = self.search_min_score
+        if max_results is None:
+            max_results = self.search_max_results
+        with track("ads_search"):
+            try:
+                logger.info(
+                    "Searching ads index",
+                    extra={
+                        "query": query_text,
+                        "page_limit": page_limit,
+                        "min_score": min_score,
+                        "max_results": max_results,
+                        "index_ids": index_ids,
+                    },
+                )
+
+                started_at = time.monotonic()
+                jitter = random.random() * 3
+                if timeout is not None:
+                    # Never spend more than half of the budget waiting
+                    jitter = min(jitter, timeout / 2)
+                with track("ads_search.jitter"):
+                    time.sleep(jitter)
+
+                remaining = None
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - started_at)
+
+                # A single index is searched on the calling thread
+                if len(index_ids) == 1:
+                    results = self._search_index(
+                        index_ids[0],
+                        query_text,
+                        page_limit,
+                        remaining,
+                        min_score,
+                        max_results,
+                    )
+                else:
+                    results = self._scatter_search(
+                        index_ids,
+                        query_text,
+                        page_limit,
+                        remaining,
+                        min_score,
+                        max_results,
+                    )
+
+                logger.info(
+                    "Ad search completed",
+                    extra={"query": query_text, "result_count": len(results)},
+                )
+
+                return results
+
+            except Exception as e:
+                logger.error("Failed to search ads", exc_info=True)
+                raise TwelveLabsServiceError(
+                    f"Failed to search ads: {str(e)}",
+                    error_code="SEARCH_ERROR",
+                ) from e
+
+    def list_videos(self, index_id: str) -> list[str]:
+        """List the IDs of the videos of an index.
+
+        Args:
+            index_id: ID of the index
+
+        Returns:
+            Video IDs
+
+        Raises:
+            TwelveLabsServiceError: If the videos cannot be listed
+        """
         try:
-            logger.info(
-                "Searching ads index",
-                extra={
-                    "query": query_text,
-                    "page_limit": page_limit,
-                    "index_id": self.ads_index_id,
-                },
+            self._throttle()
+            return [
+                video.id for video in self.client.indexes.videos.list(index_id=index_id)
+            ]
+        except Exception as e:
+            logger.error(
+                "Failed to list videos", extra={"index_id": index_id}, exc_info=True
             )
+            raise TwelveLabsServiceError(
+                f"Failed to list videos: {str(e)}",
+                error_code="API_ERROR",
+            ) from e
 
-            time.sleep(random.random() * 3)
+    def list_ad_videos(self) -> list[tuple[str, float | None]]:
+        """List the videos of every ads index shard.
 
-            response = self.client.search.query(
-                index_id=self.ads_index_id,
-                search_options=["visual", "audio"],
-                query_text=query_text,
-                page_limit=page_limit,
-                group_by="video",
-                sort_option="score",
-            )
+        Returns:
+            List of (video ID, duration in seconds) tuples
 
-            results = []
-            for item in response:
-                if item.id and item.clips:  # Grouped by video
-                    clips = [
-                        AdClip(
-                            score=float(clip.score) if clip.score is not None else 0.0,
-                            start=float(clip.start) if clip.start is not None else 0.0,
-                            end=float(clip.end) if clip.end is not None else 0.0,
-                            video_id=str(clip.video_id) if clip.video_id else "",
-                            confidence=str(clip.confidence) if clip.confidence else "",
-                            thumbnail_url=getattr(clip, "thumbnail_url", None),
-                            transcription=getattr(clip, "transcription", None),
-                        )
-                        for clip in item.clips
-                        if clip.score is not None and clip.score > 0.7
-                    ]
-                    results.append(AdSearchResult(id=item.id, clips=clips))
+        Raises:
+            TwelveLabsServiceError: If the videos cannot be listed
+        """
+        try:
+            return [
+                (
+                    video.id,
+                    video.system_metadata.duration if video.system_metadata else None,
+                )
+                for index_id in self.ads_index_shards
+                for video in self.client.indexes.videos.list(index_id=index_id)
+            ]
+        except Exception as e:
+            logger.error("Failed to list ad videos", exc_info=True)
+            raise TwelveLabsServiceError(
+                f"Failed to list ad videos: {str(e)}",
+                error_code="API_ERROR",
+            ) from e
 
-            logger.info(
-                "Ad search completed",
-                extra={"query": query_text, "result_count": len(results)},
-            )
+    def profile_ad(self, video_id: str, duration: float | None = None) -> AdProfile:
+        """Describe an ad with the ad profile prompt.
+
+        Args:
+            video_id: ID of the ad video
+            duration: Duration of the ad in seconds, if known
 
-            return results
+        Returns:
+            AdProfile with the themes, tone and keywords of the ad
+
+        Raises:
+            TwelveLabsServiceError: If the analysis fails or its answer is invalid
+        """
+        prompt = (PROMPTS_DIR / "ads" / "profile.txt").read_text()
 
+        logger.info("Profiling ad", extra={"video_id": video_id})
+        try:
+            result = self._analyze(video_id, prompt, "ad_profile")
         except Exception as e:
-            logger.error("Failed to search ads", exc_info=True)
+            logger.error("Failed to profile ad", exc_info=True)
             raise TwelveLabsServiceError(
-                f"Failed to search ads: {str(e)}",
-                error_code="SEARCH_ERROR",
+                f"Failed to profile ad: {str(e)}",
+                error_code="API_ERROR",
             ) from e
+
+        try:
+            profile = parse_ad_profile(video_id, result.data or "")
+        except ValueError as e:
+            logger.warning(
+                "Invalid ad profile response",
+                extra={"video_id": video_id, "response": result.data},
+            )
+            raise TwelveLabsServiceError(
+                f"Invalid ad profile response: {str(e)}",
+                error_code="PROFILE_PARSE_ERROR",
+            ) from e
+
+        return profile.model_copy(update={"duration": duration})
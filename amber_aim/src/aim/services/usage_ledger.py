@@ -0,0 +1,138 @@
+"""Usage ledgers of the videos, stored next to their placement results."""
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from aim.models.usage import StageUsage, UsageResponse, VideoUsage
+from aim.services.s3_service import S3Service
+from aim.usage import UsageCollector, collecting
+
+logger = logging.getLogger(__name__)
+
+
+class UsageLedger:
+    """Account the API usage of analysis and suggestion runs.
+
+    Every finished run is added to the totals of this worker, served by
+    /usage, and merged into results/usage_{video_id}.json by a background
+    thread, off the request path. Merges are serialized within the worker,
+    runs of the same video finishing at the same time in two workers can
+    lose one of the two updates.
+    """
+
+    def __init__(self, s3_service: S3Service | None = None):
+        """Initialize usage ledger.
+
+        Args:
+            s3_service: S3 service storing the ledgers of the videos
+                (default: totals kept in memory only)
+        """
+        self.s3_service = s3_service
+        self._lock = threading.Lock()
+        self._videos: set[str] = set()
+        self._runs: dict[str, StageUsage] = {}
+        self._stages: dict[str, StageUsage] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="usage-ledger"
+        )
+
+    @contextmanager
+    def collect(self, video_id: str, kind: str) -> Iterator[UsageCollector]:
+        """Account the stages run inside the block to a run of a video.
+
+        Example:
+            with usage_ledger.collect(video_id, "analyze"):
+                twelve_labs_service.analyze_video(index_id, video_id, "creator")
+
+        Args:
+            video_id: ID of the video
+            kind: Kind of run, such as "analyze" or "suggest"
+
+        Yields:
+            Collector of the run
+        """
+        collector = UsageCollector(video_id, kind)
+        started = time.perf_counter()
+        failed = True
+        try:
+            with collecting(collector):
+                yield collector
+            failed = False
+        finally:
+            self.record(collector.finish(time.perf_counter() - started, failed))
+
+    def record(self, usage: VideoUsage) -> None:
+        """Add a finished run to the totals and store it with the video.
+
+        Args:
+            usage: Ledger of the video holding the run
+        """
+        with self._lock:
+            self._videos.add(usage.video_id)
+            for totals, source in (
+                (self._runs, usage.runs),
+                (self._stages, usage.stages),
+            ):
+                for name, stage_usage in source.items():
+                    totals.setdefault(name, StageUsage()).add(stage_usage)
+
+        if self.s3_service is not None:
+            self._executor.submit(self._store, usage)
+
+    def _store(self, usage: VideoUsage) -> None:
+        path = f"results/usage_{usage.video_id}.json"
+        try:
+            stored = self.s3_service.download_json_file(path)
+            ledger = (
+                VideoUsage.model_validate(stored)
+                if stored is not None
+                else VideoUsage(video_id=usage.video_id)
+            )
+            ledger.merge(usage)
+            self.s3_service.upload_json_file_background(
+                path, ledger.model_dump(mode="json")
+            )
+        except Exception:
+            logger.warning(
+                "Failed to store usage ledger",
+                extra={"video_id": usage.video_id},
+                exc_info=True,
+            )
+
+    def totals(self) -> UsageResponse:
+        """Return the usage of the runs finished by this worker."""
+        with self._lock:
+            return UsageResponse(
+                videos=len(self._videos),
+                runs={name: usage.model_copy() for name, usage in self._runs.items()},
+                stages={
+                    name: usage.model_copy()
+                    for name, usage in sorted(
+                        self._stages.items(),
+                        key=lambda item: item[1].wall_time,
+                        reverse=True,
+                    )
+                },
+            )
+
+    def load(self, video_id: str) -> VideoUsage | None:
+        """Load the stored ledger of a video.
+
+        Args:
+            video_id: ID of the video
+
+        Returns:
+            Ledger of every run of the video, None if none was stored
+        """
+        if self.s3_service is None:
+            return None
+        stored = self.s3_service.download_json_file(f"results/usage_{video_id}.json")
+        return VideoUsage.model_validate(stored) if stored is not None else None
+
+    def close(self) -> None:
+        """Wait for the ledgers still being stored."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,235 @@
+"""Write-behind queue taking object uploads off the request path."""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from aim.metrics import REGISTRY, Counter
+
+logger = logging.getLogger(__name__)
+
+WRITES_DROPPED = REGISTRY.register(
+    Counter(
+        "aim_write_behind_dropped_total",
+        "Background writes dropped because every upload attempt failed",
+        ("reason",),
+    )
+)
+WRITES_OVERFLOWED = REGISTRY.register(
+    Counter(
+        "aim_write_behind_overflow_total",
+        "Background writes uploaded outside of the queue because it was full",
+    )
+)
+
+
+class WriteBehindUploader:
+    """Upload objects in the background with batching and retries.
+
+    Writes are queued and acknowledged immediately. A worker thread drains
+    the queue in batches, keeping only the latest write per key, and uploads
+    each batch in parallel with exponential backoff on failure. Until a
+    write is uploaded, pending() returns it so reads in the same process
+    see their own writes, and wait() blocks until it is uploaded or
+    dropped.
+
+    Writers never wait: put() is called from the event loop, and a write
+    arriving while the queue is full is uploaded by the upload threads
+    directly instead. Uploads of the same key are serialized and a write
+    superseded by a later one is skipped, so the last write to a key is
+    the one stored. A write is only lost once every attempt failed.
+    """
+
+    def __init__(
+        self,
+        upload: Callable[[str, Any], None],
+        max_queue_size: int = 1000,
+        batch_size: int = 16,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5,
+    ):
+        """Initialize write-behind uploader.
+
+        Args:
+            upload: Function performing a single blocking upload of (key, data)
+            max_queue_size: Maximum queued writes, later ones are uploaded
+                directly by the upload threads
+            batch_size: Maximum writes uploaded together
+            max_attempts: Attempts per write before it is dropped
+            retry_backoff: Initial delay in seconds between attempts, doubled
+                after every failure
+        """
+        self._upload = upload
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+        self._queue: queue.Queue[tuple[str, Any] | None] = queue.Queue(
+            maxsize=max_queue_size
+        )
+        self._lock = threading.Lock()
+        # Signalled whenever the latest write of a key is uploaded or dropped
+        self._resolved = threading.Condition(self._lock)
+        self._pending: dict[str, Any] = {}
+        # Keys whose latest write was dropped
+        self._failed: set[str] = set()
+        # Serialize the uploads of a key, removed with its pending write
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._overflow: set[Future] = set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=batch_size, thread_name_prefix="write-behind-upload"
+        )
+        self._worker = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._worker.start()
+
+    def put(self, key: str, data: Any) -> None:
+        """Queue a write, uploading it outside of the queue when it is full.
+
+        Args:
+            key: Object key
+            data: Object data passed to the upload function
+        """
+        with self._lock:
+            self._pending[key] = data
+            self._failed.discard(key)
+            try:
+                self._queue.put_nowait((key, data))
+                return
+            except queue.Full:
+                future = self._executor.submit(self._upload_with_retries, key, data)
+                self._overflow.add(future)
+
+        future.add_done_callback(self._overflow_done)
+        WRITES_OVERFLOWED.inc()
+        logger.warning(
+            "Write-behind queue full, uploading write directly", extra={"key": key}
+        )
+
+    def _overflow_done(self, future: Future) -> None:
+        with self._lock:
+            self._overflow.discard(future)
+
+    def pending(self, key: str) -> Any | None:
+        """Return the data of a write not uploaded yet, None otherwise."""
+        with self._lock:
+            return self._pending.get(key)
+
+    def wait(self, key: str, timeout: float | None = None) -> bool:
+        """Block until the latest write of a key is uploaded or dropped.
+
+        Args:
+            key: Object key
+            timeout: Maximum time in seconds to wait (default: no limit)
+
+        Returns:
+            True if the write was uploaded or none is pending, False if it
+            was dropped or is still pending after the timeout
+        """
+        with self._resolved:
+            uploaded = self._resolved.wait_for(
+                lambda: key not in self._pending, timeout=timeout
+            )
+            return uploaded and key not in self._failed
+
+    def flush(self) -> None:
+        """Block until every queued write has been uploaded or dropped."""
+        self._queue.join()
+        with self._lock:
+            overflow = list(self._overflow)
+        wait(overflow)
+
+    def close(self) -> None:
+        """Flush pending writes and stop the worker."""
+        self.flush()
+        self._queue.put(None)
+        self._worker.join()
+        self._executor.shutdown(wait=True)
+
+    def _next_batch(self) -> tuple[dict[str, Any], int, bool]:
+        """Wait for a write and collect what else is queued, up to batch_size.
+
+        Returns:
+            Tuple of (latest data per key, queue items taken, stop requested)
+        """
+        item = self._queue.get()
+        if item is None:
+            return {}, 1, True
+
+        batch = {item[0]: item[1]}
+        taken = 1
+        while taken < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            taken += 1
+            if item is None:
+                return batch, taken, True
+            # A later write to the same key supersedes the earlier one
+            batch[item[0]] = item[1]
+        return batch, taken, False
+
+    def _run(self) -> None:
+        while True:
+            batch, taken, stop = self._next_batch()
+            try:
+                list(
+                    self._executor.map(
+                        lambda item: self._upload_with_retries(*item), batch.items()
+                    )
+                )
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _upload_with_retries(self, key: str, data: Any) -> None:
+        with self._lock:
+            if self._pending.get(key) is not data:
+                # Superseded, the later write is uploaded instead
+                return
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if self._pending.get(key) is not data:
+                    return
+
+            uploaded = False
+            delay = self.retry_backoff
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    self._upload(key, data)
+                    uploaded = True
+                    break
+                except Exception:
+                    if attempt == self.max_attempts:
+                        WRITES_DROPPED.inc("upload_failed")
+                        logger.error(
+                            "Write-behind upload failed, dropping write",
+                            extra={"key": key, "attempts": attempt},
+                            exc_info=True,
+                        )
+                        break
+                    logger.warning(
+                        "Write-behind upload failed, retrying",
+                        extra={"key": key, "attempt": attempt},
+                    )
+                    time.sleep(delay)
+                    delay *= 2
+
+            with self._lock:
+                # Keep a newer write to the same key visible until it is uploaded
+                if self._pending.get(key) is data:
+                    del self._pending[key]
+                    self._key_locks.pop(key, None)
+                    if not uploaded:
+                        self._failed.add(key)
+                    self._resolved.notify_all()
@@ -0,0 +1,569 @@
+"""Tracing spans following a video through requests and background work.
+
+Spans nest through a context variable: the HTTP middleware opens the root
+span of a request, or continues the trace of an incoming W3C traceparent
+header, and every pipeline stage timed by aim.metrics.track() opens a child
+span. asyncio tasks and asyncio.to_thread() inherit the current span, work
+handed to thread pools or FastAPI BackgroundTasks is wrapped with
+propagate() so it stays in the trace of the request that started it.
+
+Finished spans are exported in batches from a background thread, in the
+OTLP/JSON encoding, either appended to a local file readable by the
+OpenTelemetry collector otlpjsonfile receiver, or posted to an OTLP/HTTP
+endpoint. With exporting off spans are still created, so log lines carry
+trace IDs.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any, ParamSpec, Protocol, TypeVar
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+SERVICE_NAME = "aim"
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass
+class Span:
+    """A timed operation of a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute, such as the video ID the span works on."""
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Encode the span in the OTLP/JSON format."""
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": (
+                {"code": 2, "message": self.error}
+                if self.error is not None
+                else {"code": 1}
+            ),
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # 64-bit integers are strings in OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, list | tuple):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+def otlp_request(spans: Iterable[Span]) -> dict[str, Any]:
+    """Wrap spans in an OTLP/JSON ExportTraceServiceRequest.
+
+    Args:
+        spans: Finished spans
+
+    Returns:
+        Request body accepted by OTLP/HTTP collectors
+    """
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes({"service.name": SERVICE_NAME})
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class FileSpanExporter:
+    """Append span batches to a file, one OTLP/JSON request per line."""
+
+    def __init__(self, path: str):
+        """Initialize file span exporter.
+
+        Args:
+            path: Span file, created with its directory if missing
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        """Write a batch of finished spans."""
+        with open(self.path, "a") as f:
+            f.write(json.dumps(otlp_request(spans)) + "\n")
+
+
+class OTLPHttpSpanExporter:
+    """Post span batches to an OTLP/HTTP collector in the JSON encoding."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        """Initialize OTLP/HTTP span exporter.
+
+        Args:
+            endpoint: Traces endpoint of the collector, such as
+                http://localhost:4318/v1/traces
+            timeout: Timeout in seconds of each export request
+        """
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: list[Span]) -> None:
+        """Send a batch of finished spans."""
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(otlp_request(spans)).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class SpanProcessor:
+    """Export finished spans in batches from a background thread.
+
+    Spans are dropped rather than slowing requests down when the queue is
+    full or the exporter fails.
+    """
+
+    def __init__(
+        self,
+        exporter: FileSpanExporter | OTLPHttpSpanExporter,
+        max_queue_size: int = 10000,
+        batch_size: int = 512,
+        flush_interval: float = 2.0,
+    ):
+        """Initialize span processor.
+
+        Args:
+            exporter: Destination of the spans
+            max_queue_size: Maximum finished spans waiting for export
+            batch_size: Maximum spans exported together
+            flush_interval: Maximum seconds a span waits for its batch
+        """
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=max_queue_size)
+        self._worker = threading.Thread(
+            target=self._run, name="span-export", daemon=True
+        )
+        self._worker.start()
+
+    def on_end(self, span: Span) -> None:
+        """Queue a finished span for export."""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Export the queued spans and stop the worker."""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: list[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    span = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if span is None:
+                    stop = True
+                    break
+                batch.append(span)
+
+            if not batch:
+                continue
+            try:
+                self.exporter.export(batch)
+            except Exception:
+                self.dropped += len(batch)
+                logger.warning(
+                    "Span export failed",
+                    extra={"span_count": len(batch)},
+                    exc_info=True,
+                )
+
+
+class TraceWatcher(Protocol):
+    """Notified when a thread starts and stops working on a watched trace."""
+
+    def enter(self) -> None:
+        """The calling thread started working on the trace."""
+
+    def exit(self) -> None:
+        """The calling thread stopped working on the trace."""
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_processor: SpanProcessor | None = None
+# Checked by every span and propagated call, empty unless a trace is profiled
+_watchers: dict[str, TraceWatcher] = {}
+
+
+def watch(trace_id: str, watcher: TraceWatcher) -> None:
+    """Notify a watcher of the threads working on a trace, see aim.profiling.
+
+    Args:
+        trace_id: ID of the trace
+        watcher: Called from every thread entering or leaving the trace
+    """
+    _watchers[trace_id] = watcher
+
+
+def unwatch(trace_id: str) -> None:
+    """Stop notifying the watcher of a trace."""
+    _watchers.pop(trace_id, None)
+
+
+def _watcher(span: Span | None) -> TraceWatcher | None:
+    if not _watchers or span is None:
+        return None
+    return _watchers.get(span.trace_id)
+
+
+def configure(
+    exporter: str = "off",
+    path: str = "data/traces/spans.jsonl",
+    endpoint: str = "http://localhost:4318/v1/traces",
+) -> None:
+    """Start exporting finished spans.
+
+    Args:
+        exporter: "off", "file" or "otlp"
+        path: Span file of the file exporter
+        endpoint: Traces endpoint of the OTLP/HTTP exporter
+    """
+    global _processor
+    shutdown()
+    if exporter == "file":
+        _processor = SpanProcessor(FileSpanExporter(path))
+    elif exporter == "otlp":
+        _processor = SpanProcessor(OTLPHttpSpanExporter(endpoint))
+
+
+def shutdown() -> None:
+    """Export the spans still queued and stop exporting."""
+    global _processor
+    if _processor is not None:
+        _processor.close()
+        _processor = None
+
+
+def current_span() -> Span | None:
+    """Return the innermost open span of the current context."""
+    return _current_span.get()
+
+
+def set_attributes(**attributes: Any) -> None:
+    """Set attributes on the current span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str] | None:
+    """Parse a W3C traceparent header.
+
+    Args:
+        header: Header value, possibly missing
+
+    Returns:
+        Tuple of (trace ID, parent span ID), None if missing or invalid
+    """
+    if not header:
+        return None
+    match = TRACEPARENT_PATTERN.match(header.strip().lower())
+    if match is None or set(match.group(1)) == {"0"}:
+        return None
+    return match.group(1), match.group(2)
+
+
+def format_traceparent(span: Span) -> str:
+    """Format the W3C traceparent header continuing a span's trace."""
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+def propagate(fn: Callable[P, R]) -> Callable[P, R]:
+    """Bind a callable to the current span, for work run on other threads.
+
+    Thread pools and FastAPI BackgroundTasks do not carry context variables
+    over, so spans opened by the wrapped callable would start new traces.
+    The callable runs in a copy of the context current now, which also
+    carries the other context variables, such as the usage collector.
+
+    Args:
+        fn: Callable run later, possibly on another thread
+
+    Returns:
+        Callable running fn as a child of the span current now
+    """
+    context = contextvars.copy_context()
+    parent = context.get(_current_span)
+
+    @functools.wraps(fn)
+    def run(*args: P.args, **kwargs: P.kwargs) -> R:
+        watcher = _watcher(parent)
+        if watcher is not None:
+            watcher.enter()
+        try:
+            # A context can only be entered by one thread at a time, every
+            # call gets its own copy
+            return context.copy().run(fn, *args, **kwargs)
+        finally:
+            if watcher is not None:
+                watcher.exit()
+
+    return run
+
+
+def watched(fn: Callable[P, R]) -> Callable[P, R]:
+    """Report the thread calling fn to the watcher of the current trace.
+
+    For sync route handlers, which FastAPI runs on worker threads with the
+    request span current but without opening a span of their own, so a
+    profile of the request would only sample the event loop thread.
+
+    Example:
+        @app.post("/analyze")
+        @tracing.watched
+        def analyze_video(...):
+            ...
+
+    Args:
+        fn: Callable run in the context of a span, on any thread
+
+    Returns:
+        Callable entering and exiting the watcher around fn
+    """
+
+    @functools.wraps(fn)
+    def run(*args: P.args, **kwargs: P.kwargs) -> R:
+        watcher = _watcher(_current_span.get())
+        if watcher is not None:
+            watcher.enter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if watcher is not None:
+                watcher.exit()
+
+    return run
+
+
+class span:
+    """Open a span as a child of the current one, as a context manager.
+
+    Example:
+        with span("analyze_video", video_id=video_id) as current:
+            ...
+    """
+
+    __slots__ = ("span", "_token", "_watcher")
+
+    def __init__(
+        self, name: str, parent: tuple[str, str] | None = None, **attributes: Any
+    ):
+        """Initialize span.
+
+        Args:
+            name: Span name, such as "twelvelabs.analyze"
+            parent: (trace ID, span ID) of a remote parent, such as a parsed
+                traceparent header (default: the current span)
+            **attributes: Initial span attributes
+        """
+        current = _current_span.get()
+        if parent is None and current is not None:
+            parent = (current.trace_id, current.span_id)
+        self.span = Span(
+            name=name,
+            trace_id=parent[0] if parent else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent[1] if parent else None,
+            attributes=attributes,
+        )
+
+    def __enter__(self) -> Span:
+        self.span.start_ns = time.time_ns()
+        self._token = _current_span.set(self.span)
+        self._watcher = _watcher(self.span)
+        if self._watcher is not None:
+            self._watcher.enter()
+        return self.span
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.span.end_ns = time.time_ns()
+        if exc_type is not None and self.span.error is None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        if self._watcher is not None:
+            self._watcher.exit()
+        if _processor is not None:
+            _processor.on_end(self.span)
+
+
+def read_spans(path: str) -> list[dict[str, Any]]:
+    """Read the spans written by the file exporter.
+
+    Args:
+        path: Span file
+
+    Returns:
+        Spans in the OTLP/JSON encoding
+    """
+    spans = []
+    with open(path) as f:
+        for line in f:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                # A process killed mid-write leaves a truncated last line
+                continue
+            for resource_spans in request.get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    spans.extend(scope_spans.get("spans", []))
+    return spans
+
+
+def find_traces(
+    spans: list[dict[str, Any]], ids: set[str]
+) -> list[list[dict[str, Any]]]:
+    """Select the traces matching trace IDs or span attribute values.
+
+    Args:
+        spans: Spans in the OTLP/JSON encoding, of any number of traces
+        ids: Trace IDs, or attribute values such as video IDs or S3 paths
+
+    Returns:
+        Spans of every matching trace, traces ordered by start time
+    """
+    traces: dict[str, list[dict[str, Any]]] = {}
+    for node in spans:
+        traces.setdefault(node["traceId"], []).append(node)
+
+    def matches(node: dict[str, Any]) -> bool:
+        return node["traceId"] in ids or any(
+            str(next(iter(attribute["value"].values()))) in ids
+            for attribute in node.get("attributes", [])
+        )
+
+    selected = [trace for trace in traces.values() if any(map(matches, trace))]
+    selected.sort(
+        key=lambda trace: min(int(node["startTimeUnixNano"]) for node in trace)
+    )
+    return selected
+
+
+def format_trace(spans: list[dict[str, Any]]) -> str:
+    """Render the spans of a trace as a tree with the critical path marked.
+
+    The critical path follows, from each root, the child that finished
+    last, which is the chain of work that decided the end-to-end latency.
+
+    Args:
+        spans: Spans of one trace in the OTLP/JSON encoding
+
+    Returns:
+        Human-readable multi-line tree
+    """
+    by_id = {node["spanId"]: node for node in spans}
+    children: dict[str | None, list[dict[str, Any]]] = {}
+    for node in spans:
+        parent = node.get("parentSpanId")
+        children.setdefault(parent if parent in by_id else None, []).append(node)
+    for siblings in children.values():
+        siblings.sort(key=lambda node: int(node["startTimeUnixNano"]))
+
+    trace_start = min(int(node["startTimeUnixNano"]) for node in spans)
+    lines = []
+
+    def render(node: dict[str, Any], depth: int, critical: bool) -> None:
+        start = (int(node["startTimeUnixNano"]) - trace_start) / 1e9
+        duration = (int(node["endTimeUnixNano"]) - int(node["startTimeUnixNano"])) / 1e9
+        attributes = ", ".join(
+            f"{attribute['key']}={next(iter(attribute['value'].values()))}"
+            for attribute in node.get("attributes", [])
+        )
+        failed = node.get("status", {}).get("code") == 2
+        lines.append(
+            f"{'*' if critical else ' '} {'  ' * depth}{node['name']} "
+            f"+{start:.3f}s {duration:.3f}s"
+            + (" ERROR" if failed else "")
+            + (f" [{attributes}]" if attributes else "")
+        )
+
+        nested = children.get(node["spanId"], [])
+        last = max(
+            nested, key=lambda child: int(child["endTimeUnixNano"]), default=None
+        )
+        for child in nested:
+            render(child, depth + 1, critical and child is last)
+
+    for root in children.get(None, []):
+        render(root, 0, True)
+    return "\n".join(lines)
@@ -0,0 +1,117 @@
+"""Per-video accounting of the API calls, tokens and bytes of pipeline stages.
+
+An analysis or ads suggestion run of a video collects its usage in a
+UsageCollector made current with collecting(). Every pipeline stage timed
+by aim.metrics.track() inside the run adds a call, its wall time and its
+errors to the collector, and the call sites add the tokens and bytes the
+APIs report. The collector is a context variable, carried into asyncio
+tasks and asyncio.to_thread() like the current span, and into thread pools
+and background tasks by aim.tracing.propagate(). Stages outside of any run
+are not accounted.
+"""
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from aim.models.usage import StageUsage, VideoUsage
+
+_current_collector: ContextVar["UsageCollector | None"] = ContextVar(
+    "usage_collector", default=None
+)
+
+
+class UsageCollector:
+    """Usage of one run of a video, added to from any thread."""
+
+    def __init__(self, video_id: str, kind: str):
+        """Initialize usage collector.
+
+        Args:
+            video_id: ID of the video
+            kind: Kind of run, such as "analyze" or "suggest"
+        """
+        self.video_id = video_id
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._stages: dict[str, StageUsage] = {}
+
+    def add(
+        self,
+        stage: str,
+        calls: int = 0,
+        errors: int = 0,
+        wall_time: float = 0.0,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+    ) -> None:
+        """Add usage to a stage.
+
+        Args:
+            stage: Stage name, such as "twelvelabs.search"
+            calls: Calls made
+            errors: Calls that failed
+            wall_time: Seconds spent in the calls
+            input_tokens: Prompt tokens billed
+            output_tokens: Completion tokens billed
+            bytes_sent: Request payload bytes
+            bytes_received: Response payload bytes
+        """
+        with self._lock:
+            usage = self._stages.get(stage)
+            if usage is None:
+                usage = self._stages[stage] = StageUsage()
+            usage.calls += calls
+            usage.errors += errors
+            usage.wall_time += wall_time
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+            usage.bytes_sent += bytes_sent
+            usage.bytes_received += bytes_received
+
+    def finish(self, wall_time: float, failed: bool) -> VideoUsage:
+        """Build the ledger of the run.
+
+        Args:
+            wall_time: Seconds the run took
+            failed: Whether the run raised
+
+        Returns:
+            Ledger of the video holding this run only
+        """
+        with self._lock:
+            stages = {name: usage.model_copy() for name, usage in self._stages.items()}
+        return VideoUsage(
+            video_id=self.video_id,
+            runs={
+                self.kind: StageUsage(calls=1, errors=int(failed), wall_time=wall_time)
+            },
+            stages=stages,
+            updated_at=datetime.now(timezone.utc),
+        )
+
+
+def current_collector() -> UsageCollector | None:
+    """Return the collector of the run in progress, None outside of runs."""
+    return _current_collector.get()
+
+
+@contextmanager
+def collecting(collector: UsageCollector) -> Iterator[UsageCollector]:
+    """Make collector current for the stages run inside the block.
+
+    Args:
+        collector: Collector of the run
+
+    Yields:
+        The collector
+    """
+    token = _current_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_collector.reset(token)